@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Orchestration benchmarks.
+Measures the overhead the automation adds around freqtrade (process spawns,
+version probes, hyperopt-show calls, result parsing and summary writes) by
+pointing it at benchmarks/stub_freqtrade.py instead of a real install. Every
+stage reports wall/CPU time and peak memory; results can be saved as JSON and
+compared against an earlier baseline.
+
+    python3 benchmarks/run_benchmarks.py --configs 200 --output baseline.json
+    python3 benchmarks/run_benchmarks.py --configs 200 --baseline baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARK_DIR.parent
+STUB_FREQTRADE = BENCHMARK_DIR / "stub_freqtrade.py"
+SHOW_FIXTURES_DIR = BENCHMARK_DIR / "fixtures" / "hyperopt_show"
+SESSION = "benchmark"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the hyperopt orchestration against a stub freqtrade")
+    parser.add_argument("--configs", type=int, default=200, help="Configs driven through run_hyperopt_series (default: 200)")
+    parser.add_argument("--runs-per-config", type=int, default=1, help="num_runs of every config (default: 1)")
+    parser.add_argument("--epochs", type=int, default=50, help="Epochs per stub hyperopt run (default: 50)")
+    parser.add_argument("--startup-latency", type=float, default=0.05,
+                        help="Seconds every stub freqtrade process sleeps on start (default: 0.05)")
+    parser.add_argument("--epoch-latency", type=float, default=0.001, help="Seconds per stub epoch (default: 0.001)")
+    parser.add_argument("--show-rows", type=int, default=200, help="Pair rows per hyperopt-show report (default: 200)")
+    parser.add_argument("--report-runs", type=int, default=20,
+                        help="Runs whose hyperopt-show reports are rendered (default: 20)")
+    parser.add_argument("--parse-iterations", type=int, default=500,
+                        help="parse_hyperopt_results calls on one report (default: 500)")
+    parser.add_argument("--large-show-rows", type=int, default=50000,
+                        help="Pair rows in the multi-megabyte hyperopt-show report parsed from a file (default: 50000)")
+    parser.add_argument("--check-fixtures", action="store_true",
+                        help="Only check the parser against the hyperopt-show fixture corpus and exit")
+    parser.add_argument("--csv-rows", type=int, default=10000, help="Rows appended to a summary CSV (default: 10000)")
+    parser.add_argument("--large-epochs", type=int, default=5000,
+                        help="Epochs in the large .fthypt read natively (default: 5000)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also record the peak Python heap per stage (tracemalloc; slows every stage down)")
+    parser.add_argument("--workdir", type=Path, help="Keep all benchmark files here instead of a temp dir")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON from an earlier run to compare against")
+    return parser.parse_args()
+
+def prepare_environment(workdir: Path, args) -> Dict[str, Path]:
+    """Point the automation at the stub; must run before any utils module is imported"""
+    freqtrade_dir = workdir / "freqtrade"
+    results_dir = freqtrade_dir / "user_data" / "hyperopt_results"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    STUB_FREQTRADE.chmod(0o755)
+
+    os.environ.update({
+        "FREQTRADE_BIN": str(STUB_FREQTRADE),
+        "FREQTRADE_DIR": str(freqtrade_dir),
+        # Private home so the version probe cache starts cold and the real one is left alone
+        "HOME": str(workdir / "home"),
+        "STUB_STARTUP_LATENCY": str(args.startup_latency),
+        "STUB_EPOCH_LATENCY": str(args.epoch_latency),
+        "STUB_SHOW_ROWS": str(args.show_rows),
+    })
+    sys.path.insert(0, str(REPO_DIR))
+
+    config_file = freqtrade_dir / "user_data" / "config.json"
+    pairs_file = freqtrade_dir / "user_data" / "pairs.json"
+    config_file.write_text(json.dumps({'stake_currency': 'BTC', 'dry_run': True}))
+    pairs_file.write_text(json.dumps({'exchange': {'pair_whitelist': [f"PAIR{i:04d}/BTC" for i in range(50)]}}))
+    return {
+        'freqtrade_dir': freqtrade_dir,
+        'results_dir': results_dir,
+        'outputs_dir': workdir / "outputs",
+        'config_file': config_file,
+        'pairs_file': pairs_file,
+    }
+
+def _max_rss_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return resource.getrusage(who).ru_maxrss / scale
+
+class StageTimer:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def run(self, name: str, count: int, fn: Callable[[], Any]) -> Any:
+        """Time fn() as one stage covering `count` operations"""
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if self.trace_memory:
+            tracemalloc.start()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            value = fn()
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            peak_heap = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            if self.trace_memory:
+                tracemalloc.stop()
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        stats = {
+            'count': count,
+            'wall_seconds': round(wall, 4),
+            'per_item_ms': round(wall / count * 1000, 3) if count else None,
+            'cpu_seconds': round(cpu, 4),
+            'children_cpu_seconds': round((children_after.ru_utime + children_after.ru_stime)
+                                          - (children_before.ru_utime + children_before.ru_stime), 4),
+            'max_rss_mb': round(_max_rss_mb(resource.RUSAGE_SELF), 1),
+            'children_max_rss_mb': round(_max_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        }
+        if peak_heap is not None:
+            stats['peak_heap_mb'] = round(peak_heap / 1024 / 1024, 2)
+        self.stages[name] = stats
+        print(f"  {name:<30} {stats['wall_seconds']:>9.3f}s  {stats['per_item_ms'] or 0:>10.3f} ms/op  "
+              f"cpu {stats['cpu_seconds']:.2f}s  children {stats['children_cpu_seconds']:.2f}s", flush=True)
+        return value
+
+def make_configs(count: int, paths: Dict[str, Path], args) -> List:
+    from utils.config_loader import HyperoptConfig
+    return [
+        HyperoptConfig(
+            name=f"Bench{i:04d}",
+            # Unique strategy names, so every run has to be told apart in one shared results dir
+            strategy=f"BenchStrategy{i:04d}",
+            config_file=str(paths['config_file']),
+            pairs_file=str(paths['pairs_file']),
+            hyperopt_loss="SharpeHyperOptLoss",
+            epochs=args.epochs,
+            max_open_trades=3,
+            timeframe="5m",
+            days_back=30,
+            space_buy=True,
+            space_sell=True,
+            space_roi=False,
+            space_stoploss=False,
+            space_trailing=False,
+            enable_protections=False,
+            num_runs=args.runs_per_config,
+            sleep_between_runs=0,
+            timerange="20250101-"
+        )
+        for i in range(count)
+    ]
+
+def check_show_fixtures() -> List[Path]:
+    """Parse every fixture of the hyperopt-show corpus and fail on any value that differs from the manifest"""
+    from utils.show_parser import parse_show_file, summary_fields
+
+    manifest = json.loads((SHOW_FIXTURES_DIR / "manifest.json").read_text())
+    paths, problems = [], []
+    for fixture in manifest['fixtures']:
+        path = SHOW_FIXTURES_DIR / fixture['file']
+        report = parse_show_file(path)
+        fields = summary_fields(report)
+        if fields != fixture['summary_fields']:
+            problems.append(f"{fixture['file']}: summary fields {fields} != {fixture['summary_fields']}")
+        if len(report.summary_metrics) != fixture['summary_metrics_count']:
+            problems.append(f"{fixture['file']}: {len(report.summary_metrics)} summary metrics, "
+                            f"expected {fixture['summary_metrics_count']}")
+        for key, expected in fixture['summary_metrics'].items():
+            # JSON has no tuples; compare through a round trip
+            actual = json.loads(json.dumps(report.summary_metrics.get(key)))
+            if actual != expected:
+                problems.append(f"{fixture['file']}: {key} = {actual!r}, expected {expected!r}")
+        paths.append(path)
+    if problems:
+        sys.exit("hyperopt-show fixture check failed:\n  " + "\n  ".join(problems))
+    print(f"  hyperopt-show fixtures: {len(paths)} of corpus v{manifest['corpus_version']} parsed as expected",
+          flush=True)
+    return paths
+
+def run_benchmarks(args, paths: Dict[str, Path]) -> Dict[str, Any]:
+    from utils import executor
+    from utils.freqtrade_probe import probe_freqtrade_version
+    from utils.progress import ProgressMonitor
+    from utils.show_parser import parse_show_file
+
+    logger = logging.getLogger("benchmark")
+    logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+
+    timer = StageTimer(trace_memory=args.trace_memory)
+    configs = make_configs(args.configs, paths, args)
+    total_runs = args.configs * args.runs_per_config
+    outputs_dir = paths['outputs_dir']
+
+    timer.run("probe_cold", 1, lambda: executor.verify_freqtrade_installation(logger))
+    timer.run("probe_cached", 1000, lambda: [probe_freqtrade_version(str(STUB_FREQTRADE), logger) for _ in range(1000)])
+
+    monitor = ProgressMonitor(outputs_dir / SESSION, logger, echo_output=False)
+    options = executor.RunOptions(progress_monitor=monitor)
+    series = timer.run("run_hyperopt_series", total_runs, lambda: [
+        result
+        for config in configs
+        for result in executor.run_hyperopt_series(config, outputs_dir, logger, SESSION, options=options)
+    ])
+    child_seconds = total_runs * (args.startup_latency + args.epochs * args.epoch_latency)
+    timer.stages["run_hyperopt_series"]['stub_seconds'] = round(child_seconds, 4)
+    timer.stages["run_hyperopt_series"]['overhead_per_run_ms'] = round(
+        (timer.stages["run_hyperopt_series"]['wall_seconds'] - child_seconds) / max(total_runs, 1) * 1000, 3)
+    if len(series) != total_runs:
+        print(f"  warning: {total_runs - len(series)} of {total_runs} runs failed", flush=True)
+
+    by_run = [(config, result) for config in configs for result in series if result.config_name == config.name]
+    timer.run("generate_result_files", len(by_run), lambda: [
+        executor.generate_result_files(str(STUB_FREQTRADE), result.metrics_dir, config, result.run_number,
+                                       logger, run_started=0)
+        for config, result in by_run
+    ])
+    report_runs = by_run[:args.report_runs]
+    timer.run("generate_result_files_reports", len(report_runs), lambda: [
+        executor.generate_result_files(str(STUB_FREQTRADE), result.metrics_dir, config, result.run_number,
+                                       logger, run_started=0, render_reports=True)
+        for config, result in report_runs
+    ])
+
+    report = subprocess.run([str(STUB_FREQTRADE), "hyperopt-show", "--best"], stdout=subprocess.PIPE,
+                            text=True, check=True).stdout
+    timer.run("parse_hyperopt_results", args.parse_iterations,
+              lambda: [executor.parse_hyperopt_results(report) for _ in range(args.parse_iterations)])
+
+    fixtures = check_show_fixtures()
+    timer.run("parse_show_fixtures", len(fixtures) * args.parse_iterations,
+              lambda: [parse_show_file(path) for _ in range(args.parse_iterations) for path in fixtures])
+
+    large_report = paths['outputs_dir'] / "large_show_report.txt"
+    with open(large_report, 'w') as f:
+        subprocess.run([str(STUB_FREQTRADE), "hyperopt-show", "--best"], stdout=f, check=True,
+                       env=dict(os.environ, STUB_STARTUP_LATENCY="0", STUB_SHOW_ROWS=str(args.large_show_rows)))
+    timer.run("parse_show_file_large", args.large_show_rows, lambda: parse_show_file(large_report))
+    timer.stages["parse_show_file_large"]['file_mb'] = round(large_report.stat().st_size / 1024 / 1024, 2)
+
+    template = series[0] if series else executor.ExecutionResult(
+        config_name="Bench", run_number=1, output_file=outputs_dir / "none.json", metrics_dir=outputs_dir,
+        config_file=paths['config_file'], elapsed_time=1.0, summary_data={})
+    timer.run("append_to_summary_csv", args.csv_rows, lambda: [
+        executor.append_to_summary_csv(template, outputs_dir, f"{SESSION}_csv") for _ in range(args.csv_rows)
+    ])
+
+    large_file = _write_large_results_file(paths['results_dir'], args.large_epochs)
+    timer.run("read_hyperopt_results", args.large_epochs,
+              lambda: executor.read_hyperopt_results(large_file))
+
+    return {
+        'recorded': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key not in ('workdir', 'output', 'baseline')},
+        'stages': timer.stages,
+    }
+
+def _write_large_results_file(results_dir: Path, epochs: int) -> Path:
+    env = dict(os.environ, STUB_STARTUP_LATENCY="0", STUB_EPOCH_LATENCY="0")
+    subprocess.run([str(STUB_FREQTRADE), "hyperopt", "-s", "BenchLarge", "-e", str(epochs)],
+                   env=env, stdout=subprocess.DEVNULL, check=True)
+    return max(results_dir.glob("strategy_BenchLarge_*.fthypt"), key=lambda path: path.stat().st_mtime)
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]):
+    """Compare per-operation times, so runs with different stage sizes stay comparable"""
+    print("\nCompared with baseline from", baseline.get('recorded', 'unknown'))
+    if baseline.get('parameters') != results['parameters']:
+        print("  note: benchmark parameters differ from the baseline")
+    print(f"  {'stage':<30} {'now ms/op':>12} {'baseline':>12} {'change':>8}")
+    for name, stats in results['stages'].items():
+        now = stats['per_item_ms']
+        before = baseline.get('stages', {}).get(name, {}).get('per_item_ms')
+        if not before:
+            print(f"  {name:<30} {now:>12.3f} {'-':>12} {'new':>8}")
+            continue
+        print(f"  {name:<30} {now:>12.3f} {before:>12.3f} {(now - before) / before * 100:>+7.1f}%")
+
+def main():
+    args = parse_args()
+    if args.check_fixtures:
+        sys.path.insert(0, str(REPO_DIR))
+        check_show_fixtures()
+        return
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="hyperopt-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    paths = prepare_environment(workdir.resolve(), args)
+
+    print(f"Benchmarking {args.configs} configs x {args.runs_per_config} runs x {args.epochs} epochs in {workdir}")
+    try:
+        results = run_benchmarks(args, paths)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+    if args.baseline:
+        compare(results, json.loads(args.baseline.read_text()))
+
+if __name__ == "__main__":
+    main()
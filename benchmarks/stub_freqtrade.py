@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Stand-in `freqtrade` executable for the orchestration benchmarks.
+Implements just enough of `--version`, `hyperopt` and `hyperopt-show` to look
+like the real thing to the automation: rich-style result rows and progress
+redraws, a .fthypt file in $FREQTRADE_DIR/user_data/hyperopt_results and a
+full hyperopt-show report. Latency and output size come from STUB_* variables.
+"""
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+STUB_VERSION = "2025.9"
+STARTUP_LATENCY = float(os.environ.get("STUB_STARTUP_LATENCY", "0.05"))  # seconds per process start
+EPOCH_LATENCY = float(os.environ.get("STUB_EPOCH_LATENCY", "0.001"))  # seconds per hyperopt epoch
+SHOW_ROWS = int(os.environ.get("STUB_SHOW_ROWS", "200"))  # per-pair rows in a hyperopt-show report
+PARAMS = int(os.environ.get("STUB_PARAMS", "20"))  # strategy parameters per epoch in the .fthypt
+
+def _arg(flag: str, default: str = "") -> str:
+    return sys.argv[sys.argv.index(flag) + 1] if flag in sys.argv else default
+
+def _results_dir() -> Path:
+    return Path(os.environ.get("FREQTRADE_DIR", ".")) / "user_data" / "hyperopt_results"
+
+def _epoch_record(epoch: int, total: int, loss: float, is_best: bool, rng: random.Random) -> dict:
+    wins, losses = rng.randint(10, 60), rng.randint(10, 60)
+    profit = rng.uniform(-0.2, 0.4)
+    return {
+        'loss': loss,
+        'current_epoch': epoch,
+        'total_epochs': total,
+        'is_initial_point': epoch <= 10,
+        'is_best': is_best,
+        'params_dict': {f"param_{i}": rng.randint(0, 100) for i in range(PARAMS)},
+        'params_details': {'buy': {f"param_{i}": rng.randint(0, 100) for i in range(PARAMS)}},
+        'results_explanation': f"{wins + losses} trades. {wins}/0/{losses} Wins/Draws/Losses.",
+        'results_metrics': {
+            'timeframe': _arg("-i", os.environ.get("STUB_TIMEFRAME", "5m")),
+            'total_trades': wins + losses,
+            'wins': wins,
+            'draws': 0,
+            'losses': losses,
+            'profit_total': profit,
+            'profit_factor': rng.uniform(0.5, 3.0),
+            'max_drawdown_account': rng.uniform(0.01, 0.3),
+        },
+    }
+
+def hyperopt():
+    strategy = _arg("-s")
+    epochs = int(_arg("-e", "100"))
+    rng = random.Random(f"{strategy}-{time.time_ns()}")
+    results_dir = _results_dir()
+    results_dir.mkdir(parents=True, exist_ok=True)
+    results_file = results_dir / f"strategy_{strategy}_{datetime.now():%Y-%m-%d_%H-%M-%S}.fthypt"
+
+    out = sys.stdout
+    out.write("┃ Best   ┃   Epoch ┃ Trades ┃ Win  Draw  Loss  Win% ┃ Avg profit ┃ Profit ┃ Avg duration ┃ Objective ┃ Max Drawdown (Acct) ┃\n")
+    best = None
+    with open(results_file, 'w') as f:
+        try:
+            for epoch in range(1, epochs + 1):
+                time.sleep(EPOCH_LATENCY)
+                loss = rng.uniform(-2.0, 2.0)
+                is_best = best is None or loss < best
+                if is_best:
+                    best = loss
+                    out.write(f"\r│ * Best │ {epoch:>4}/{epochs} │ 76 │ 39 0 37 51.3 │ 0.42% │ "
+                              f"0.00123 BTC (12.34%) │ 1:00:00 │ {loss:.5f} │ 0.0001 BTC (1.2%) │\n")
+                out.write(f"\rEpochs ━━━━━━━━━━━━━━━ {epoch}/{epochs} {epoch * 100 // epochs:>3}% • 0:00:01 • 0:00:02")
+                out.flush()
+                f.write(json.dumps(_epoch_record(epoch, epochs, loss, is_best, rng)) + "\n")
+                f.flush()
+        except KeyboardInterrupt:
+            out.write("\nUser interrupted..\n")
+    out.write(f"\n{epochs} epochs saved to '{results_file}'.\n")
+    out.flush()
+
+def hyperopt_show():
+    rng = random.Random(" ".join(sys.argv))
+    kind = "best" if "--best" in sys.argv else "profitable"
+    epoch, total = rng.randint(1, 1000), 1000
+    wins, losses = rng.randint(10, 60), rng.randint(10, 60)
+    lines = [
+        f"Result for strategy {_arg('-s', 'Stub')} ({kind})",
+        f"*  {epoch}/{total}:     {wins + losses} trades. {wins}/0/{losses} Wins/Draws/Losses. "
+        f"Avg profit   0.42%. Median profit   0.50%. Total profit (12.34%). Avg duration 1:00:00 min. "
+        f"Objective: {rng.uniform(-2, 2):.5f}",
+        "                                        BACKTESTING REPORT",
+        "┏━━━━━━━━━━━━━━━┳━━━━━━━━┳━━━━━━━━━━━━━━┳━━━━━━━━━━━━━━━━━┳━━━━━━━━━━━━━━┓",
+        "┃ Pair          ┃ Trades ┃ Avg Profit % ┃ Tot Profit BTC  ┃ Tot Profit % ┃",
+        "┡━━━━━━━━━━━━━━━╇━━━━━━━━╇━━━━━━━━━━━━━━╇━━━━━━━━━━━━━━━━━╇━━━━━━━━━━━━━━┩",
+    ]
+    for i in range(SHOW_ROWS):
+        lines.append(f"│ PAIR{i:04d}/BTC  │ {rng.randint(1, 20):>6} │ {rng.uniform(-1, 1):>12.2f} │ "
+                     f"{rng.uniform(-0.001, 0.001):>15.8f} │ {rng.uniform(-5, 5):>12.2f} │")
+    lines += [
+        "└───────────────┴────────┴──────────────┴─────────────────┴──────────────┘",
+        "                 SUMMARY METRICS",
+        "┏━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┳━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┓",
+        "┃ Metric                        ┃ Value                          ┃",
+        "┡━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━╇━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━┩",
+        f"│ Total/Daily Avg Trades        │ {wins + losses} / 5.43                      │",
+        f"│ Profit factor                 │ {rng.uniform(0.5, 3):.2f}                           │",
+        f"│ Absolute Drawdown (Account)   │ {rng.uniform(1, 30):.2f}%                         │",
+        "└───────────────────────────────┴────────────────────────────────┘",
+    ]
+    print("\n".join(lines))
+
+def main():
+    time.sleep(STARTUP_LATENCY)
+    if "--version" in sys.argv or "-V" in sys.argv:
+        print(f"Freqtrade Version: {STUB_VERSION}")
+        return
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "hyperopt":
+        hyperopt()
+    elif command == "hyperopt-show":
+        hyperopt_show()
+    else:
+        sys.exit(f"stub freqtrade: unsupported command {command!r}")
+
+if __name__ == "__main__":
+    main()
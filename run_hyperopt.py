@@ -8,26 +8,216 @@ Changes:
 - Maintained all previous functionality and path handling
 """
 
+import argparse
 import sys
 from pathlib import Path
 from datetime import datetime
 from utils.config_loader import load_configurations
+from utils.data_staging import group_configs, session_start_from_timestamp, stage_data
+from utils.budget import TimeBudget, parse_deadline
+from utils.early_stop import EarlyStopPolicy
+from utils.freqtrade_pool import DEFAULT_POOL_MAX_TASKS, FreqtradePool
 from utils.executor import (
+    HYPEROPT_RESULTS_DIR,
+    HYPEROPT_TIMEOUT,
+    RUN_INTERRUPTED,
+    RUN_TIMED_OUT,
+    RunOptions,
     run_hyperopt_series, 
     create_summary_csv,
     verify_freqtrade_installation
 )
-from utils.logger import setup_logging
+from utils.ledger import DONE, FAILED, SessionLedger
+from utils.logger import dropped_records, setup_logging
+from utils.memory import MemoryEstimator, MemoryGate, parse_memory_size
+from utils.planner import RuntimeModel, log_plan, plan_schedule
+from utils.metrics import SessionMetrics
+from utils.processes import RunInterrupted, install_signal_handlers, terminate_all
+from utils.progress import ProgressMonitor
+from utils.result_cache import DEFAULT_CACHE_MAX_BYTES, RESULT_CACHE_DIRNAME, ResultCache
+from utils.results_files import DEFAULT_RETENTION_DAYS, prune_results_dir
+from utils.results_store import RESULTS_DB_FILENAME, SUMMARY_CSV_FILENAME, ResultsStore
+from utils.scheduler import plan_run_tasks, resolve_cpu_budget, run_scheduled
+from utils.watch import WATCH_INTERVAL, ConfigWatcher
+from utils.work_queue import LEASE_SECONDS, WorkQueue, default_worker_id, run_worker, wait_for_session
 import logging
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run freqtrade hyperopt for every configuration in the config CSV")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Run (config, run) pairs in parallel on N workers (default: sequential)")
+    parser.add_argument("--jobs-per-run", type=int, default=None,
+                        help="Value passed to freqtrade hyperopt -j (default: CPU budget / workers)")
+    parser.add_argument("--cpu-budget", type=int, default=None,
+                        help="Total cores all parallel runs may use (default: all cores)")
+    parser.add_argument("--memory-limit", metavar="SIZE", type=parse_memory_size, default=None,
+                        help="Only start parallel runs while their estimated memory fits under SIZE, "
+                             "e.g. 48G or 80%% (default: no limit)")
+    parser.add_argument("--time-budget", metavar="DURATION|HH:MM", type=parse_deadline, default=None,
+                        help="Finish all work within e.g. 6h or 90m, or by a clock time such as 06:00, "
+                             "giving the time to the configs that improve fastest (runs on the scheduler)")
+    parser.add_argument("--configs", metavar="PATH", type=Path, default=None,
+                        help="Config CSV or INI sweep file; cells like 1m|5m|1h expand into one config per value "
+                             "(default: configs/hyperopt_configs.csv)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep the session running and queue configurations added to the config file later "
+                             "(by fingerprint, so unchanged rows never run twice) until interrupted")
+    parser.add_argument("--watch-dir", metavar="DIR", type=Path, default=None,
+                        help="With --watch, also pick up *.csv and *.ini sweep files dropped into DIR")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL,
+                        help="Seconds between checks of the watched config files")
+    parser.add_argument("--plan", action="store_true",
+                        help="Print the predicted schedule and wall time from past run durations, then exit")
+    parser.add_argument("--resume", metavar="SESSION", default=None,
+                        help="Resume an interrupted session (e.g. 2510161200): skip done runs, retry failed ones")
+    parser.add_argument("--render-reports", action="store_true",
+                        help="Also write hyperopt-show text reports (results_best/profitable_runN.txt) for each run")
+    parser.add_argument("--no-pipeline", action="store_true",
+                        help="Sequential mode: collect each run's results before the next run starts, and sleep "
+                             "sleep_between_runs before it (default: collect in the background during the next run)")
+    parser.add_argument("--freqtrade-pool", metavar="N", type=int, default=0,
+                        help="Run hyperopt-show on N long-lived freqtrade processes with freqtrade already "
+                             "imported, instead of starting freqtrade for every report (default: off)")
+    parser.add_argument("--freqtrade-pool-max-tasks", type=int, default=DEFAULT_POOL_MAX_TASKS,
+                        help="Commands a preloaded freqtrade process runs before it is replaced")
+    parser.add_argument("--no-output-capture", action="store_true",
+                        help="Do not keep each run's hyperopt console output in run_N/hyperopt_output.log.gz")
+    parser.add_argument("--download-data", action="store_true",
+                        help="Download candle data once per (pairs, timeframe, days_back) group before any run")
+    parser.add_argument("--skip-data-check", action="store_true",
+                        help="Do not verify that candle data on disk covers each group's timerange")
+    parser.add_argument("--status-interval", type=int, default=30,
+                        help="Seconds between progress log lines and status.json refreshes")
+    parser.add_argument("--early-stop-patience", type=int, default=None,
+                        help="Stop a run cleanly after N epochs without a new best (results so far are kept)")
+    parser.add_argument("--early-stop-min-epochs", type=int, default=0,
+                        help="Never stop a run early before this epoch")
+    parser.add_argument("--series-tolerance", type=float, default=None,
+                        help="Skip remaining repeat runs once best losses agree within this fraction (e.g. 0.05)")
+    parser.add_argument("--series-min-runs", type=int, default=3,
+                        help="Finished runs required before a series can be considered converged")
+    parser.add_argument("--run-timeout", type=float, default=HYPEROPT_TIMEOUT,
+                        help="Seconds a single hyperopt run may take before it is stopped (partial results are kept)")
+    parser.add_argument("--random-state", type=int, default=None,
+                        help="Seed hyperopt (run N gets SEED+N) so runs are reproducible and identical reruns are "
+                             "served from the result cache")
+    parser.add_argument("--force-rerun", action="store_true",
+                        help="Run hyperopt even when the result cache holds a run with identical inputs")
+    parser.add_argument("--cache-max-gb", type=float, default=DEFAULT_CACHE_MAX_BYTES / 1024 ** 3,
+                        help="Evict least recently used cached results beyond this size")
+    parser.add_argument("--results-retention-days", type=float, default=DEFAULT_RETENTION_DAYS,
+                        help="After the session, remove .fthypt files older than this from freqtrade's "
+                             "hyperopt_results (archiving those no run directory links); "
+                             "default 0 keeps them all")
+    parser.add_argument("--prometheus-textfile", type=Path, default=None,
+                        help="Also write phase metrics to this .prom file for the node exporter textfile collector")
+    parser.add_argument("--coordinator", metavar="QUEUE_DB", type=Path, default=None,
+                        help="Queue this session's runs in a SQLite file on shared storage for --worker processes "
+                             "and collect their results")
+    parser.add_argument("--worker", metavar="QUEUE_DB", type=Path, default=None,
+                        help="Run tasks claimed from a coordinator's queue instead of loading configs")
+    parser.add_argument("--worker-id", default=None, help="Name of this worker (default: <hostname>-<pid>)")
+    parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS,
+                        help="A claimed task is requeued this long after its worker's last heartbeat")
+    parser.add_argument("--exit-when-empty", action="store_true",
+                        help="Stop the worker once no task is pending or running")
+    return parser.parse_args()
+
+def run_worker_mode(args, output_dir: Path):
+    """Serve a coordinator's queue; logs, status.json and metrics.json go to outputs/workers/<worker-id>"""
+    worker_id = args.worker_id or default_worker_id()
+    worker_dir = output_dir / "workers" / worker_id
+    worker_dir.mkdir(parents=True, exist_ok=True)
+    logger = setup_logging(worker_dir / "hyperopt_worker.log")
+
+    progress_monitor = ProgressMonitor(session_dir=worker_dir, logger=logger, interval=args.status_interval)
+    metrics = SessionMetrics(worker_dir, worker_id, logger, prometheus_file=args.prometheus_textfile)
+    early_stop = None
+    if args.early_stop_patience:
+        early_stop = EarlyStopPolicy(patience=args.early_stop_patience, min_epochs=args.early_stop_min_epochs)
+    options = RunOptions(
+        jobs=args.jobs_per_run,
+        render_reports=args.render_reports,
+        progress_monitor=progress_monitor,
+        early_stop=early_stop,
+        metrics=metrics,
+        run_timeout=args.run_timeout,
+        random_state=args.random_state,
+        capture_output=not args.no_output_capture
+    )
+
+    queue = WorkQueue(args.worker)
+    progress_monitor.start()
+    try:
+        if args.freqtrade_pool > 0:
+            options.freqtrade_pool = FreqtradePool(verify_freqtrade_installation(logger), logger,
+                                                   size=args.freqtrade_pool, max_tasks=args.freqtrade_pool_max_tasks)
+        run_worker(queue, output_dir, logger, worker=worker_id, options=options,
+                   lease_seconds=args.lease_seconds, exit_when_empty=args.exit_when_empty)
+        prune_results_dir(HYPEROPT_RESULTS_DIR, args.results_retention_days, logger)
+    except (KeyboardInterrupt, RunInterrupted):
+        logger.info(f"Worker {worker_id} interrupted; its claimed task is requeued once the lease expires")
+        terminate_all(logger)
+    finally:
+        if options.freqtrade_pool:
+            options.freqtrade_pool.close()
+        progress_monitor.stop()
+        metrics.write()
+        queue.close()
+
+def run_plan_mode(args, output_dir: Path, config_path: Path):
+    """Predict the schedule from the results store without starting anything; logs to outputs/hyperopt_plan.log"""
+    logger = setup_logging(output_dir / "hyperopt_plan.log")
+    configs = load_configurations(config_path, logger)
+    results_store = ResultsStore(output_dir / RESULTS_DB_FILENAME)
+    try:
+        model = RuntimeModel.from_store(results_store, logger, outputs_dir=output_dir)
+    finally:
+        results_store.close()
+
+    runs = [(config, run_num) for config in configs for run_num in range(1, config.num_runs + 1)]
+    if args.workers > 0:
+        workers, jobs_per_run = resolve_cpu_budget(args.workers, args.jobs_per_run, args.cpu_budget, logger)
+        logger.info(f"Plan for {len(runs)} runs on {workers} workers with -j {jobs_per_run} each, longest first")
+        log_plan(plan_schedule(runs, model, workers), logger)
+    else:
+        logger.info(f"Plan for {len(runs)} runs run one after another in config order")
+        log_plan(plan_schedule(runs, model, 1, sequential=True), logger)
+
 def main():
+    args = parse_args()
     BASE_DIR = Path("/home/facepipe/freqtrade/hyperopt-automation")
-    CONFIG_CSV = BASE_DIR / "configs" / "hyperopt_configs.csv"
+    CONFIG_CSV = args.configs or BASE_DIR / "configs" / "hyperopt_configs.csv"
     OUTPUT_DIR = BASE_DIR / "outputs"
     OUTPUT_DIR.mkdir(exist_ok=True)
 
-    # Create single session timestamp for all strategies
-    session_timestamp = datetime.now().strftime('%y%m%d%H%M')
+    # Ctrl-C, SIGTERM and SIGHUP all stop the hyperopt process groups and keep partial results
+    install_signal_handlers()
+
+    # The gate admits runs against each other; sequential sessions and queue workers run one at a time
+    scheduled = args.workers > 0 or args.time_budget or args.watch
+    if args.memory_limit and not args.plan and (args.worker or args.coordinator or not scheduled):
+        sys.exit("--memory-limit only applies to runs scheduled by this session "
+                 "(--workers, --time-budget or --watch without --coordinator or --worker)")
+
+    if args.worker:
+        run_worker_mode(args, OUTPUT_DIR)
+        return
+
+    if args.watch and args.coordinator:
+        sys.exit("--watch runs the session's own scheduler and cannot be combined with --coordinator")
+
+    if args.plan:
+        run_plan_mode(args, OUTPUT_DIR, CONFIG_CSV)
+        return
+
+    # Create single session timestamp for all strategies, or reuse the one being resumed
+    if args.resume:
+        session_timestamp = args.resume
+        if not (OUTPUT_DIR / session_timestamp).is_dir():
+            sys.exit(f"Cannot resume: no session directory at {OUTPUT_DIR / session_timestamp}")
+    else:
+        session_timestamp = datetime.now().strftime('%y%m%d%H%M')
     
     # Create session-specific log file
     session_log_file = OUTPUT_DIR / session_timestamp / "hyperopt_automation.log"
@@ -38,44 +228,194 @@ def main():
     logger.info(f"Session timestamp: {session_timestamp}")
     logger.info(f"Output structure: outputs/{session_timestamp}/<timeframe>/<hyperopt_loss>/<strategy>/")
 
+    ledger = SessionLedger(OUTPUT_DIR / session_timestamp)
+    if args.resume:
+        logger.info(f"Resuming session {session_timestamp}, ledger state: {ledger.counts()}")
+
+    # One results database for all sessions; hyperopt_summary.csv is exported from it
+    summary_csv_path = OUTPUT_DIR / session_timestamp / SUMMARY_CSV_FILENAME
+    results_store = ResultsStore(OUTPUT_DIR / RESULTS_DB_FILENAME)
+    if summary_csv_path.exists() and not results_store.has_session(session_timestamp):
+        imported = results_store.import_session_csv(session_timestamp, summary_csv_path)
+        logger.info(f"Imported {imported} existing summary rows into the results store")
+
+    # Where the time goes: per-phase timings in outputs/<session>/metrics.json
+    metrics = SessionMetrics(OUTPUT_DIR / session_timestamp, session_timestamp, logger,
+                             prometheus_file=args.prometheus_textfile)
+
     all_results = []
+    freqtrade_pool = None
+    progress_monitor = None
     try:
-        freqtrade_path = verify_freqtrade_installation(logger)
+        with metrics.session_phase('probe'):
+            freqtrade_path = verify_freqtrade_installation(logger)
         logger.info(f"Using Freqtrade at: {freqtrade_path}")
         
-        if not CONFIG_CSV.exists():
+        if not CONFIG_CSV.exists() and not (args.watch and args.watch_dir):
             raise FileNotFoundError(f"Config CSV missing at: {CONFIG_CSV}")
-            
-        configs = load_configurations(CONFIG_CSV)
-        logger.info(f"Loaded {len(configs)} configurations")
-
-        for i, config in enumerate(configs, 1):
-            logger.info(f"Processing strategy {i}/{len(configs)}: {config.name}")
-            
-            config_path = Path(config.config_file)
-            if not config_path.exists():
-                logger.error(f"Config file missing: {config.config_file}")
-                continue
-                
-            results = run_hyperopt_series(
-                config=config, 
-                output_dir=OUTPUT_DIR, 
+
+        # Pin one timerange per data group for the whole session and make sure the data is there
+        session_start = session_start_from_timestamp(session_timestamp)
+
+        def prepare(configs):
+            if args.skip_data_check:
+                group_configs(configs, session_start)
+                return configs
+            configs = stage_data(configs, freqtrade_path, session_start, logger, download=args.download_data)
+            logger.info(f"{len(configs)} configurations have data covering their timerange")
+            return configs
+
+        watcher = None
+        if args.watch:
+            # Configurations added later are staged the same way and joined to the running queue
+            watcher = ConfigWatcher(CONFIG_CSV, logger, watch_dir=args.watch_dir, prepare=prepare,
+                                    interval=args.watch_interval)
+            configs = watcher.poll()
+            logger.info(f"Loaded {len(configs)} configurations from {len(watcher.sources())} watched file(s)")
+        else:
+            configs = load_configurations(CONFIG_CSV, logger)
+            logger.info(f"Loaded {len(configs)} configurations")
+            configs = prepare(configs)
+
+        # Live epoch progress, logged and written to outputs/<session>/status.json
+        progress_monitor = ProgressMonitor(
+            session_dir=OUTPUT_DIR / session_timestamp,
+            logger=logger,
+            planned_epochs=sum(config.epochs * config.num_runs for config in configs),
+            interval=args.status_interval,
+            echo_output=args.workers <= 1
+        )
+        progress_monitor.start()
+
+        early_stop = None
+        if args.early_stop_patience or args.series_tolerance is not None:
+            early_stop = EarlyStopPolicy(
+                patience=args.early_stop_patience,
+                min_epochs=args.early_stop_min_epochs,
+                series_tolerance=args.series_tolerance,
+                series_min_runs=args.series_min_runs
+            )
+            logger.info(f"Early stopping enabled: {early_stop}")
+
+        options = RunOptions(
+            jobs=args.jobs_per_run,
+            render_reports=args.render_reports,
+            ledger=ledger,
+            progress_monitor=progress_monitor,
+            early_stop=early_stop,
+            results_store=results_store,
+            metrics=metrics,
+            run_timeout=args.run_timeout,
+            random_state=args.random_state,
+            force_rerun=args.force_rerun,
+            pipeline=not args.no_pipeline,
+            capture_output=not args.no_output_capture
+        )
+        # Only seeded runs are reproducible, so only they can be served from the cache
+        if args.random_state is not None:
+            options.result_cache = ResultCache(OUTPUT_DIR / RESULT_CACHE_DIRNAME, logger,
+                                               max_bytes=int(args.cache_max_gb * 1024 ** 3))
+        if args.freqtrade_pool > 0:
+            freqtrade_pool = FreqtradePool(freqtrade_path, logger, size=args.freqtrade_pool,
+                                           max_tasks=args.freqtrade_pool_max_tasks)
+            options.freqtrade_pool = freqtrade_pool
+
+        if args.coordinator:
+            queue = WorkQueue(args.coordinator)
+            try:
+                tasks = plan_run_tasks(configs, OUTPUT_DIR, session_timestamp, logger, ledger)
+                if args.resume:
+                    logger.info(f"Retrying {queue.retry_failed(session_timestamp)} failed queued task(s)")
+                logger.info(f"Queued {queue.enqueue(session_timestamp, tasks, OUTPUT_DIR)} new task(s) "
+                            f"in {args.coordinator}; start workers with --worker {args.coordinator}")
+                counts = wait_for_session(queue, session_timestamp, logger, interval=args.status_interval)
+                logger.info(f"All queued runs finished: {counts}")
+
+                results = queue.results(session_timestamp, OUTPUT_DIR)
+                results_store.record_many(results, session_timestamp)
+                results_store.export_session_csv(session_timestamp, summary_csv_path)
+                for result in results:
+                    # Partial results of stopped runs are kept, but a resumed session still reruns them
+                    stopped = result.status in (RUN_INTERRUPTED, RUN_TIMED_OUT)
+                    ledger.mark(result.metrics_dir, FAILED if stopped else DONE, result.config_name,
+                                error=result.status if stopped else None)
+                all_results.append(results)
+            finally:
+                queue.close()
+        elif args.workers > 0 or args.time_budget or watcher:
+            if args.time_budget:
+                options.budget = TimeBudget(args.time_budget, logger)
+            if args.memory_limit:
+                options.memory_gate = MemoryGate(args.memory_limit,
+                                                 MemoryEstimator.from_history(OUTPUT_DIR, logger), logger)
+            results = run_scheduled(
+                configs=configs,
+                output_dir=OUTPUT_DIR,
                 logger=logger,
-                session_timestamp=session_timestamp
+                session_timestamp=session_timestamp,
+                freqtrade_path=freqtrade_path,
+                workers=max(args.workers, 1),
+                jobs_per_run=args.jobs_per_run,
+                cpu_budget=args.cpu_budget,
+                options=options,
+                runtime_model=RuntimeModel.from_store(results_store, logger, outputs_dir=OUTPUT_DIR),
+                watcher=watcher
             )
             all_results.append(results)
-            logger.info(f"Completed {len(results)} runs for {config.name}")
-
-        # Summary CSV is now built incrementally during execution
-        summary_csv_path = OUTPUT_DIR / session_timestamp / "hyperopt_summary.csv"
-        if summary_csv_path.exists():
-            logger.info(f"Session summary CSV available at: {summary_csv_path}")
+            logger.info(f"Completed {len(results)} scheduled runs")
         else:
-            logger.warning("No summary CSV was created (no successful runs)")
+            claimed_run_dirs = set()
+            for i, config in enumerate(configs, 1):
+                logger.info(f"Processing strategy {i}/{len(configs)}: {config.name}")
+                
+                config_path = Path(config.config_file)
+                if not config_path.exists():
+                    logger.error(f"Config file missing: {config.config_file}")
+                    continue
+                    
+                results = run_hyperopt_series(
+                    config=config, 
+                    output_dir=OUTPUT_DIR, 
+                    logger=logger,
+                    session_timestamp=session_timestamp,
+                    options=options,
+                    claimed_run_dirs=claimed_run_dirs
+                )
+                all_results.append(results)
+                logger.info(f"Completed {len(results)} runs for {config.name}")
+
+        prune_results_dir(HYPEROPT_RESULTS_DIR, args.results_retention_days, logger)
+
+    except (KeyboardInterrupt, RunInterrupted) as e:
+        logger.warning(f"Session interrupted ({str(e) or 'SIGINT'}); resume it with --resume {session_timestamp}")
+        terminate_all(logger)
+        sys.exit(130)
 
     except Exception as e:
         logger.critical(f"Fatal error: {str(e)}", exc_info=True)
         sys.exit(1)
 
+    finally:
+        if freqtrade_pool:
+            freqtrade_pool.close()
+        # Final status.json write, so runs cut short by an interrupt are not left reported as running
+        if progress_monitor:
+            progress_monitor.stop()
+        # Export whatever finished, also when the session is cut short
+        with metrics.session_phase('summary_export'):
+            exported = results_store.export_session_csv(session_timestamp, summary_csv_path)
+        results_store.close()
+        metrics.write()
+        phases = metrics.summary()['phases']
+        if phases:
+            logger.info("Time by phase: " + ", ".join(
+                f"{name} {seconds:.1f}s" for name, seconds in sorted(phases.items(), key=lambda item: -item[1])))
+        if exported:
+            logger.info(f"Session summary CSV ({exported} runs) available at: {summary_csv_path}")
+        else:
+            logger.warning("No summary CSV was created (no successful runs)")
+        if dropped_records(logger):
+            logger.warning(f"{dropped_records(logger)} log records were dropped while the log queue was full")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,39 +1,201 @@
 #!/usr/bin/env python3
 """
-Quick performance analysis of hyperopt results
+Performance analysis of hyperopt results across sessions.
+Summary CSVs are ingested incrementally: a manifest remembers the size and
+mtime of every file already parsed, so only new or changed sessions are read.
+The combined, typed frame is cached on disk and all aggregates are computed
+with vectorized pandas operations. Partial runs (interrupted or timed out) are
+counted separately and left out of the aggregates.
 """
-import pandas as pd
+import argparse
+import csv
+import json
 import os
 from pathlib import Path
 
-def analyze_results():
+import pandas as pd
+
+CACHE_DIRNAME = ".analysis_cache"
+MANIFEST_FILENAME = "manifest.json"
+FRAME_FILENAME = "summaries.pkl"
+MANIFEST_VERSION = 1
+
+NUMERIC_COLUMNS = ['run_number', 'epoch', 'total_profit', 'trade_count', 'win_ratio',
+                   'profit_factor', 'max_drawdown']
+CATEGORY_COLUMNS = ['strategy', 'timeframe', 'hyperopt_loss', 'config_name']
+PARTIAL_STATUSES = ['interrupted', 'timeout']  # runs stopped before their epochs were done
+
+def _file_signature(path: Path) -> dict:
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    """'12.5%' -> 12.5 and 'N/A' -> NaN for every metric column, elapsed_time -> seconds"""
+    for column in NUMERIC_COLUMNS:
+        if column in df:
+            df[column] = pd.to_numeric(df[column].astype(str).str.rstrip('%'), errors='coerce')
+    if 'elapsed_time' in df:
+        df['elapsed_seconds'] = pd.to_timedelta(df['elapsed_time'], errors='coerce').dt.total_seconds()
+        df = df.drop(columns='elapsed_time')
+    return _categorized(df)
+
+def _categorized(df: pd.DataFrame) -> pd.DataFrame:
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    return df
+
+def _read_summary(summary_file: Path) -> list:
+    """Raw string rows of one summary; typing happens once, vectorized, over all new rows"""
+    with open(summary_file, newline='') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        # Sessions are named after their directory, e.g. outputs/2510161200/hyperopt_summary.csv
+        row['session'] = summary_file.parent.name
+        row['source_file'] = str(summary_file)
+    return rows
+
+def load_frame(outputs_dir: Path, rebuild: bool = False) -> pd.DataFrame:
+    """Return all summary rows under outputs_dir, parsing only files that changed since the last call"""
+    cache_dir = outputs_dir / CACHE_DIRNAME
+    manifest_file = cache_dir / MANIFEST_FILENAME
+    frame_file = cache_dir / FRAME_FILENAME
+
+    manifest, frame = {}, None
+    if not rebuild and manifest_file.exists() and frame_file.exists():
+        try:
+            with open(manifest_file) as f:
+                stored = json.load(f)
+            if stored.get('version') == MANIFEST_VERSION:
+                manifest = stored['files']
+                frame = pd.read_pickle(frame_file)
+        except (OSError, ValueError, KeyError):
+            manifest, frame = {}, None
+
+    current = {str(path): _file_signature(path) for path in outputs_dir.glob('**/hyperopt_summary.csv')
+               if CACHE_DIRNAME not in path.parts}
+    changed = [path for path, signature in current.items() if manifest.get(path) != signature]
+    stale = set(manifest) - set(current) | set(changed)
+
+    if frame is not None and stale and 'source_file' in frame.columns:
+        frame = frame[~frame['source_file'].isin(stale)]
+
+    new_rows = []
+    for path in changed:
+        try:
+            new_rows.extend(_read_summary(Path(path)))
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            print(f"   ❌ Error reading {path}: {e}")
+            current.pop(path)
+
+    if new_rows or stale or frame is None:
+        parts = ([frame] if frame is not None else []) + ([_typed(pd.DataFrame(new_rows))] if new_rows else [])
+        frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['session', 'source_file'])
+        # concat of categoricals with different categories falls back to object; re-categorize
+        frame = _categorized(frame)
+        if frame.empty:
+            # Nothing worth caching; a cached empty frame would only have to be special-cased next time
+            frame_file.unlink(missing_ok=True)
+            manifest_file.unlink(missing_ok=True)
+        else:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            frame.to_pickle(frame_file)
+            tmp_file = manifest_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump({'version': MANIFEST_VERSION, 'files': current}, f)
+            os.replace(tmp_file, manifest_file)
+
+    print(f"📊 {len(current)} summary file(s), {len(changed)} parsed this time, {len(frame)} runs total")
+    return frame
+
+def split_partial(df: pd.DataFrame) -> tuple:
+    """(complete runs, partial runs); summaries written before the status column count as complete"""
+    if 'status' not in df:
+        return df, df.iloc[0:0]
+    partial = df['status'].isin(PARTIAL_STATUSES)
+    return df[~partial], df[partial]
+
+def strategy_rankings(df: pd.DataFrame) -> pd.DataFrame:
+    """Best and typical profit per strategy/timeframe/loss combination, best first"""
+    return (
+        df.groupby(['strategy', 'timeframe', 'hyperopt_loss'], observed=True)
+        .agg(runs=('total_profit', 'size'),
+             best_profit=('total_profit', 'max'),
+             median_profit=('total_profit', 'median'),
+             mean_win_ratio=('win_ratio', 'mean'),
+             worst_drawdown=('max_drawdown', 'max'))
+        .sort_values('best_profit', ascending=False)
+    )
+
+def aggregate_by(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    # Derived columns first, so every aggregation below is a built-in (cythonized) reducer
+    derived = df.assign(profitable=df['total_profit'] > 0, elapsed_min=df['elapsed_seconds'] / 60)
+    return (
+        derived.groupby(column, observed=True)
+        .agg(runs=('total_profit', 'size'),
+             mean_profit=('total_profit', 'mean'),
+             median_profit=('total_profit', 'median'),
+             best_profit=('total_profit', 'max'),
+             profitable_share=('profitable', 'mean'),
+             mean_win_ratio=('win_ratio', 'mean'),
+             mean_elapsed_min=('elapsed_min', 'mean'))
+        .sort_values('mean_profit', ascending=False)
+    )
+
+def run_variance(df: pd.DataFrame) -> pd.DataFrame:
+    """Spread of total profit across the repeat runs of each config within a session"""
+    grouped = df.groupby(['session', 'config_name'], observed=True)['total_profit']
+    variance = grouped.agg(runs='size', mean_profit='mean', std_profit='std',
+                           min_profit='min', max_profit='max')
+    variance = variance[variance['runs'] > 1]
+    return (variance.assign(range=variance['max_profit'] - variance['min_profit'])
+            .sort_values('std_profit', ascending=False))
+
+def analyze_results(outputs_dir: Path = Path('outputs'), top: int = 10, rebuild: bool = False):
     """Analyze hyperopt summary results"""
-    summary_files = list(Path('output').glob('**/hyperopt_summary.csv'))
-    
-    if not summary_files:
-        print("❌ No summary files found in output directory")
+    if not outputs_dir.is_dir():
+        print(f"❌ No output directory at {outputs_dir}")
         return
-    
-    print(f"📊 Found {len(summary_files)} summary file(s)")
-    
-    for summary_file in summary_files:
-        print(f"\n📈 Analyzing: {summary_file}")
-        
-        try:
-            df = pd.read_csv(summary_file)
-            
-            if len(df) == 0:
-                print("   ⚠️  Empty summary file")
-                continue
-                
-            print(f"   📋 Total runs: {len(df)}")
-            print(f"   🏆 Best strategy: {df.loc[df['total_profit'].idxmax(), 'strategy']}")
-            print(f"   💰 Best profit: {df['total_profit'].max():.4f}")
-            print(f"   📊 Average profit: {df['total_profit'].mean():.4f}")
-            print(f"   🎯 Win rate range: {df['win_ratio'].min():.2%} - {df['win_ratio'].max():.2%}")
-            
-        except Exception as e:
-            print(f"   ❌ Error reading file: {e}")
+
+    df = load_frame(outputs_dir, rebuild=rebuild)
+    if df.empty:
+        print("❌ No summary rows found in output directory")
+        return
+    df, partial = split_partial(df)
+    if not partial.empty:
+        print(f"   ⚠️  {len(partial)} partial run(s) (interrupted or timed out) left out of the statistics")
+    if df.empty:
+        print("❌ No complete runs found in output directory")
+        return
+
+    best = df.loc[df['total_profit'].idxmax()] if df['total_profit'].notna().any() else None
+    print(f"   📋 Total runs: {len(df)} across {df['session'].nunique()} session(s)")
+    if best is not None:
+        print(f"   🏆 Best run: {best['strategy']} {best['timeframe']} {best['hyperopt_loss']} "
+              f"({best['total_profit']:.2f}%, {best['output_dir']})")
+    print(f"   📊 Average profit: {df['total_profit'].mean():.2f}%")
+    print(f"   🎯 Win rate range: {df['win_ratio'].min():.1f}% - {df['win_ratio'].max():.1f}%")
+
+    with pd.option_context('display.width', 200, 'display.max_columns', 20, 'display.precision', 2):
+        print(f"\n🏆 Top {top} strategy / timeframe / loss combinations:")
+        print(strategy_rankings(df).head(top).to_string())
+        print("\n⏱️  By timeframe:")
+        print(aggregate_by(df, 'timeframe').to_string())
+        print("\n🎯 By loss function:")
+        print(aggregate_by(df, 'hyperopt_loss').to_string())
+        variance = run_variance(df)
+        if not variance.empty:
+            print(f"\n🎲 Least consistent configs (run-to-run profit spread, top {top}):")
+            print(variance.head(top).to_string())
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Analyze hyperopt summaries across sessions")
+    parser.add_argument("outputs_dir", nargs="?", type=Path, default=Path("outputs"),
+                        help="Directory holding the session folders (default: outputs)")
+    parser.add_argument("--top", type=int, default=10, help="Rows shown in the ranking tables (default: 10)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cache and re-parse every summary")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    analyze_results()
+    args = parse_args()
+    analyze_results(args.outputs_dir, top=args.top, rebuild=args.rebuild)
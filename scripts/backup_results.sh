@@ -1,28 +1,250 @@
 #!/bin/bash
-# Backup hyperopt results with timestamp
+# Incremental, deduplicating backups of hyperopt results
+#
+# Every file is stored once under backups/objects/ by its sha256; a snapshot is
+# a manifest of (hash, size, mtime, path) plus, unless compressed, a tree of
+# hard links to those objects. Files whose size and mtime match the previous
+# snapshot are not read again, so a backup costs only what changed.
+#
+# Usage:
+#   scripts/backup_results.sh [backup] [--compress]   take a snapshot (--compress gzips new objects)
+#   scripts/backup_results.sh list                    list snapshots
+#   scripts/backup_results.sh verify [SNAPSHOT]       check a snapshot's objects (default: latest)
+#   scripts/backup_results.sh restore SNAPSHOT [DIR]  restore a snapshot into DIR (default: restore_SNAPSHOT)
 
-TIMESTAMP=$(date +"%Y%m%d_%H%M%S")
-BACKUP_DIR="backups/hyperopt_backup_$TIMESTAMP"
+set -euo pipefail
 
-echo "💾 Creating backup: $BACKUP_DIR"
-mkdir -p "$BACKUP_DIR"
+BACKUP_ROOT="${BACKUP_ROOT:-backups}"
+OBJECTS="$BACKUP_ROOT/objects"
+SNAPSHOTS="$BACKUP_ROOT/snapshots"
+SOURCES=(outputs output logs configs)  # output/ is the pre-1.7 location
+EXCLUDE='*/.result_cache/*'  # rebuilt by identical seeded reruns
 
-# Backup output directory
-if [ -d "output" ]; then
-    cp -r output "$BACKUP_DIR/"
-    echo "✅ Backed up output directory"
-fi
+object_path() {
+    # Stored plain or gzipped; whichever exists
+    local hash="$1" base="$OBJECTS/${1:0:2}/$1"
+    if [ -f "$base" ]; then echo "$base"; elif [ -f "$base.gz" ]; then echo "$base.gz"; fi
+}
 
-# Backup logs
-if [ -d "logs" ]; then
-    cp -r logs "$BACKUP_DIR/"
-    echo "✅ Backed up logs directory"
-fi
+object_cat() {
+    case "$1" in
+        *.gz) gzip -dc "$1" ;;
+        *) cat "$1" ;;
+    esac
+}
 
-# Backup configs
-if [ -d "configs" ]; then
-    cp -r configs "$BACKUP_DIR/"
-    echo "✅ Backed up configs directory"
-fi
+snapshots() {
+    ls -1 "$SNAPSHOTS" 2>/dev/null | grep -v '\.partial$' | sort || true
+}
 
-echo "🎉 Backup completed: $BACKUP_DIR"
+latest_snapshot() {
+    snapshots | tail -n 1
+}
+
+store_object() {
+    # store_object HASH FILE COMPRESS
+    local hash="$1" file="$2" compress="$3" dir="$OBJECTS/${1:0:2}"
+    [ -n "$(object_path "$hash")" ] && return 1
+    mkdir -p "$dir"
+    if [ "$compress" = 1 ]; then
+        gzip -c "$file" > "$dir/$hash.gz.tmp" && mv "$dir/$hash.gz.tmp" "$dir/$hash.gz"
+    else
+        cp --reflink=auto "$file" "$dir/$hash.tmp" && mv "$dir/$hash.tmp" "$dir/$hash"
+    fi
+    # Objects are shared by every snapshot that links them
+    chmod a-w "$(object_path "$hash")"
+}
+
+cmd_backup() {
+    local compress=0
+    [ "${1:-}" = "--compress" ] && compress=1
+
+    local timestamp snapshot tmp previous
+    timestamp=$(date +"%Y%m%d_%H%M%S")
+    snapshot="$SNAPSHOTS/$timestamp"
+    tmp="$snapshot.partial"
+    previous=$(latest_snapshot)
+    rm -rf "$tmp" "$BACKUP_ROOT/.staging"
+    mkdir -p "$tmp" "$OBJECTS"
+    echo "💾 Creating snapshot: $snapshot${previous:+ (incremental over $previous)}"
+
+    # Hashes of files unchanged since the previous snapshot (same size and mtime)
+    declare -A known=()
+    if [ -n "$previous" ]; then
+        while IFS=$'\t' read -r hash size mtime path; do
+            known["$path"]="$size $mtime $hash"
+        done < "$SNAPSHOTS/$previous/manifest.tsv"
+    fi
+
+    local staging="$BACKUP_ROOT/.staging"
+    mkdir -p "$staging"
+    local -a changed=()
+    local -a entries=()
+    local sources=()
+    for dir in "${SOURCES[@]}"; do
+        [ -d "$dir" ] && sources+=("$dir")
+    done
+    if [ ${#sources[@]} -eq 0 ]; then
+        echo "❌ Nothing to back up: none of ${SOURCES[*]} exists in $(pwd)"
+        rm -rf "$tmp"
+        exit 1
+    fi
+
+    while IFS=$'\t' read -r -d '' size mtime path; do
+        mtime=${mtime%.*}
+        case "$path" in
+            *.sqlite-wal|*.sqlite-shm) continue ;;
+            *.sqlite)
+                # A live WAL database is copied through SQLite so the copy is consistent
+                if command -v sqlite3 &> /dev/null; then
+                    local copy="$staging/$(echo "$path" | tr '/' '_')"
+                    sqlite3 "$path" ".backup '$copy'"
+                    entries+=("$path"$'\t'"$size"$'\t'"$mtime"$'\t'"$copy")
+                    changed+=("$copy")
+                    continue
+                fi ;;
+        esac
+        local entry="${known[$path]:-}"
+        if [ -n "$entry" ] && [ "${entry% *}" = "$size $mtime" ]; then
+            entries+=("$path"$'\t'"$size"$'\t'"$mtime"$'\t'"=${entry##* }")
+        else
+            entries+=("$path"$'\t'"$size"$'\t'"$mtime"$'\t'"$path")
+            changed+=("$path")
+        fi
+    done < <(find "${sources[@]}" -type f ! -path "$EXCLUDE" -printf '%s\t%T@\t%p\0')
+
+    # Hash everything new or changed in one pass
+    declare -A hashes=()
+    if [ ${#changed[@]} -gt 0 ]; then
+        while read -r hash file; do
+            hashes["$file"]="$hash"
+        done < <(printf '%s\0' "${changed[@]}" | xargs -0 sha256sum)
+    fi
+
+    # Unchanged files: one hard-linked copy of the previous snapshot's tree
+    local linked_previous=0
+    if [ "$compress" = 0 ] && [ -n "$previous" ] && [ -d "$SNAPSHOTS/$previous/files" ]; then
+        cp -al "$SNAPSHOTS/$previous/files" "$tmp/files"
+        linked_previous=1
+    fi
+
+    local new_objects=0 new_bytes=0 files=0
+    declare -A current=()
+    for item in "${entries[@]}"; do
+        IFS=$'\t' read -r path size mtime source <<< "$item"
+        current["$path"]=1
+        files=$((files + 1))
+        local hash
+        if [ "${source:0:1}" = "=" ]; then
+            hash="${source:1}"
+            printf '%s\t%s\t%s\t%s\n' "$hash" "$size" "$mtime" "$path"
+            if [ "$linked_previous" = 1 ]; then
+                continue
+            fi
+        else
+            hash="${hashes[$source]}"
+            if store_object "$hash" "$source" "$compress"; then
+                new_objects=$((new_objects + 1))
+                new_bytes=$((new_bytes + $(stat -c %s "$(object_path "$hash")")))
+            fi
+            printf '%s\t%s\t%s\t%s\n' "$hash" "$size" "$mtime" "$path"
+        fi
+        if [ "$compress" = 0 ]; then
+            local object
+            object=$(object_path "$hash")
+            # Compressed objects from earlier --compress backups are only in the manifest
+            if [ "${object%.gz}" = "$object" ]; then
+                mkdir -p "$tmp/files/$(dirname "$path")"
+                ln -f "$object" "$tmp/files/$path"
+            fi
+        fi
+    done > "$tmp/manifest.tsv"
+
+    # Files deleted since the previous snapshot
+    if [ "$linked_previous" = 1 ]; then
+        for path in "${!known[@]}"; do
+            if [ -z "${current[$path]:-}" ]; then
+                rm -f "$tmp/files/$path"
+            fi
+        done
+    fi
+
+    rm -rf "$staging"
+    mv "$tmp" "$snapshot"
+    echo "✅ $files files, $new_objects new objects ($((new_bytes / 1024)) KB added)"
+    echo "🎉 Backup completed: $snapshot"
+}
+
+cmd_list() {
+    for snapshot in $(snapshots); do
+        echo "$snapshot  $(wc -l < "$SNAPSHOTS/$snapshot/manifest.tsv") files"
+    done
+}
+
+resolve_snapshot() {
+    local name="${1:-$(latest_snapshot)}"
+    if [ -z "$name" ] || [ ! -f "$SNAPSHOTS/$name/manifest.tsv" ]; then
+        echo "❌ No snapshot ${name:-found} in $SNAPSHOTS" >&2
+        exit 1
+    fi
+    echo "$name"
+}
+
+cmd_verify() {
+    local name bad=0 checked=0
+    name=$(resolve_snapshot "${1:-}")
+    echo "🔍 Verifying snapshot $name"
+    declare -A seen=()
+    while IFS=$'\t' read -r hash size mtime path; do
+        checked=$((checked + 1))
+        if [ -n "${seen[$hash]:-}" ]; then
+            continue
+        fi
+        seen["$hash"]=1
+        local object
+        object=$(object_path "$hash")
+        if [ -z "$object" ]; then
+            echo "❌ missing object for $path"
+            bad=$((bad + 1))
+        elif [ "$(object_cat "$object" | sha256sum | cut -d' ' -f1)" != "$hash" ]; then
+            echo "❌ corrupt object for $path"
+            bad=$((bad + 1))
+        fi
+    done < "$SNAPSHOTS/$name/manifest.tsv"
+    if [ "$bad" -gt 0 ]; then
+        echo "❌ $bad problem(s) in $checked files"
+        exit 1
+    fi
+    echo "✅ All $checked files verified (${#seen[@]} distinct objects)"
+}
+
+cmd_restore() {
+    local name target restored=0
+    name=$(resolve_snapshot "${1:-}")
+    target="${2:-restore_$name}"
+    echo "📦 Restoring snapshot $name into $target"
+    while IFS=$'\t' read -r hash size mtime path; do
+        local object
+        object=$(object_path "$hash")
+        if [ -z "$object" ]; then
+            echo "❌ missing object for $path" >&2
+            exit 1
+        fi
+        mkdir -p "$target/$(dirname "$path")"
+        object_cat "$object" > "$target/$path"
+        touch -d "@$mtime" "$target/$path"
+        restored=$((restored + 1))
+    done < "$SNAPSHOTS/$name/manifest.tsv"
+    echo "✅ Restored $restored files into $target"
+}
+
+case "${1:-backup}" in
+    backup) shift || true; cmd_backup "$@" ;;
+    --compress) cmd_backup --compress ;;
+    list) cmd_list ;;
+    verify) cmd_verify "${2:-}" ;;
+    restore) cmd_restore "${2:-}" "${3:-}" ;;
+    *)
+        sed -n '2,14p' "$0"
+        exit 1 ;;
+esac
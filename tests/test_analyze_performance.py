@@ -0,0 +1,69 @@
+import csv
+import warnings
+
+from analyze_performance import analyze_results, load_frame, run_variance, split_partial
+from utils.results_store import SUMMARY_FIELDNAMES
+
+def write_summary(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDNAMES)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({field: row.get(field, 'N/A') for field in SUMMARY_FIELDNAMES})
+
+def summary_row(name, profit, run_number=1, status='complete'):
+    return {'config_name': name, 'strategy': name, 'timeframe': '5m', 'hyperopt_loss': 'SharpeHyperOptLoss',
+            'run_number': str(run_number), 'total_profit': str(profit), 'elapsed_time': '0:01:00',
+            'status': status}
+
+def test_first_summary_after_an_empty_run_is_picked_up(tmp_path):
+    assert load_frame(tmp_path).empty
+
+    write_summary(tmp_path / "2510161200" / "hyperopt_summary.csv", [summary_row("A", 1.5)])
+    frame = load_frame(tmp_path)
+
+    assert list(frame['config_name']) == ["A"]
+    assert list(frame['session']) == ["2510161200"]
+
+def test_changed_and_removed_summaries_replace_their_cached_rows(tmp_path):
+    first = tmp_path / "2510161200" / "hyperopt_summary.csv"
+    second = tmp_path / "2510171200" / "hyperopt_summary.csv"
+    write_summary(first, [summary_row("A", 1.5)])
+    write_summary(second, [summary_row("B", 2.0)])
+    assert len(load_frame(tmp_path)) == 2
+
+    write_summary(first, [summary_row("A", 1.5), summary_row("A2", 3.0)])
+    second.unlink()
+    frame = load_frame(tmp_path)
+
+    assert sorted(frame['config_name']) == ["A", "A2"]
+    assert frame['total_profit'].max() == 3.0
+
+def test_partial_runs_are_left_out_of_the_aggregates(tmp_path, capsys):
+    write_summary(tmp_path / "2510161200" / "hyperopt_summary.csv", [
+        summary_row("A", 1.0, 1), summary_row("A", 3.0, 2), summary_row("A", -40.0, 3, status='interrupted'),
+        summary_row("B", 2.0, 1), summary_row("B", 9.0, 2, status='timeout')
+    ])
+    complete, partial = split_partial(load_frame(tmp_path))
+
+    assert len(complete) == 3
+    assert sorted(partial['status']) == ['interrupted', 'timeout']
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        variance = run_variance(complete)
+    assert list(variance['runs']) == [2]
+    assert list(variance['range']) == [2.0]
+
+    analyze_results(tmp_path)
+    out = capsys.readouterr().out
+    assert "2 partial run(s)" in out
+    assert "Average profit: 2.00%" in out
+
+def test_summaries_without_status_count_as_complete(tmp_path):
+    write_summary(tmp_path / "2510161200" / "hyperopt_summary.csv", [summary_row("A", 1.0)])
+    frame = load_frame(tmp_path).drop(columns='status')
+
+    complete, partial = split_partial(frame)
+
+    assert len(complete) == 1 and partial.empty
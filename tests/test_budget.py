@@ -0,0 +1,82 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.budget import EXPLORE_SHARE, MIN_RUN_EPOCHS, TimeBudget, improvement_rate, parse_deadline
+from utils.config_loader import HyperoptConfig
+from utils.progress import RunProgress
+from utils.scheduler import RunTask
+
+def config(name):
+    return HyperoptConfig(name=name, strategy=name, config_file="config.json", pairs_file="pairs.json",
+                          hyperopt_loss="SharpeHyperOptLoss", epochs=1000, max_open_trades=3, timeframe="5m",
+                          days_back=30, space_buy=True, space_sell=False, space_roi=False, space_stoploss=False,
+                          space_trailing=False, enable_protections=False, num_runs=3, sleep_between_runs=0)
+
+def finished_run(epochs, seconds, best_history):
+    now = time.time()
+    return RunProgress(run_id="run", config_name="A", run_number=1, total_epochs=1000, current_epoch=epochs,
+                       started=now - seconds, finished=now, best_history=best_history)
+
+def budget_for(hours, configs, workers):
+    budget = TimeBudget(datetime.now() + timedelta(hours=hours), logging.getLogger("test"), wind_down=0)
+    budget.begin(configs, workers)
+    return budget
+
+def test_parse_deadline():
+    now = datetime(2025, 10, 16, 22, 30)
+
+    assert parse_deadline("1h30m", now) == now + timedelta(minutes=90)
+    assert parse_deadline("23:00", now) == datetime(2025, 10, 16, 23, 0)
+    assert parse_deadline("06:00", now) == datetime(2025, 10, 17, 6, 0)
+    with pytest.raises(ValueError):
+        parse_deadline("soon", now)
+
+def test_improvement_rate_is_measured_over_the_second_half():
+    assert improvement_rate(finished_run(50, 100, [])) is None
+    assert improvement_rate(finished_run(50, 100, [(10, -1.0)])) == 0
+    # From -1.0 at the halfway mark to -2.0: a 50% drop over 50 seconds
+    assert improvement_rate(finished_run(50, 100, [(10, -1.0), (90, -2.0)])) == pytest.approx(0.01)
+
+def test_unexplored_configs_get_an_equal_share_of_the_exploration_time():
+    budget = budget_for(10, configs=4, workers=2)
+    share = 10 * 3600 * EXPLORE_SHARE * 2 / 4
+
+    assert budget.slice_for(config("A")) == pytest.approx(share, abs=5)
+    budget.add_configs(4)
+    assert budget.slice_for(config("A")) == pytest.approx(share / 2, abs=5)
+
+def test_measured_config_gets_the_rest_if_it_can_do_enough_epochs():
+    budget = budget_for(1, configs=1, workers=1)
+    fast, slow = config("Fast"), config("Slow")
+    budget.start_run("fast_1", fast, 60)
+    budget.finish_run("fast_1", fast, finished_run(100, 60, [(10, -1.0), (50, -2.0)]))
+    budget.start_run("slow_1", slow, 60)
+    # Fewer than MIN_RUN_EPOCHS in the hour that is left
+    budget.finish_run("slow_1", slow, finished_run(1, 3600 / (MIN_RUN_EPOCHS - 1), []))
+
+    assert budget.slice_for(fast) == pytest.approx(3600, abs=5)
+    assert budget.slice_for(slow) is None
+
+def test_unexplored_then_fastest_improving_configs_go_first():
+    budget = budget_for(1, configs=3, workers=1)
+    flat, improving, unmeasured, new = config("Flat"), config("Improving"), config("Unmeasured"), config("New")
+    for cfg, history in ((flat, [(10, -1.0)]), (improving, [(10, -1.0), (90, -3.0)]), (unmeasured, [])):
+        budget.start_run(cfg.name, cfg, 100)
+        budget.finish_run(cfg.name, cfg, finished_run(50, 100, history))
+    tasks = [RunTask(cfg, 2, cfg.name) for cfg in (unmeasured, flat, improving, new)]
+
+    assert [task.config.name for task in budget.prioritise(tasks)] == ["New", "Improving", "Flat", "Unmeasured"]
+
+def test_runs_are_stopped_at_their_slice_or_the_deadline():
+    budget = budget_for(1, configs=1, workers=1)
+
+    budget.start_run("short", config("A"), 60)
+    budget.start_run("long", config("B"), 10 * 3600)
+
+    assert budget.stop_at("short") == pytest.approx(time.time() + 60, abs=5)
+    assert budget.stop_at("long") == budget.stop_time
+    budget.finish_run("short", config("A"), finished_run(10, 60, []))
+    assert budget.stop_at("short") is None
@@ -0,0 +1,93 @@
+import logging
+from datetime import datetime
+
+import pytest
+
+from utils import data_staging
+from utils.config_loader import HyperoptConfig, parse_timerange
+from utils.data_staging import check_coverage, group_configs, stage_data
+from utils.result_cache import run_fingerprint
+
+SESSION_START = datetime(2025, 10, 16, 12, 0)
+
+def config(name, timerange=None, timeframe="5m"):
+    return HyperoptConfig(name=name, strategy=name, config_file="config.json", pairs_file="pairs.json",
+                          hyperopt_loss="SharpeHyperOptLoss", epochs=100, max_open_trades=3, timeframe=timeframe,
+                          days_back=30, space_buy=True, space_sell=False, space_roi=False, space_stoploss=False,
+                          space_trailing=False, enable_protections=False, num_runs=1, sleep_between_runs=0,
+                          timerange=timerange)
+
+def list_data_output(first, last, timeframe="5m"):
+    return ("| Pair | Type | Timeframe | From | To |\n"
+            f"| BTC/USDT | spot | {timeframe} | {first} | {last} |\n")
+
+class FakeFreqtrade:
+    """Answers `freqtrade list-data` with a fixed table instead of running freqtrade"""
+
+    def __init__(self):
+        self.output = list_data_output("2023-01-01 00:00:00", "2025-10-16 11:55:00")
+
+    def run(self, cmd, timeout, logger):
+        return self.output if cmd[1] == "list-data" else ""
+
+@pytest.fixture
+def list_data(monkeypatch):
+    freqtrade = FakeFreqtrade()
+    monkeypatch.setattr(data_staging, "_run_freqtrade", freqtrade.run)
+    return freqtrade
+
+def test_configs_with_different_explicit_timeranges_keep_their_own(list_data):
+    january = config("January", "20240101-20240201")
+    march = config("March", "20240301-20240401")
+    pinned = config("Pinned")
+
+    groups = group_configs([january, march, pinned], SESSION_START)
+
+    assert len(groups) == 3
+    assert january.timerange == "20240101-20240201"
+    assert march.timerange == "20240301-20240401"
+    assert pinned.timerange == "20250916-"
+
+    ready = stage_data([january, march, pinned], "freqtrade", SESSION_START, logging.getLogger("test"))
+    assert [c.name for c in ready] == ["January", "March", "Pinned"]
+
+def test_closed_timerange_needs_coverage_not_recent_data(list_data):
+    list_data.output = list_data_output("2023-01-01 00:00:00", "2024-06-01 00:00:00")
+    closed = group_configs([config("Closed", "20240101-20240201")], SESSION_START)[0]
+    open_ended = group_configs([config("Open")], SESSION_START)[0]
+    logger = logging.getLogger("test")
+
+    assert check_coverage(closed, "freqtrade", SESSION_START, logger) == []
+    assert any("data ends" in problem for problem in check_coverage(open_ended, "freqtrade", SESSION_START, logger))
+
+    list_data.output = list_data_output("2023-01-01 00:00:00", "2024-01-15 00:00:00")
+    assert any("before 2024-02-01" in problem for problem in check_coverage(closed, "freqtrade", SESSION_START, logger))
+
+def test_malformed_timerange_only_skips_its_config(list_data, caplog):
+    with caplog.at_level(logging.ERROR):
+        ready = stage_data([config("Bad", "2024-01-01"), config("Good")], "freqtrade", SESSION_START,
+                           logging.getLogger("test"))
+
+    assert [c.name for c in ready] == ["Good"]
+    assert "Skipping Bad: invalid timerange '2024-01-01'" in caplog.text
+
+def test_parse_timerange():
+    assert parse_timerange("20240101-") == (datetime(2024, 1, 1), None)
+    assert parse_timerange("20240101-20240201") == (datetime(2024, 1, 1), datetime(2024, 2, 1))
+    assert parse_timerange("-20240201") == (None, datetime(2024, 2, 1))
+    for bad in ("20240101", "-", "2024-01-01", "20241341-"):
+        with pytest.raises(ValueError):
+            parse_timerange(bad)
+
+def test_newer_candles_change_the_cache_key(list_data, tmp_path):
+    logger = logging.getLogger("test")
+    before = stage_data([config("A")], "freqtrade", SESSION_START, logger)[0]
+    list_data.output = list_data_output("2023-01-01 00:00:00", "2025-10-16 12:00:00")
+    after = stage_data([config("A")], "freqtrade", SESSION_START, logger)[0]
+
+    assert before.data_end == "2025-10-16T11:55"
+    assert after.data_end == "2025-10-16T12:00"
+    assert run_fingerprint(before, 1, 1, "2025.9", tmp_path) != run_fingerprint(after, 1, 1, "2025.9", tmp_path)
+    # Without staging, an open-ended run's data is unknown and it is not cached
+    assert run_fingerprint(config("A"), 1, 1, "2025.9", tmp_path) is None
+    assert run_fingerprint(config("A", "20240101-20240201"), 1, 1, "2025.9", tmp_path) is not None
@@ -0,0 +1,60 @@
+import logging
+
+from utils.config_loader import HyperoptConfig
+from utils.ledger import DONE, FAILED, PENDING, RUNNING, SKIPPED, SessionLedger
+from utils.scheduler import plan_run_tasks
+
+SESSION = "2510161200"
+
+def config(name, config_file, num_runs=3):
+    return HyperoptConfig(name=name, strategy=name, config_file=str(config_file), pairs_file="pairs.json",
+                          hyperopt_loss="SharpeHyperOptLoss", epochs=100, max_open_trades=3, timeframe="5m",
+                          days_back=30, space_buy=True, space_sell=False, space_roi=False, space_stoploss=False,
+                          space_trailing=False, enable_protections=False, num_runs=num_runs, sleep_between_runs=0)
+
+def test_ledger_survives_a_restart(tmp_path):
+    session_dir = tmp_path / SESSION
+    run_dir = session_dir / "5m" / "SharpeHyperOptLoss" / "A" / "run_1"
+    ledger = SessionLedger(session_dir)
+    ledger.register(run_dir, "A")
+    ledger.mark(run_dir, RUNNING, "A")
+    ledger.mark(run_dir, FAILED, "A", error="boom")
+    ledger.mark(run_dir, RUNNING, "A")
+    ledger.mark(run_dir, DONE, "A")
+
+    resumed = SessionLedger(session_dir)
+
+    assert resumed.key_for(run_dir) == "5m/SharpeHyperOptLoss/A/run_1"
+    assert resumed.is_done(run_dir)
+    assert resumed._runs["5m/SharpeHyperOptLoss/A/run_1"]['attempts'] == 2
+    assert resumed.counts()[DONE] == 1
+
+def test_register_keeps_a_known_run(tmp_path):
+    session_dir = tmp_path / SESSION
+    run_dir = session_dir / "run_1"
+    ledger = SessionLedger(session_dir)
+    ledger.mark(run_dir, FAILED, "A", error="boom")
+
+    ledger.register(run_dir, "A")
+
+    assert ledger.state(run_dir) == FAILED
+    assert not ledger.is_done(run_dir)
+    ledger.register(session_dir / "run_2", "A")
+    assert ledger.state(session_dir / "run_2") == PENDING
+
+def test_resumed_session_plans_only_unfinished_runs(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text("{}")
+    logger = logging.getLogger("test")
+    ledger = SessionLedger(tmp_path / SESSION)
+    first = plan_run_tasks([config("A", config_file)], tmp_path, SESSION, logger, ledger=ledger)
+    assert [task.run_num for task in first] == [1, 2, 3]
+    ledger.mark(first[0].run_dir, DONE, "A")
+    ledger.mark(first[1].run_dir, SKIPPED, "A")
+    ledger.mark(first[2].run_dir, RUNNING, "A")
+
+    resumed = plan_run_tasks([config("A", config_file)], tmp_path, SESSION, logger,
+                             ledger=SessionLedger(tmp_path / SESSION))
+
+    # A run the crash left marked running is run again
+    assert [(task.run_num, task.run_dir) for task in resumed] == [(3, first[2].run_dir)]
@@ -0,0 +1,87 @@
+import logging
+import time
+
+import pytest
+
+from utils import memory
+from utils.config_loader import HyperoptConfig
+from utils.memory import (DEFAULT_RUN_MEMORY_MB, ESTIMATE_HEADROOM, MemoryEstimator, MemoryGate, parse_memory_size,
+                          run_workload)
+from utils.scheduler import MAX_DEFER_SECONDS, RunTask, _admit_next
+
+MB = 1024 ** 2
+GB = 1024 ** 3
+
+def config(name, days_back):
+    return HyperoptConfig(name=name, strategy=name, config_file="config.json", pairs_file="pairs.json",
+                          hyperopt_loss="SharpeHyperOptLoss", epochs=100, max_open_trades=3, timeframe="5m",
+                          days_back=days_back, space_buy=True, space_sell=False, space_roi=False,
+                          space_stoploss=False, space_trailing=False, enable_protections=False, num_runs=1,
+                          sleep_between_runs=0)
+
+HEAVY = config("Heavy", 300)
+LIGHT = config("Light", 30)
+
+def estimator_with(*measured):
+    estimator = MemoryEstimator()
+    for config_, peak_mb in measured:
+        estimator.observe({'workload': run_workload(config_, 1).as_dict(), 'child_tree_rss_mb': peak_mb})
+    return estimator
+
+@pytest.fixture
+def roomy_host(monkeypatch):
+    monkeypatch.setattr(memory, 'meminfo', lambda: {'MemTotal': 64 * GB, 'MemAvailable': 60 * GB})
+
+def test_parse_memory_size(roomy_host):
+    assert parse_memory_size("48G") == 48 * GB
+    assert parse_memory_size("512MiB") == 512 * MB
+    assert parse_memory_size("50%") == 32 * GB
+    with pytest.raises(ValueError):
+        parse_memory_size("lots")
+
+def test_estimates_scale_the_closest_measured_run():
+    estimator = estimator_with((HEAVY, 1000))
+
+    assert estimator.estimate_mb(run_workload(HEAVY, 1)) == pytest.approx(1000 * ESTIMATE_HEADROOM)
+    # A tenth of the candles: the fixed base plus a tenth of the candle-dependent part
+    assert estimator.estimate_mb(run_workload(LIGHT, 1)) == pytest.approx((300 + 700 / 10) * ESTIMATE_HEADROOM)
+    assert MemoryEstimator().estimate_mb(run_workload(LIGHT, 1)) == DEFAULT_RUN_MEMORY_MB * ESTIMATE_HEADROOM
+
+def test_gate_defers_runs_that_do_not_fit_under_the_ceiling(roomy_host):
+    gate = MemoryGate(2000 * MB, estimator_with((HEAVY, 1000)), logging.getLogger("test"))
+    heavy = run_workload(HEAVY, 1)
+
+    # Nothing running: even a run above the ceiling is admitted, or the queue would stall
+    assert MemoryGate(100 * MB, gate.estimator, logging.getLogger("test")).defer_reason(heavy) is None
+    assert gate.defer_reason(heavy) is None
+    gate.admit("heavy_1", heavy)
+    assert "ceiling" in gate.defer_reason(heavy)
+    assert gate.defer_reason(run_workload(LIGHT, 1)) is None
+
+    gate.release("heavy_1")
+    assert gate.defer_reason(heavy) is None
+
+def test_gate_keeps_the_host_reserve_free(monkeypatch):
+    monkeypatch.setattr(memory, 'meminfo', lambda: {'MemAvailable': 1500 * MB})
+    gate = MemoryGate(100 * GB, estimator_with((HEAVY, 1000)), logging.getLogger("test"))
+    gate.admit("light_1", run_workload(LIGHT, 1))
+
+    assert "host has" in gate.defer_reason(run_workload(HEAVY, 1))
+
+def test_light_runs_overtake_a_deferred_one_until_it_waited_too_long(tmp_path, roomy_host):
+    logger = logging.getLogger("test")
+    gate = MemoryGate(2000 * MB, estimator_with((HEAVY, 1000)), logger)
+    gate.admit("running_heavy", run_workload(HEAVY, 1))
+    waiting = RunTask(HEAVY, 2, tmp_path / "Heavy" / "run_2")
+    pending = [waiting, RunTask(LIGHT, 1, tmp_path / "Light" / "run_1"),
+               RunTask(LIGHT, 2, tmp_path / "Light" / "run_2")]
+
+    started = _admit_next(pending, gate, None, 1, logger)
+
+    assert (started.config.name, started.run_num) == ("Light", 1)
+    assert waiting.deferred_since is not None
+    assert pending[0] is waiting
+
+    waiting.deferred_since = time.monotonic() - MAX_DEFER_SECONDS - 1
+    assert _admit_next(pending, gate, None, 1, logger) is None
+    assert len(pending) == 2
@@ -0,0 +1,57 @@
+import pytest
+
+from utils.config_loader import HyperoptConfig
+from utils.planner import RuntimeModel, config_shape, longest_first, plan_schedule
+
+def config(name, epochs=100, timeframe="5m", num_runs=1, sleep_between_runs=0, strategy=None):
+    return HyperoptConfig(name=name, strategy=strategy or name, config_file="config.json", pairs_file="pairs.json",
+                          hyperopt_loss="SharpeHyperOptLoss", epochs=epochs, max_open_trades=3, timeframe=timeframe,
+                          days_back=30, space_buy=True, space_sell=False, space_roi=False, space_stoploss=False,
+                          space_trailing=False, enable_protections=False, num_runs=num_runs,
+                          sleep_between_runs=sleep_between_runs)
+
+def model_of(*timed):
+    return RuntimeModel([(config_shape(config_), seconds) for config_, seconds in timed])
+
+def test_estimates_prefer_identical_runs_then_scale_by_epochs():
+    model = model_of((config("A", 100), 100.0), (config("A", 100), 300.0))
+
+    identical = model.estimate(config("A", 100))
+    scaled = model.estimate(config("A", 400))
+
+    assert identical.seconds == 200.0 and "identical" in identical.basis
+    assert scaled.seconds == pytest.approx(800.0)
+    assert "A 5m" in scaled.basis
+
+def test_unshaped_runs_of_the_same_strategy_beat_other_strategies():
+    model = RuntimeModel([(config_shape(config("B")), 10.0)], unshaped=[("A", "5m", 500.0), ("A", "5m", 700.0)])
+
+    estimate = model.estimate(config("A"))
+
+    assert estimate.seconds == 600.0
+    assert "unknown shape" in estimate.basis
+    assert "no history" in RuntimeModel().estimate(config("A")).basis
+
+def test_longest_first_orders_by_estimate_and_keeps_ties_in_order():
+    model = model_of((config("Short"), 10.0), (config("Long"), 100.0), (config("Tie"), 10.0))
+    configs = [config("Short"), config("Long"), config("Tie")]
+
+    assert [c.name for c in longest_first(configs, lambda c: c, model)] == ["Long", "Short", "Tie"]
+
+def test_plan_schedule_puts_the_longest_runs_first_on_the_first_free_worker():
+    model = model_of((config("A"), 60.0), (config("B"), 30.0), (config("C"), 30.0), (config("D"), 20.0))
+    runs = [(config(name), 1) for name in "DCBA"]
+
+    planned = plan_schedule(runs, model, workers=2)
+
+    assert [(run.config.name, run.worker, run.start, run.end) for run in planned] == [
+        ("A", 1, 0.0, 60.0), ("C", 2, 0.0, 30.0), ("B", 2, 30.0, 60.0), ("D", 1, 60.0, 80.0)]
+
+def test_sequential_plan_keeps_the_config_order_and_sleeps_between_repeats():
+    model = model_of((config("A", num_runs=2, sleep_between_runs=5), 10.0), (config("B"), 100.0))
+    a = config("A", num_runs=2, sleep_between_runs=5)
+
+    planned = plan_schedule([(a, 1), (a, 2), (config("B"), 1)], model, workers=1, sequential=True)
+
+    assert [(run.config.name, run.start, run.end) for run in planned] == [
+        ("A", 0.0, 10.0), ("A", 15.0, 25.0), ("B", 25.0, 125.0)]
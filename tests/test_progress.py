@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+
+from utils import progress
+from utils.progress import ProgressMonitor, RunProgress
+
+def test_finished_runs_are_folded_into_the_session_totals(tmp_path, monkeypatch):
+    monkeypatch.setattr(progress, 'MAX_FINISHED_LISTED', 2)
+    monitor = ProgressMonitor(tmp_path, logging.getLogger("test"), planned_epochs=500)
+    for number in range(5):
+        run = monitor.start_run(f"A_run{number}", "A", number, total_epochs=100)
+        run.current_epoch = 80
+        monitor.finish_run(run)
+    running = monitor.start_run("A_run5", "A", 5, total_epochs=100)
+    running.current_epoch = 10
+
+    status = monitor.write_status()
+
+    assert len(status['runs']) == 3
+    assert [run['run_id'] for run in monitor.session_status()['runs']] == ['A_run3', 'A_run4', 'A_run5']
+    assert status['runs_finished'] == 5
+    assert status['runs_running'] == 1
+    assert status['completed_epochs'] == 510
+
+@pytest.mark.parametrize("line", [
+    "1000 epochs saved to '/ft/user_data/hyperopt_results/strategy_A_2025-10-16_12-00-00.fthypt'.",
+    "1 epoch saved to '/ft/user_data/hyperopt_results/strategy_A_2025-10-16_12-00-00.fthypt'.",
+])
+def test_results_file_is_taken_from_the_saved_line(line):
+    run = RunProgress(run_id="A_run1", config_name="A", run_number=1, total_epochs=1000)
+
+    run.parse_line("2025-10-16 12:00:00,000 - freqtrade.optimize.hyperopt - INFO - " + line)
+
+    assert run.results_file == "/ft/user_data/hyperopt_results/strategy_A_2025-10-16_12-00-00.fthypt"
@@ -0,0 +1,31 @@
+import json
+import logging
+
+import pytest
+
+from utils.results_reader import read_hyperopt_results
+
+def epoch_line(epoch, loss, profit, is_best=False):
+    return json.dumps({'current_epoch': epoch, 'loss': loss, 'is_best': is_best,
+                       'results_metrics': {'profit_total': profit, 'total_trades': 10}}) + "\n"
+
+def test_truncated_last_line_keeps_the_complete_epochs(tmp_path, caplog):
+    results_file = tmp_path / "strategy_A_2025-10-16_12-00-00.fthypt"
+    last = epoch_line(3, -0.9, 0.3, is_best=True)
+    results_file.write_text(epoch_line(1, -0.1, 0.05, is_best=True) + epoch_line(2, 0.2, -0.01)
+                            + last[:len(last) // 2])
+
+    with caplog.at_level(logging.DEBUG, logger="test"):
+        results = read_hyperopt_results(results_file, logging.getLogger("test"))
+
+    assert results.total_epochs == 2
+    assert results.best['current_epoch'] == 1
+    assert results.profitable['current_epoch'] == 1
+    assert "incomplete last line" in caplog.text
+
+def test_damaged_line_before_the_end_is_an_error(tmp_path):
+    results_file = tmp_path / "strategy_A_2025-10-16_12-00-00.fthypt"
+    results_file.write_text(epoch_line(1, -0.1, 0.05) + "{not json\n" + epoch_line(3, -0.9, 0.3))
+
+    with pytest.raises(json.JSONDecodeError):
+        read_hyperopt_results(results_file)
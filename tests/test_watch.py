@@ -0,0 +1,26 @@
+import logging
+
+from utils.watch import ConfigWatcher
+
+HEADER = ("name,strategy,config,pairs,hyperopt_loss,epochs,max_open_trades,timeframe,days_back,space_buy,"
+          "space_sell,space_roi,space_stoploss,space_trailing,enable_protections,num_runs,sleep_between_runs\n")
+
+def config_row(name):
+    return f"{name},{name},c.json,p.json,L,200,3,5m,30,true,false,false,false,false,false,1,0\n"
+
+def test_configs_that_fail_staging_are_retried(tmp_path):
+    config_csv = tmp_path / "configs.csv"
+    config_csv.write_text(HEADER + config_row("A") + config_row("B"))
+    data_ready = {'A'}
+    watcher = ConfigWatcher(config_csv, logging.getLogger("test"), interval=0,
+                            prepare=lambda configs: [c for c in configs if c.name in data_ready])
+
+    assert [config.name for config in watcher.poll()] == ['A']
+    # Unchanged file, retry not due yet
+    assert watcher.poll() == []
+
+    data_ready.add('B')
+    # Retry interval elapsed
+    watcher._retry_at = {path: 0 for path in watcher._retry_at}
+    assert [config.name for config in watcher.poll()] == ['B']
+    assert watcher.poll() == []
@@ -0,0 +1,100 @@
+from pathlib import Path
+
+from utils.config_loader import HyperoptConfig
+from utils.executor import ExecutionResult
+from utils.scheduler import RunTask
+from utils.work_queue import QUEUE_DONE, QUEUE_FAILED, QUEUE_PENDING, QUEUE_RUNNING, WorkQueue
+
+SESSION = "2510161200"
+
+def config(name):
+    return HyperoptConfig(name=name, strategy=name, config_file="config.json", pairs_file="pairs.json",
+                          hyperopt_loss="SharpeHyperOptLoss", epochs=100, max_open_trades=3, timeframe="5m",
+                          days_back=30, space_buy=True, space_sell=False, space_roi=False, space_stoploss=False,
+                          space_trailing=False, enable_protections=False, num_runs=1, sleep_between_runs=0)
+
+def queue_with(tmp_path, *names, max_attempts=3):
+    queue = WorkQueue(tmp_path / "queue.db", max_attempts=max_attempts)
+    tasks = [RunTask(config(name), 1, tmp_path / SESSION / name / "run_1") for name in names]
+    queue.enqueue(SESSION, tasks, tmp_path)
+    return queue
+
+def task_row(queue, task_id):
+    return queue._conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+
+def result_for(task, profit):
+    return ExecutionResult(config_name=task.config.name, run_number=task.run_num, output_file=Path("out"),
+                           metrics_dir=Path(task.run_dir), config_file=Path("config.json"), elapsed_time=60,
+                           summary_data={'total_profit': profit, 'status': 'complete'})
+
+def test_enqueue_skips_tasks_already_queued(tmp_path):
+    queue = queue_with(tmp_path, "A", "B")
+
+    assert queue.enqueue(SESSION, [RunTask(config("A"), 1, tmp_path / SESSION / "A" / "run_1")], tmp_path) == 0
+    assert queue.counts(SESSION) == {QUEUE_PENDING: 2}
+
+def test_tasks_are_claimed_oldest_first_and_once(tmp_path):
+    queue = queue_with(tmp_path, "A", "B")
+
+    first = queue.claim("w1")
+    second = queue.claim("w2")
+
+    assert (first.config.name, second.config.name) == ("A", "B")
+    assert queue.claim("w3") is None
+    assert queue.counts(SESSION) == {QUEUE_RUNNING: 2}
+
+def test_expired_lease_is_requeued_for_another_worker(tmp_path):
+    queue = queue_with(tmp_path, "A")
+    lost = queue.claim("w1", lease_seconds=-1)
+
+    taken = queue.claim("w2")
+
+    assert taken.id == lost.id
+    assert not queue.heartbeat(lost.id, "w1")
+    assert queue.heartbeat(taken.id, "w2")
+    assert not queue.complete(lost.id, "w1", result_for(lost, 1.0))
+    assert queue.complete(taken.id, "w2", result_for(taken, 2.0))
+    assert [r.summary_data['total_profit'] for r in queue.results(SESSION, tmp_path)] == [2.0]
+
+def test_expired_lease_fails_the_task_after_max_attempts(tmp_path):
+    queue = queue_with(tmp_path, "A", max_attempts=2)
+    queue.claim("w1", lease_seconds=-1)
+    queue.claim("w2", lease_seconds=-1)
+
+    assert queue.requeue_expired() == 0
+    row = task_row(queue, 1)
+    assert (row['state'], row['attempts'], row['error']) == (QUEUE_FAILED, 2, 'lease expired')
+    assert row['finished_at'] is not None
+    assert queue.is_drained(SESSION)
+
+def test_failed_attempt_is_retried_until_attempts_run_out(tmp_path):
+    queue = queue_with(tmp_path, "A", max_attempts=2)
+
+    task = queue.claim("w1")
+    queue.fail(task.id, "w1", "boom")
+    row = task_row(queue, task.id)
+    assert (row['state'], row['finished_at']) == (QUEUE_PENDING, None)
+
+    task = queue.claim("w1")
+    queue.fail(task.id, "w1", "boom again")
+    row = task_row(queue, task.id)
+    assert (row['state'], row['error']) == (QUEUE_FAILED, "boom again")
+    assert row['finished_at'] is not None
+
+    assert queue.retry_failed(SESSION) == 1
+    row = task_row(queue, task.id)
+    assert (row['state'], row['attempts'], row['finished_at']) == (QUEUE_PENDING, 0, None)
+
+def test_results_keep_partial_runs_of_failed_tasks(tmp_path):
+    queue = queue_with(tmp_path, "A", "B", max_attempts=1)
+    a, b = queue.claim("w1"), queue.claim("w1")
+    partial = result_for(b, -1.0)
+    partial.summary_data['status'] = 'interrupted'
+
+    assert queue.complete(a.id, "w1", result_for(a, 2.0))
+    assert queue.record_partial(b.id, "w1", partial)
+    queue.fail(b.id, "w1", "interrupted")
+
+    results = queue.results(SESSION, tmp_path)
+    assert [(r.config_name, r.status) for r in results] == [("A", "complete"), ("B", "interrupted")]
+    assert queue.counts(SESSION) == {QUEUE_DONE: 1, QUEUE_FAILED: 1}
@@ -0,0 +1,153 @@
+"""
+Wall-clock budget.
+With --time-budget the session has to be over by a deadline. Every config
+first gets an equal exploration slice that measures its epoch throughput and
+how fast its best loss still falls; the time left then goes to the repeat
+runs of the configs that were improving fastest. A run is stopped like Ctrl-C
+once its slice or the budget is used up, so hyperopt saves its epochs and
+the results are collected before the deadline.
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from utils.planner import format_duration
+from utils.progress import RunProgress
+
+BUDGET_WIND_DOWN = 600  # seconds kept for stopped runs to save their epochs and results to be collected
+EXPLORE_SHARE = 0.3  # part of the budget spent measuring every config before the rest is allocated
+MIN_RUN_EPOCHS = 20  # a run is not started if it could not get through this many epochs
+MIN_RUN_SECONDS = 120  # the same, for configs whose throughput has not been measured yet
+
+_DURATION = re.compile(r"^(?:(?P<hours>\d+)h)?(?:(?P<minutes>\d+)m)?(?:(?P<seconds>\d+)s)?$")
+_CLOCK = re.compile(r"^(?P<hour>\d{1,2}):(?P<minute>\d\d)$")
+
+def parse_deadline(text: str, now: Optional[datetime] = None) -> datetime:
+    """'6h', '90m', '1h30m' from now, or a clock time such as '06:00' (the next one to come)"""
+    now = now or datetime.now()
+    text = text.strip()
+    clock = _CLOCK.match(text)
+    if clock:
+        deadline = now.replace(hour=int(clock['hour']), minute=int(clock['minute']), second=0, microsecond=0)
+        return deadline if deadline > now else deadline + timedelta(days=1)
+    duration = _DURATION.match(text)
+    if not text or not duration:
+        raise ValueError(f"invalid time budget: {text} (use e.g. 6h, 90m, 1h30m or 06:00)")
+    return now + timedelta(hours=int(duration['hours'] or 0), minutes=int(duration['minutes'] or 0),
+                           seconds=int(duration['seconds'] or 0))
+
+def improvement_rate(progress: RunProgress) -> Optional[float]:
+    """Relative drop of the best loss per second over the second half of a run; 0 once it has flattened"""
+    if not progress.best_history or progress.elapsed <= 0:
+        return None
+    half = progress.elapsed / 2
+    earlier = [loss for at, loss in progress.best_history if at <= half]
+    start_loss = earlier[-1] if earlier else progress.best_history[0][1]
+    end_loss = progress.best_history[-1][1]
+    return (start_loss - end_loss) / max(abs(end_loss), 1e-9) / half
+
+@dataclass
+class ConfigBudget:
+    """What the budget has learned about one config"""
+    runs: int = 0
+    epochs: int = 0
+    seconds: float = 0.0
+    improvement_rate: Optional[float] = None
+
+    @property
+    def epochs_per_sec(self) -> Optional[float]:
+        return self.epochs / self.seconds if self.epochs and self.seconds > 0 else None
+
+class TimeBudget:
+    """Decides which queued run starts next, and how long it may take, so all work ends before the deadline"""
+
+    def __init__(self, deadline: datetime, logger: logging.Logger, wind_down: float = BUDGET_WIND_DOWN):
+        self.deadline = deadline
+        self.stop_time = deadline.timestamp() - wind_down
+        self.logger = logger
+        self.started = time.time()
+        self.config_count = 1
+        self.workers = 1
+        self._configs: Dict[int, ConfigBudget] = {}
+        self._stops: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, config_count: int, workers: int):
+        self.started = time.time()
+        self.config_count = max(config_count, 1)
+        self.workers = max(workers, 1)
+        self.logger.info(f"Time budget: all runs end by {self.deadline:%Y-%m-%d %H:%M} "
+                         f"({format_duration(self.remaining())} of hyperopt left)")
+
+    def add_configs(self, config_count: int):
+        """Configs queued after begin() (watch mode) get their share of the exploration time too"""
+        with self._lock:
+            self.config_count += config_count
+        self.logger.info(f"Time budget: {config_count} more config(s) to explore, "
+                         f"{format_duration(self.remaining())} left")
+
+    def remaining(self) -> float:
+        return max(0.0, self.stop_time - time.time())
+
+    def _stats(self, config) -> ConfigBudget:
+        return self._configs.setdefault(id(config), ConfigBudget())
+
+    def prioritise(self, tasks: Sequence) -> List:
+        """Unexplored configs first, then the fastest improving ones; configs still being measured last"""
+        def priority(task):
+            with self._lock:
+                stats = self._stats(task.config)
+            if stats.runs == 0:
+                return (0, 0.0)
+            if stats.improvement_rate is not None:
+                return (1, -stats.improvement_rate)
+            return (2, 0.0)
+        return sorted(tasks, key=priority)
+
+    def slice_for(self, config) -> Optional[float]:
+        """Seconds a run of this config may take if it started now, None if it is not worth starting"""
+        with self._lock:
+            stats = self._stats(config)
+        seconds = self.remaining()
+        if stats.runs == 0:
+            # An equal share of the exploration time per config, spread over the workers
+            with self._lock:
+                explore = (self.stop_time - self.started) * EXPLORE_SHARE * self.workers / self.config_count
+            seconds = min(seconds, max(explore, MIN_RUN_SECONDS))
+        throughput = stats.epochs_per_sec
+        if throughput:
+            return seconds if seconds * throughput >= MIN_RUN_EPOCHS else None
+        return seconds if seconds >= MIN_RUN_SECONDS else None
+
+    def start_run(self, run_id: str, config, seconds: float):
+        with self._lock:
+            stats = self._stats(config)
+            stats.runs += 1
+            self._stops[run_id] = min(time.time() + seconds, self.stop_time)
+        throughput = stats.epochs_per_sec
+        expected = f", ~{int(seconds * throughput)} epochs at {throughput:.2f}/s" if throughput else ""
+        self.logger.info(f"Time budget: {run_id} gets up to {format_duration(seconds)}{expected}")
+
+    def stop_at(self, run_id: str) -> Optional[float]:
+        """When the run has to be stopped, as a time.time() value"""
+        with self._lock:
+            return self._stops.get(run_id)
+
+    def finish_run(self, run_id: str, config, progress: RunProgress):
+        rate = improvement_rate(progress)
+        with self._lock:
+            self._stops.pop(run_id, None)
+            stats = self._stats(config)
+            stats.epochs += progress.current_epoch
+            stats.seconds += progress.elapsed
+            if rate is not None:
+                stats.improvement_rate = rate
+        self.logger.info(
+            f"Time budget: {run_id} did {progress.current_epoch} epochs in {format_duration(progress.elapsed)}, "
+            f"best loss improving {(rate or 0) * 6000:.2f}%/min late in the run; {format_duration(self.remaining())} left"
+        )
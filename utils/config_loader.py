@@ -1,7 +1,16 @@
+import configparser
 import csv
+import hashlib
+import itertools
+import json
+import logging
+from datetime import datetime, timedelta
 from pathlib import Path
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Separates the values of a multi-valued cell, e.g. timeframe "1m|5m|15m|1h"
+SWEEP_SEPARATOR = "|"
 
 @dataclass
 class HyperoptConfig:
@@ -22,6 +31,8 @@ class HyperoptConfig:
     enable_protections: bool
     num_runs: int
     sleep_between_runs: int
+    timerange: Optional[str] = None
+    data_end: Optional[str] = None  # newest candle a timerange without a (past) end date reaches; set by staging
 
     def __post_init__(self):
         self.config_file = self._resolve_path(self.config_file)
@@ -53,39 +64,139 @@ class HyperoptConfig:
             ('trailing', self.space_trailing)
         ] if enabled]
 
+    def get_timerange(self) -> str:
+        """Session-pinned timerange, or one counted back from now if the session has not pinned it"""
+        if self.timerange:
+            return self.timerange
+        return timerange_for(self.days_back, datetime.now())
+
     @property
     def config_files(self) -> List[str]:
         """Return list of config files for the freqtrade command"""
         return [self.config_file, self.pairs_file]
 
-def load_configurations(csv_path: Path) -> List[HyperoptConfig]:
-    if not csv_path.exists():
-        raise FileNotFoundError(f"Config CSV missing at: {csv_path}")
-    
-    configs = []
-    with open(csv_path) as f:
-        for row in csv.DictReader(f):
-            try:
-                configs.append(HyperoptConfig(
-                    name=row['name'],
-                    strategy=row['strategy'],
-                    config_file=row['config'],
-                    pairs_file=row['pairs'],
-                    hyperopt_loss=row['hyperopt_loss'],
-                    epochs=int(row['epochs']),
-                    max_open_trades=int(row['max_open_trades']),
-                    timeframe=row['timeframe'],
-                    days_back=int(row['days_back']),
-                    space_buy=row['space_buy'].lower() == 'true',
-                    space_sell=row['space_sell'].lower() == 'true',
-                    space_roi=row['space_roi'].lower() == 'true',
-                    space_stoploss=row['space_stoploss'].lower() == 'true',
-                    space_trailing=row['space_trailing'].lower() == 'true',
-                    enable_protections=row['enable_protections'].lower() == 'true',
-                    num_runs=int(row['num_runs']),
-                    sleep_between_runs=int(row['sleep_between_runs'])
-                ))
-            except (KeyError, ValueError) as e:
-                raise ValueError(f"Invalid CSV row: {e}")
-
-    return configs
\ No newline at end of file
+def timerange_for(days_back: int, end: datetime) -> str:
+    """Open-ended freqtrade timerange starting days_back days before end"""
+    return f"{(end - timedelta(days=days_back)).strftime('%Y%m%d')}-"
+
+def _timerange_bound(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    if len(value) == 8:
+        return datetime.strptime(value, '%Y%m%d')
+    if value.isdigit():
+        # freqtrade also takes unix timestamps, in seconds or milliseconds
+        return datetime.fromtimestamp(int(value) / 1000 if len(value) > 10 else int(value))
+    raise ValueError(value)
+
+def parse_timerange(timerange: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """(start, end) of a freqtrade timerange such as 20240101-, 20240101-20240201 or -20240201; None for an
+    open side"""
+    start, separator, end = timerange.partition('-')
+    try:
+        if not separator or not (start or end):
+            raise ValueError(timerange)
+        return _timerange_bound(start), _timerange_bound(end)
+    except (ValueError, OverflowError, OSError):
+        raise ValueError(f"invalid timerange '{timerange}', expected YYYYMMDD-[YYYYMMDD]")
+
+def pair_whitelist(pairs_file: str) -> List[str]:
+    """exchange.pair_whitelist of a pairs file (entries may be regexes); empty if it cannot be read"""
+    try:
+        with open(pairs_file) as f:
+            return list(json.load(f).get('exchange', {}).get('pair_whitelist', []))
+    except (OSError, ValueError, AttributeError):
+        return []
+
+def config_fingerprint(config: HyperoptConfig) -> str:
+    """Stable hash of everything that shapes the hyperopt command; the name and repeat settings are not part of it"""
+    identity = {
+        'strategy': config.strategy,
+        'config_file': config.config_file,
+        'pairs_file': config.pairs_file,
+        'hyperopt_loss': config.hyperopt_loss,
+        'epochs': config.epochs,
+        'max_open_trades': config.max_open_trades,
+        'timeframe': config.timeframe,
+        'days_back': config.days_back,
+        'spaces': config.spaces,
+        'enable_protections': config.enable_protections,
+        'timerange': config.timerange
+    }
+    return hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:16]
+
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() == 'true'
+
+def _config_from_row(row: Dict[str, str]) -> HyperoptConfig:
+    return HyperoptConfig(
+        name=row['name'],
+        strategy=row['strategy'],
+        config_file=row['config'],
+        pairs_file=row['pairs'],
+        hyperopt_loss=row['hyperopt_loss'],
+        epochs=int(row['epochs']),
+        max_open_trades=int(row['max_open_trades']),
+        timeframe=row['timeframe'],
+        days_back=int(row['days_back']),
+        space_buy=_parse_bool(row['space_buy']),
+        space_sell=_parse_bool(row['space_sell']),
+        space_roi=_parse_bool(row['space_roi']),
+        space_stoploss=_parse_bool(row['space_stoploss']),
+        space_trailing=_parse_bool(row['space_trailing']),
+        enable_protections=_parse_bool(row['enable_protections']),
+        num_runs=int(row['num_runs']),
+        sleep_between_runs=int(row['sleep_between_runs']),
+        timerange=row.get('timerange') or None
+    )
+
+def expand_row(row: Dict[str, str]) -> Iterator[HyperoptConfig]:
+    """Yield one config per combination of the row's multi-valued cells (e.g. timeframe '1m|5m|1h')"""
+    columns = [column for column in row if column is not None]
+    choices = [[(row[column] or '').strip()] if column == 'name' else
+               [value.strip() for value in (row[column] or '').split(SWEEP_SEPARATOR)]
+               for column in columns]
+    swept = [column for column, values in zip(columns, choices) if len(values) > 1]
+
+    for combination in itertools.product(*choices):
+        values = dict(zip(columns, combination))
+        if swept:
+            # Tell the combinations apart in logs, the ledger and the summary
+            values['name'] = f"{row['name']}[{','.join(f'{column}={values[column]}' for column in swept)}]"
+        yield _config_from_row(values)
+
+def _csv_rows(path: Path) -> Iterator[Dict[str, str]]:
+    with open(path, newline='') as f:
+        yield from csv.DictReader(f)
+
+def _sweep_rows(path: Path) -> Iterator[Dict[str, str]]:
+    """One row per section of an INI sweep file; [DEFAULT] holds values shared by every section"""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.optionxform = str
+    parser.read(path)
+    for section in parser.sections():
+        yield dict(parser[section], name=parser[section].get('name', section))
+
+def iter_configurations(path: Path, logger: Optional[logging.Logger] = None) -> Iterator[HyperoptConfig]:
+    """Lazily expand a config CSV or sweep file, skipping combinations already yielded"""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"Config file missing at: {path}")
+
+    rows = _csv_rows(path) if path.suffix.lower() == '.csv' else _sweep_rows(path)
+    seen: Set[str] = set()
+    for line, row in enumerate(rows, 1):
+        try:
+            for config in expand_row(row):
+                fingerprint = config_fingerprint(config)
+                if fingerprint in seen:
+                    if logger:
+                        logger.info(f"Skipping {config.name}: duplicates an earlier configuration")
+                    continue
+                seen.add(fingerprint)
+                yield config
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Invalid config row {line} in {path.name}: {e}")
+
+def load_configurations(csv_path: Path, logger: Optional[logging.Logger] = None) -> List[HyperoptConfig]:
+    return list(iter_configurations(csv_path, logger))
@@ -0,0 +1,200 @@
+"""
+Session data staging.
+Groups configs that need the same candles, pins one timerange per group for
+the whole session, downloads or verifies the data once per group and checks
+that what is on disk covers the window before any hyperopt starts.
+"""
+
+import logging
+import re
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.config_loader import HyperoptConfig, pair_whitelist, parse_timerange, timerange_for
+from utils.executor import FREQTRADE_DIR
+
+DOWNLOAD_TIMEOUT = 3600
+LIST_DATA_TIMEOUT = 300
+# How far behind the session start the newest candle may be before data counts as stale
+STALE_DATA_TOLERANCE = timedelta(days=1)
+
+@dataclass
+class DataGroup:
+    config_file: str
+    pairs_file: str
+    timeframe: str
+    days_back: int
+    timerange: str
+    configs: List[HyperoptConfig] = field(default_factory=list)
+    data_end: Optional[datetime] = None  # newest candle on disk, once coverage has been checked
+
+    @property
+    def label(self) -> str:
+        return f"{Path(self.pairs_file).name} {self.timeframe} {self.timerange}"
+
+def session_start_from_timestamp(session_timestamp: str) -> datetime:
+    """Sessions are named '%y%m%d%H%M', so a resumed session recovers its original start time"""
+    return datetime.strptime(session_timestamp, '%y%m%d%H%M')
+
+def _reaches_present(timerange: str, session_start: datetime) -> bool:
+    """Whether a run over this timerange uses whatever candles are newest, so its result changes with the data"""
+    try:
+        _, end = parse_timerange(timerange)
+    except ValueError:
+        return False
+    return end is None or end > session_start
+
+def _pin_data_end(group: DataGroup, data_end: datetime):
+    for config in group.configs:
+        if _reaches_present(config.timerange, data_end):
+            config.data_end = data_end.isoformat(timespec='minutes')
+
+def group_configs(configs: List[HyperoptConfig], session_start: datetime) -> List[DataGroup]:
+    """Group configs by the candles they need and pin each group's timerange to the session start; a config's own
+    timerange is kept and grouped separately"""
+    groups: Dict[Tuple[str, str, str, int, Optional[str]], DataGroup] = {}
+    for config in configs:
+        # The config file carries the exchange, so it is part of what identifies the data
+        key = (config.config_file, config.pairs_file, config.timeframe, config.days_back, config.timerange)
+        if key not in groups:
+            groups[key] = DataGroup(
+                config_file=config.config_file,
+                pairs_file=config.pairs_file,
+                timeframe=config.timeframe,
+                days_back=config.days_back,
+                timerange=config.timerange or timerange_for(config.days_back, session_start)
+            )
+        config.timerange = groups[key].timerange
+        groups[key].configs.append(config)
+    # Until coverage is checked the session start is the best known end of the data
+    for group in groups.values():
+        _pin_data_end(group, session_start)
+    return list(groups.values())
+
+def _whitelist_patterns(pairs_file: str) -> List[re.Pattern]:
+    return [re.compile(pair) for pair in pair_whitelist(pairs_file)]
+
+def parse_list_data(output: str) -> List[Dict[str, str]]:
+    """Parse the table printed by `freqtrade list-data --show-timerange` (rich or ascii borders)"""
+    rows = []
+    header = None
+    for line in output.split('\n'):
+        if not re.search(r"[│┃|]", line):
+            continue
+        cells = [cell.strip() for cell in re.split(r"[│┃|]", line)[1:-1]]
+        if not cells or not any(cells):
+            continue
+        if header is None:
+            if 'Pair' in cells and 'From' in cells:
+                header = [cell.lower() for cell in cells]
+            continue
+        rows.append(dict(zip(header, cells)))
+    return rows
+
+def _run_freqtrade(cmd: List[str], timeout: int, logger: logging.Logger) -> Optional[str]:
+    logger.info(f"Running command: {' '.join(cmd)}")
+    try:
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            cwd=FREQTRADE_DIR,
+            timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        logger.error(f"Timed out after {timeout} seconds: {' '.join(cmd[:2])}")
+        return None
+    if result.returncode != 0:
+        logger.error(f"{' '.join(cmd[:2])} failed (code {result.returncode}): {result.stderr.strip()}")
+        return None
+    return result.stdout
+
+def check_coverage(group: DataGroup, freqtrade_path: str, session_start: datetime,
+                   logger: logging.Logger) -> List[str]:
+    """Return a list of problems with the data on disk for this group; empty means it covers the window"""
+    output = _run_freqtrade([
+        freqtrade_path, "list-data",
+        "-c", group.config_file,
+        "-c", group.pairs_file,
+        "--timeframes", group.timeframe,
+        "--show-timerange"
+    ], LIST_DATA_TIMEOUT, logger)
+    if output is None:
+        return ["could not list data on disk"]
+
+    window_start, window_end = parse_timerange(group.timerange)
+    patterns = _whitelist_patterns(group.pairs_file)
+    rows = [
+        row for row in parse_list_data(output)
+        if row.get('timeframe') == group.timeframe
+        and (not patterns or any(p.fullmatch(row.get('pair', '')) for p in patterns))
+    ]
+    if not rows:
+        return [f"no {group.timeframe} candles found"]
+
+    problems = []
+    newest = []
+    for row in rows:
+        try:
+            first = datetime.strptime(row['from'][:19], '%Y-%m-%d %H:%M:%S')
+            last = datetime.strptime(row['to'][:19], '%Y-%m-%d %H:%M:%S')
+        except (KeyError, ValueError):
+            problems.append(f"{row.get('pair')}: unreadable timerange")
+            continue
+        newest.append(last)
+        if window_start and first > window_start:
+            problems.append(f"{row['pair']}: data starts {first:%Y-%m-%d}, after {window_start:%Y-%m-%d}")
+        if window_end:
+            # A closed window only has to be covered, not be recent
+            if last < min(window_end, session_start) - STALE_DATA_TOLERANCE:
+                problems.append(f"{row['pair']}: data ends {last:%Y-%m-%d %H:%M}, before {window_end:%Y-%m-%d}")
+        elif last < session_start - STALE_DATA_TOLERANCE:
+            problems.append(f"{row['pair']}: data ends {last:%Y-%m-%d %H:%M}")
+    group.data_end = max(newest, default=None)
+    return problems
+
+def stage_data(configs: List[HyperoptConfig], freqtrade_path: str, session_start: datetime,
+               logger: logging.Logger, download: bool = False) -> List[HyperoptConfig]:
+    """Pin timeranges, download/verify data once per group and return the configs whose data is ready"""
+    valid = []
+    for config in configs:
+        try:
+            if config.timerange:
+                parse_timerange(config.timerange)
+        except ValueError as e:
+            logger.error(f"Skipping {config.name}: {str(e)}")
+            continue
+        valid.append(config)
+    groups = group_configs(valid, session_start)
+    logger.info(f"Staging data for {len(valid)} configs in {len(groups)} data groups")
+
+    ready = []
+    for group in groups:
+        if download:
+            _run_freqtrade([
+                freqtrade_path, "download-data",
+                "-c", group.config_file,
+                "-c", group.pairs_file,
+                "--timeframes", group.timeframe,
+                "--timerange", group.timerange
+            ], DOWNLOAD_TIMEOUT, logger)
+
+        problems = check_coverage(group, freqtrade_path, session_start, logger)
+        if problems:
+            logger.error(f"Data for {group.label} does not cover the session window, "
+                         f"skipping {len(group.configs)} config(s): {'; '.join(problems[:5])}")
+            continue
+
+        logger.info(f"Data ready for {group.label} ({len(group.configs)} config(s))")
+        if group.data_end:
+            # Runs over newer candles must not be served from a cache entry made on older ones
+            _pin_data_end(group, group.data_end)
+        ready.extend(group.configs)
+
+    # Keep CSV order for the configs that passed
+    ready_ids = {id(config) for config in ready}
+    return [config for config in configs if id(config) in ready_ids]
@@ -0,0 +1,39 @@
+"""
+Opt-in early stopping.
+A run is stopped cleanly once its best loss has not improved for `patience`
+epochs, and a repeat-run series skips its remaining runs once the best losses
+of the finished runs agree within `series_tolerance`.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from utils.progress import RunProgress
+
+@dataclass
+class EarlyStopPolicy:
+    patience: Optional[int] = None  # epochs without a new best before a run is stopped
+    min_epochs: int = 0  # never stop a run before this epoch
+    series_tolerance: Optional[float] = None  # allowed spread of best loss across runs, relative to the best
+    series_min_runs: int = 3  # finished runs needed before a series may converge
+
+    def should_stop_run(self, progress: RunProgress) -> bool:
+        if not self.patience or progress.best_epoch is None:
+            return False
+        if progress.current_epoch < self.min_epochs:
+            return False
+        return progress.current_epoch - progress.best_epoch >= self.patience
+
+    def series_converged(self, best_losses: List[float]) -> bool:
+        if self.series_tolerance is None or len(best_losses) < max(2, self.series_min_runs):
+            return False
+        best = min(best_losses)
+        spread = max(best_losses) - best
+        return spread <= self.series_tolerance * max(abs(best), 1e-9)
+
+def result_loss(summary_data: Dict[str, str]) -> Optional[float]:
+    """Best loss of a finished run, as recorded in its summary data"""
+    try:
+        return float(summary_data.get('loss', ''))
+    except ValueError:
+        return None
@@ -3,13 +3,47 @@ import time
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Set, Tuple
 from dataclasses import dataclass
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
 import logging
 import os
 import shutil
 import json
 import csv
+import signal
+import threading
+
+from utils.budget import TimeBudget
+from utils.config_loader import pair_whitelist
+from utils.early_stop import EarlyStopPolicy, result_loss
+from utils.freqtrade_pool import FreqtradePool
+from utils.freqtrade_probe import probe_freqtrade_version, version_tuple
+from utils.ledger import SessionLedger, RUNNING, DONE, FAILED, SKIPPED
+from utils.memory import MemoryGate, run_workload
+from utils.logger import log_context
+from utils.metrics import RunMetrics, SessionMetrics, timed, wait_child
+from utils.output_capture import CAPTURE_FILENAME, OutputCapture
+from utils.processes import (
+    RunInterrupted,
+    release,
+    shutting_down,
+    signal_group,
+    spawn,
+    terminate_group
+)
+from utils.progress import ProgressMonitor, RunProgress, stream_output
+from utils.result_cache import ResultCache, run_fingerprint
+from utils.results_files import RUN_RESULTS_FILENAME, capture_results_file
+from utils.results_store import ResultsStore, SUMMARY_CSV_FILENAME, SUMMARY_FIELDNAMES
+from utils.results_reader import (
+    best_epoch_record,
+    epoch_summary_metrics,
+    find_results_file,
+    read_hyperopt_results
+)
+from utils.show_parser import parse_show_output, summary_fields
 
 """
 Hyperopt Automation Executor v1.7.0
@@ -20,15 +54,57 @@ Changes:
 """
 
 # Constants
+# FREQTRADE_BIN / FREQTRADE_DIR override the install location (e.g. to point the benchmarks at a stub)
 FREQTRADE_PATHS = [
+    os.environ.get("FREQTRADE_BIN"),
     "/home/facepipe/freqtrade/.venv/bin/freqtrade",
     os.path.expanduser("~/.local/bin/freqtrade"),
     "/usr/local/bin/freqtrade",
     shutil.which("freqtrade")
 ]
 HYPEROPT_TIMEOUT = 86400  # 24 hours
+STOP_GRACE_PERIOD = 300  # seconds a stopped hyperopt gets to save its epochs before it is killed
+WAIT_POLL_INTERVAL = 5
+FREQTRADE_DIR = os.environ.get("FREQTRADE_DIR", "/home/facepipe/freqtrade")
+USER_DATA_DIR = Path(FREQTRADE_DIR) / "user_data"
+HYPEROPT_RESULTS_DIR = USER_DATA_DIR / "hyperopt_results"
 MIN_FREQTRADE_VERSION = "2025.6"
 
+# Summary status of a run: partial results of interrupted and timed-out runs are recorded too
+RUN_COMPLETE = "complete"
+RUN_STOPPED_EARLY = "stopped_early"
+RUN_INTERRUPTED = "interrupted"
+RUN_TIMED_OUT = "timeout"
+RUN_CACHED = "cached"
+RUN_OUT_OF_TIME = "out_of_time"  # stopped at the end of its --time-budget slice
+
+# Serialises summary CSV writes when several runs complete concurrently
+_summary_csv_lock = threading.Lock()
+
+@dataclass
+class RunOptions:
+    """Session-wide settings shared by every run"""
+    jobs: Optional[int] = None
+    render_reports: bool = False
+    ledger: Optional[SessionLedger] = None
+    progress_monitor: Optional[ProgressMonitor] = None
+    early_stop: Optional[EarlyStopPolicy] = None
+    results_store: Optional[ResultsStore] = None
+    metrics: Optional[SessionMetrics] = None
+    run_timeout: float = HYPEROPT_TIMEOUT
+    random_state: Optional[int] = None
+    result_cache: Optional[ResultCache] = None
+    force_rerun: bool = False
+    memory_gate: Optional[MemoryGate] = None
+    budget: Optional[TimeBudget] = None
+    pipeline: bool = True  # collect a sequential run's results while the next run's hyperopt is going
+    freqtrade_pool: Optional[FreqtradePool] = None  # runs hyperopt-show on preloaded freqtrade processes
+    capture_output: bool = True  # keep each run's console output in run_N/hyperopt_output.log.gz
+
+    def run_random_state(self, run_num: int) -> Optional[int]:
+        """Seed for one run: repeats of a config stay distinct samples, yet each is reproducible"""
+        return None if self.random_state is None else self.random_state + run_num
+
 @dataclass
 class ExecutionResult:
     config_name: str
@@ -38,6 +114,8 @@ class ExecutionResult:
     config_file: Path
     elapsed_time: float
     summary_data: Dict[str, str]
+    status: str = RUN_COMPLETE
+    results_file: Optional[Path] = None  # the .fthypt file this run saved
 
 def verify_freqtrade_installation(logger: logging.Logger) -> str:
     for path in [p for p in FREQTRADE_PATHS if p]:
@@ -46,22 +124,11 @@ def verify_freqtrade_installation(logger: logging.Logger) -> str:
             continue
             
         try:
-            result = subprocess.run(
-                [path, "--version"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                timeout=10
-            )
-            version_line = next(
-                line for line in result.stdout.split('\n')
-                if line.startswith("Freqtrade Version:")
-            )
-            version = version_line.split()[-1]
+            version = probe_freqtrade_version(path, logger)
             
-            if version >= MIN_FREQTRADE_VERSION:
+            if version_tuple(version) >= version_tuple(MIN_FREQTRADE_VERSION):
                 return path
+            logger.debug(f"Skipping {path}: version {version} is older than {MIN_FREQTRADE_VERSION}")
                 
         except Exception as e:
             logger.debug(f"Path check failed for {path}: {str(e)}")
@@ -73,77 +140,57 @@ def verify_freqtrade_installation(logger: logging.Logger) -> str:
     )
 
 def parse_hyperopt_results(output: str) -> Dict[str, str]:
-    """Extract key metrics from hyperopt-show output"""
-    metrics = {
-        'epoch': '',
-        'total_profit': '',
-        'trade_count': '',
-        'win_ratio': '',
-        'profit_factor': '',
-        'max_drawdown': ''
-    }
+    """Extract the summary CSV metrics from hyperopt-show output"""
+    metrics = dict.fromkeys(['epoch', 'total_profit', 'trade_count', 'win_ratio', 'profit_factor', 'max_drawdown'], '')
+    metrics.update(summary_fields(parse_show_output(output)))
+    return metrics
+
+def render_hyperopt_report(freqtrade_path: str, config: 'HyperoptConfig', cmd_type: str, output_file: Path,
+                           logger: logging.Logger, results_file: Optional[Path] = None,
+                           freqtrade_pool: Optional[FreqtradePool] = None) -> Optional[str]:
+    """Write the text report of `freqtrade hyperopt-show <cmd_type>` and return its stdout"""
+    cmd = [
+        freqtrade_path,
+        "hyperopt-show",
+        cmd_type,
+        "-c", config.config_file,
+        "-c", config.pairs_file
+    ]
+    if results_file:
+        cmd.extend(["--hyperopt-filename", results_file.name])
     
-    lines = output.split('\n')
-    for line in lines:
-        line = line.strip()
+    try:
+        logger.info(f"Running command: {' '.join(cmd)}")
+        if freqtrade_pool:
+            result = freqtrade_pool.run(cmd, timeout=60)
+        else:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                timeout=60
+            )
         
-        # Look for epoch details line (contains trades, wins/draws/losses, profits)
-        if 'trades.' in line and 'Wins/Draws/Losses' in line:
-            parts = line.split()
-            # Extract epoch number (first part before '/')
-            if '*' in parts[0]:
-                epoch_part = parts[0].replace('*', '').strip()
-                if '/' in epoch_part:
-                    metrics['epoch'] = epoch_part.split('/')[0]
-            
-            # Extract trade count
-            for i, part in enumerate(parts):
-                if part.endswith(':') and i + 1 < len(parts) and parts[i + 1] == 'trades.':
-                    metrics['trade_count'] = part.rstrip(':')
-                    break
-            
-            # Extract total profit percentage
-            for i, part in enumerate(parts):
-                if 'profit' in part.lower() and i + 1 < len(parts):
-                    profit_part = parts[i + 1]
-                    if profit_part.startswith('(') and profit_part.endswith('%).'):
-                        metrics['total_profit'] = profit_part.replace('(', '').replace('%).', '')
-                        break
-            
-            # Extract win ratio from wins/draws/losses
-            wins_losses_idx = -1
-            for i, part in enumerate(parts):
-                if 'Wins/Draws/Losses' in part:
-                    wins_losses_idx = i
-                    break
-            
-            if wins_losses_idx > 0:
-                # Look for the pattern like "39/0/37" before "Wins/Draws/Losses"
-                for i in range(wins_losses_idx - 1, max(0, wins_losses_idx - 3), -1):
-                    if '/' in parts[i] and parts[i].count('/') == 2:
-                        wins, draws, losses = parts[i].split('/')
-                        total_trades = int(wins) + int(draws) + int(losses)
-                        if total_trades > 0:
-                            win_ratio = (int(wins) / total_trades) * 100
-                            metrics['win_ratio'] = f"{win_ratio:.1f}%"
-                        break
+        with open(output_file, 'w') as f:
+            f.write(result.stdout)
         
-        # Look for profit factor in SUMMARY METRICS section
-        elif 'Profit factor' in line and '│' in line:
-            parts = line.split('│')
-            if len(parts) >= 3:
-                metrics['profit_factor'] = parts[2].strip()
+        if result.stderr:
+            logger.warning(f"Command stderr for {cmd_type}: {result.stderr}")
+        return result.stdout
         
-        # Look for max drawdown in SUMMARY METRICS section
-        elif ('Max % of account underwater' in line or 'Absolute Drawdown (Account)' in line) and '│' in line:
-            parts = line.split('│')
-            if len(parts) >= 3:
-                metrics['max_drawdown'] = parts[2].strip()
-    
-    return metrics
+    except subprocess.TimeoutExpired:
+        logger.error(f"Timeout generating {output_file.name}")
+    except Exception as e:
+        logger.error(f"Failed to generate {output_file.name}: {str(e)}")
+    return None
 
-def generate_result_files(freqtrade_path: str, output_dir: Path, config: 'HyperoptConfig', run_num: int, logger: logging.Logger) -> Dict[str, str]:
-    """Generate output files for a single run"""
+def generate_result_files(freqtrade_path: str, output_dir: Path, config: 'HyperoptConfig', run_num: int, logger: logging.Logger,
+                          run_started: Optional[float] = None, render_reports: bool = False,
+                          run_metrics: Optional[RunMetrics] = None,
+                          results_file: Optional[Path] = None,
+                          freqtrade_pool: Optional[FreqtradePool] = None) -> Dict[str, str]:
+    """Generate output files for a single run, reading `results_file` (else the newest since run_started)"""
     summary_data = {
         'strategy': config.strategy,
         'run_number': str(run_num),
@@ -152,6 +199,10 @@ def generate_result_files(freqtrade_path: str, output_dir: Path, config: 'Hypero
         'hyperopt_loss': config.hyperopt_loss,
         'config_file': config.config_file,
         'pairs_file': config.pairs_file,
+        'epochs': str(config.epochs),
+        'days_back': str(config.days_back),
+        'pair_count': str(len(pair_whitelist(config.pairs_file))),
+        'spaces': ' '.join(config.spaces),
         'epoch': 'N/A',
         'total_profit': 'N/A',
         'trade_count': 'N/A',
@@ -169,60 +220,58 @@ def generate_result_files(freqtrade_path: str, output_dir: Path, config: 'Hypero
                 'strategy': config.strategy,
                 'hyperopt_loss': config.hyperopt_loss,
                 'epochs': config.epochs,
-                'timerange': f"{(datetime.now() - timedelta(days=config.days_back)).strftime('%Y%m%d')}-",
+                'timerange': config.get_timerange(),
                 'spaces': config.spaces,
                 'run_number': run_num,
                 'config_file': config.config_file,
                 'pairs_file': config.pairs_file
             }, f, indent=4)
 
-        # Generate hyperopt results
-        result_types = [
-            ('--best', 'best'),
-            ('--profitable', 'profitable')
-        ]
+        # Read metrics straight from the .fthypt file written by this run
+        if results_file is None and run_started is not None:
+            results_file = find_results_file(HYPEROPT_RESULTS_DIR, config.strategy, run_started, config.timeframe)
         
-        for cmd_type, name in result_types:
-            output_file = output_dir / f"results_{name}_run{run_num}.txt"
-            cmd = [
-                freqtrade_path,
-                "hyperopt-show",
-                cmd_type,
-                "-c", config.config_file,
-                "-c", config.pairs_file
-            ]
-            
-            try:
-                logger.info(f"Running command: {' '.join(cmd)}")
-                result = subprocess.run(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    timeout=60
-                )
-                
-                with open(output_file, 'w') as f:
-                    f.write(result.stdout)
-                
-                if result.stderr:
-                    logger.warning(f"Command stderr for {name}: {result.stderr}")
+        if results_file:
+            logger.info(f"Reading hyperopt results for run {run_num} from {results_file}")
+            with timed(run_metrics, 'parse'):
+                results = read_hyperopt_results(results_file, logger)
+            if results.best:
+                summary_data.update(epoch_summary_metrics(results.best))
+                with open(output_dir / f"best_epoch_run{run_num}.json", 'w') as f:
+                    json.dump(best_epoch_record(results.best), f, indent=4)
+            logger.info(f"Read {results.total_epochs} epochs ({results.profitable_epochs} profitable) for run {run_num}")
+        else:
+            logger.warning(f"No .fthypt results file found for run {run_num}, falling back to hyperopt-show")
+        
+        # Text reports are only rendered on request, or when they are the only source of metrics;
+        # never while the session is shutting down
+        if (render_reports or results_file is None) and not shutting_down():
+            for cmd_type, name in [('--best', 'best'), ('--profitable', 'profitable')]:
+                with timed(run_metrics, 'reports'):
+                    output = render_hyperopt_report(
+                        freqtrade_path=freqtrade_path,
+                        config=config,
+                        cmd_type=cmd_type,
+                        output_file=output_dir / f"results_{name}_run{run_num}.txt",
+                        logger=logger,
+                        results_file=results_file,
+                        freqtrade_pool=freqtrade_pool
+                    )
                 
-                if cmd_type == '--best' and result.stdout:
-                    logger.info(f"Parsing hyperopt results for run {run_num}")
-                    parsed_metrics = parse_hyperopt_results(result.stdout)
-                    
-                    # Update summary_data with parsed results, keeping defaults for missing values
-                    for key, value in parsed_metrics.items():
-                        if value and value.strip():  # Only update if we got a non-empty value
-                            summary_data[key] = value
+                if cmd_type == '--best' and output:
+                    with timed(run_metrics, 'parse'):
+                        report = parse_show_output(output)
+                    # The whole summary-metrics table (Sharpe, Sortino, CAGR, ...) comes with the same pass
+                    with open(output_dir / f"summary_metrics_run{run_num}.json", 'w') as f:
+                        json.dump(report.as_dict(), f, indent=4)
                     
-                    logger.info(f"Parsed metrics for run {run_num}: {parsed_metrics}")
-                    
-            except subprocess.TimeoutExpired:
-                logger.error(f"Timeout generating {name} results for run {run_num}")
-            except Exception as e:
-                logger.error(f"Failed to generate {name} results for run {run_num}: {str(e)}")
+                    if results_file is None:
+                        parsed_metrics = summary_fields(report)
+                        if not parsed_metrics:
+                            logger.warning(f"hyperopt-show output of run {run_num} was not recognised, "
+                                           f"see {output_dir / f'results_{name}_run{run_num}.txt'}")
+                        summary_data.update(parsed_metrics)
+                        logger.info(f"Parsed metrics for run {run_num}: {parsed_metrics}")
         
         logger.info(f"Final summary data for run {run_num}: {summary_data}")
         return summary_data
@@ -241,40 +290,30 @@ def create_output_directory_structure(base_output_dir: Path, config: 'HyperoptCo
     output_path.mkdir(parents=True, exist_ok=True)
     return output_path
 
+def allocate_run_dir(strategy_dir: Path, run_num: int, claimed: Set[Path]) -> Tuple[int, Path]:
+    """Claim a run_N directory no other task in this session will write to"""
+    while strategy_dir / f"run_{run_num}" in claimed:
+        run_num += 1
+    run_dir = strategy_dir / f"run_{run_num}"
+    claimed.add(run_dir)
+    return run_num, run_dir
+
 def append_to_summary_csv(result: ExecutionResult, base_output_dir: Path, session_timestamp: str):
     """Append a single result to the summary CSV as each run completes"""
-    csv_file = base_output_dir / session_timestamp / "hyperopt_summary.csv"
+    csv_file = base_output_dir / session_timestamp / SUMMARY_CSV_FILENAME
+    csv_file.parent.mkdir(parents=True, exist_ok=True)
     
-    fieldnames = [
-        'config_name',
-        'strategy',
-        'timeframe',
-        'hyperopt_loss',
-        'config_file',
-        'pairs_file',
-        'run_number',
-        'epoch',
-        'total_profit',
-        'trade_count',
-        'win_ratio',
-        'profit_factor',
-        'max_drawdown',
-        'elapsed_time',
-        'output_dir'
-    ]
-    
-    # Create CSV file with header if it doesn't exist
-    if not csv_file.exists():
-        csv_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(csv_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
+    fieldnames = SUMMARY_FIELDNAMES
     
     # Always append results, even if summary_data is incomplete
     try:
-        with open(csv_file, 'a', newline='') as f:
+        with _summary_csv_lock, open(csv_file, 'a', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             
+            # Write the header on first use of the file
+            if f.tell() == 0:
+                writer.writeheader()
+            
             # Ensure all required fields are present
             row = {}
             for field in fieldnames:
@@ -301,10 +340,239 @@ def create_summary_csv(all_results: List[List[ExecutionResult]], output_dir: Pat
     # This function is kept for compatibility but functionality moved to append_to_summary_csv
     pass
 
-def run_hyperopt_series(config, output_dir, logger, session_timestamp: str = None, dry_run=False):
-    """Run a series of hyperopt runs for a configuration"""
+def record_result(result: ExecutionResult, output_dir: Path, session_timestamp: str, logger: logging.Logger,
+                  options: RunOptions, run_metrics: Optional[RunMetrics] = None):
+    """Record a run in the results store and re-export the session's summary CSV from it, or append it to
+    the summary CSV when there is no store"""
+    result.summary_data['status'] = result.status
+    with timed(run_metrics, 'summary_write'):
+        if options.results_store:
+            options.results_store.record(result, session_timestamp)
+            # Rewritten every run, so a session killed outright still leaves a current CSV
+            options.results_store.export_session_csv(session_timestamp,
+                                                     output_dir / session_timestamp / SUMMARY_CSV_FILENAME)
+            logger.info(f"Recorded {result.config_name} run {result.run_number} in the results store")
+        else:
+            append_to_summary_csv(result, output_dir, session_timestamp)
+            logger.info(f"Added {result.config_name} run {result.run_number} results to summary CSV")
+
+def collect_partial_result(config, run_num, run_dir, logger, freqtrade_path: str, start_time: float, status: str,
+                           options: RunOptions, run_metrics: Optional[RunMetrics] = None,
+                           progress: Optional[RunProgress] = None) -> Optional[ExecutionResult]:
+    """Result files of the epochs an interrupted or timed-out run got through; None if it had none"""
+    if progress:
+        results_file = run_results_file(progress, config)
+    else:
+        results_file = find_results_file(HYPEROPT_RESULTS_DIR, config.strategy, start_time, config.timeframe)
+    result = ExecutionResult(
+        config_name=config.name,
+        run_number=run_num,
+        output_file=run_dir / RUN_RESULTS_FILENAME,
+        metrics_dir=run_dir,
+        config_file=Path(config.config_file),
+        elapsed_time=time.time() - start_time,
+        summary_data={},
+        status=status,
+        results_file=results_file
+    )
+    with timed(run_metrics, 'results'):
+        result.output_file = capture_results_file(results_file, run_dir, logger) or result.output_file
+        result.summary_data = generate_result_files(
+            freqtrade_path=freqtrade_path,
+            output_dir=run_dir,
+            config=config,
+            run_num=run_num,
+            logger=logger,
+            run_started=start_time,
+            run_metrics=run_metrics,
+            results_file=results_file,
+            freqtrade_pool=options.freqtrade_pool
+        )
+    if result.summary_data.get('epoch', 'N/A') == 'N/A':
+        return None
+    result.summary_data['status'] = status
+    return result
+
+def record_partial_result(config, run_num, run_dir, output_dir, logger, freqtrade_path: str,
+                          session_timestamp: str, start_time: float, status: str, options: RunOptions,
+                          run_metrics: Optional[RunMetrics] = None, progress: Optional[RunProgress] = None):
+    """Record the epochs an interrupted or timed-out run got through; nothing is recorded if it had none"""
+    result = collect_partial_result(config, run_num, run_dir, logger, freqtrade_path, start_time, status, options,
+                                    run_metrics, progress)
+    if result is None:
+        return
+    record_result(result, output_dir, session_timestamp, logger, options, run_metrics)
+    logger.warning(f"Recorded partial results of {config.name} run {run_num} ({status})")
+
+def reuse_cached_result(config, run_num, run_dir, fingerprint: str, options: RunOptions, logger: logging.Logger,
+                        run_metrics: Optional[RunMetrics] = None) -> Optional[ExecutionResult]:
+    """A run with identical inputs finished before: link its artifacts into run_dir and reuse its metrics"""
+    with timed(run_metrics, 'cache'):
+        entry = options.result_cache.lookup(fingerprint, run_dir, run_num)
+    if entry is None:
+        return None
+    logger.info(f"{config.name} run {run_num}: identical inputs already ran ({entry['source_run_dir']}), "
+                f"reusing its result {fingerprint[:12]}")
+    return ExecutionResult(
+        config_name=config.name,
+        run_number=run_num,
+        output_file=run_dir / RUN_RESULTS_FILENAME,
+        metrics_dir=run_dir,
+        config_file=Path(config.config_file),
+        elapsed_time=entry['elapsed_time'],
+        summary_data=dict(entry['summary_data'], run_number=str(run_num)),
+        status=RUN_CACHED
+    )
+
+class RunStages:
+    """One run split into its hyperopt stage and its collection stage (result files, summary, cache),
+    so collecting a run can overlap the next run's hyperopt"""
+
+    def __init__(self, config, run_num, run_dir, output_dir, logger, freqtrade_path: str,
+                 session_timestamp: str, dry_run=False, options: Optional[RunOptions] = None):
+        self.config = config
+        self.run_num = run_num
+        self.run_dir = run_dir
+        self.output_dir = output_dir
+        self.logger = logger
+        self.freqtrade_path = freqtrade_path
+        self.session_timestamp = session_timestamp
+        self.dry_run = dry_run
+        self.options = options or RunOptions()
+        self.run_metrics: Optional[RunMetrics] = None
+        self.start_time = 0.0
+        self.fingerprint: Optional[str] = None
+        self.result: Optional[ExecutionResult] = None
+        self.progress: Optional[RunProgress] = None
+
+    def _failed(self, error: BaseException):
+        if self.options.ledger:
+            self.options.ledger.mark(self.run_dir, FAILED, self.config.name, error=str(error) or type(error).__name__)
+        if self.options.metrics:
+            self.options.metrics.finish_run(self.run_metrics, FAILED)
+
+    def run_hyperopt(self):
+        """Run the hyperopt child (or link a cached result); returns once the child has exited"""
+        with log_context(run_id_for(self.run_dir)):
+            self._run_hyperopt()
+
+    def collect(self) -> ExecutionResult:
+        """Write the run's result files and record it in the store (or summary CSV) and the cache"""
+        with log_context(run_id_for(self.run_dir)):
+            return self._collect()
+
+    def _run_hyperopt(self):
+        config, run_num, run_dir, options = self.config, self.run_num, self.run_dir, self.options
+        if shutting_down():
+            raise RunInterrupted(f"{config.name} run {run_num} not started, session is shutting down")
+        if options.metrics:
+            # Recorded so later sessions can estimate the memory of similar runs
+            self.run_metrics = options.metrics.start_run(config, run_num, run_id_for(run_dir),
+                                                         workload=run_workload(config, options.jobs).as_dict())
+        self.start_time = time.time()
+        run_dir.mkdir(parents=True, exist_ok=True)
+        if options.ledger:
+            options.ledger.mark(run_dir, RUNNING, config.name)
+        
+        try:
+            if options.result_cache and options.random_state is not None and not self.dry_run:
+                self.fingerprint = run_fingerprint(config, options.run_random_state(run_num), options.jobs,
+                                                   probe_freqtrade_version(self.freqtrade_path, self.logger),
+                                                   USER_DATA_DIR)
+                if self.fingerprint is None:
+                    self.logger.debug(f"{config.name} run {run_num}: end of its candle data unknown, not cached")
+                elif not options.force_rerun:
+                    self.result = reuse_cached_result(config, run_num, run_dir, self.fingerprint, options,
+                                                      self.logger, self.run_metrics)
+                    if self.result:
+                        return
+            
+            if not self.dry_run:
+                self.progress = start_progress(config, run_num, run_dir, options)
+            try:
+                self.result = run_single_hyperopt(
+                    config=config,
+                    run_num=run_num,
+                    output_dir=run_dir,
+                    logger=self.logger,
+                    freqtrade_path=self.freqtrade_path,
+                    dry_run=self.dry_run,
+                    options=options,
+                    run_metrics=self.run_metrics,
+                    progress=self.progress
+                )
+            except (KeyboardInterrupt, RunInterrupted, subprocess.TimeoutExpired) as e:
+                # Keep whatever the run found before it was stopped; the ledger still marks it failed so
+                # a resumed session runs it again
+                status = RUN_TIMED_OUT if isinstance(e, subprocess.TimeoutExpired) else RUN_INTERRUPTED
+                if not self.dry_run:
+                    record_partial_result(config, run_num, run_dir, self.output_dir, self.logger,
+                                          self.freqtrade_path, self.session_timestamp, self.start_time, status,
+                                          options, self.run_metrics, self.progress)
+                raise
+            self.result.elapsed_time = time.time() - self.start_time
+        except (Exception, KeyboardInterrupt) as e:
+            self._failed(e)
+            raise
+
+    def _collect(self) -> ExecutionResult:
+        config, result, options = self.config, self.result, self.options
+        try:
+            if result.status != RUN_CACHED:
+                with timed(self.run_metrics, 'results'):
+                    # The run directory keeps its own link to the epochs, whatever happens to the shared file
+                    result.output_file = (capture_results_file(result.results_file, self.run_dir, self.logger)
+                                          or result.output_file)
+                    result.summary_data = generate_result_files(
+                        freqtrade_path=self.freqtrade_path,
+                        output_dir=self.run_dir,
+                        config=config,
+                        run_num=self.run_num,
+                        logger=self.logger,
+                        run_started=self.start_time,
+                        render_reports=options.render_reports,
+                        run_metrics=self.run_metrics,
+                        results_file=result.results_file,
+                        freqtrade_pool=options.freqtrade_pool
+                    )
+            
+            # Record the run as soon as it completes; the session CSV is exported from the store
+            record_result(result, self.output_dir, self.session_timestamp, self.logger, options, self.run_metrics)
+            
+            if self.fingerprint and result.status == RUN_COMPLETE:
+                with timed(self.run_metrics, 'cache'):
+                    options.result_cache.store(
+                        self.fingerprint, self.run_dir, self.run_num, result.summary_data, result.elapsed_time,
+                        result.output_file, replace=options.force_rerun
+                    )
+        except (Exception, KeyboardInterrupt) as e:
+            self._failed(e)
+            raise
+        
+        if options.ledger:
+            options.ledger.mark(self.run_dir, DONE, config.name)
+        if options.metrics:
+            options.metrics.finish_run(self.run_metrics, DONE)
+        return result
+
+def execute_run(config, run_num, run_dir, output_dir, logger, freqtrade_path: str,
+                session_timestamp: str, dry_run=False, options: Optional[RunOptions] = None) -> ExecutionResult:
+    """Run hyperopt for one run directory, collect its results and record them in the store (or summary CSV)"""
+    stages = RunStages(config, run_num, run_dir, output_dir, logger, freqtrade_path, session_timestamp,
+                       dry_run=dry_run, options=options)
+    stages.run_hyperopt()
+    return stages.collect()
+
+def run_hyperopt_series(config, output_dir, logger, session_timestamp: str = None, dry_run=False,
+                        options: Optional[RunOptions] = None, claimed_run_dirs: Optional[Set[Path]] = None):
+    """Run a series of hyperopt runs for a configuration.
+    Run N's results are collected on a background stage while run N+1's hyperopt is already going"""
+    options = options or RunOptions()
+    ledger = options.ledger
+    early_stop = options.early_stop
     try:
-        freqtrade_path = verify_freqtrade_installation(logger)
+        with options.metrics.session_phase('probe') if options.metrics else nullcontext():
+            freqtrade_path = verify_freqtrade_installation(logger)
         
         # Verify config file exists before proceeding
         config_path = Path(config.config_file)
@@ -323,55 +591,165 @@ def run_hyperopt_series(config, output_dir, logger, session_timestamp: str = Non
     # Create new directory structure
     strategy_dir = create_output_directory_structure(output_dir, config, session_timestamp)
     
+    # Configs sharing timeframe/loss/strategy (e.g. a max_open_trades sweep) get distinct run_N directories
+    claimed_run_dirs = claimed_run_dirs if claimed_run_dirs is not None else set()
+    run_dirs = [allocate_run_dir(strategy_dir, run_num, claimed_run_dirs) for run_num in range(1, config.num_runs + 1)]
+    if ledger:
+        for _, run_dir in run_dirs:
+            ledger.register(run_dir, config.name)
+    
     results = []
-    for run_num in range(1, config.num_runs + 1):
-        try:
-            start_time = time.time()
-            
-            # Create run-specific directory
-            run_dir = strategy_dir / f"run_{run_num}"
-            run_dir.mkdir(exist_ok=True)
-            
-            result = run_single_hyperopt(
-                config=config,
-                run_num=run_num,
-                output_dir=run_dir,
-                logger=logger,
-                freqtrade_path=freqtrade_path,
-                dry_run=dry_run
-            )
-            result.elapsed_time = time.time() - start_time
-            
-            # Generate result files and get summary data
-            result.summary_data = generate_result_files(
-                freqtrade_path=freqtrade_path,
-                output_dir=run_dir,
-                config=config,
-                run_num=run_num,
-                logger=logger
-            )
+    best_losses = []
+    # One collection at a time, in run order; without pipelining each run is collected before the next starts
+    collector = ThreadPoolExecutor(max_workers=1, thread_name_prefix="collector") if options.pipeline else None
+    collecting: List[Tuple[int, Future]] = []
+
+    def keep(result: ExecutionResult):
+        results.append(result)
+        loss = result_loss(result.summary_data)
+        if loss is not None:
+            best_losses.append(loss)
+
+    def drain():
+        """Wait for the queued collections, in run order"""
+        while collecting:
+            run_num, future = collecting.pop(0)
+            try:
+                keep(future.result())
+            except RunInterrupted:
+                raise
+            except Exception as e:
+                logger.error(f"Run {run_num} failed: {str(e)}")
+
+    def collect_after_cooldown(stages: RunStages, cooldown: float) -> ExecutionResult:
+        if cooldown > 0 and not shutting_down():
+            logger.info(f"Collecting run {stages.run_num} after a {cooldown} second cooldown")
+            time.sleep(cooldown)
+            if options.metrics:
+                options.metrics.add_run_phase(run_id_for(stages.run_dir), 'sleep', cooldown)
+        return stages.collect()
+
+    try:
+        for index, (run_num, run_dir) in enumerate(run_dirs):
+            if ledger and ledger.is_done(run_dir):
+                logger.info(f"Skipping run {run_num} of {config.name}: already done in this session")
+                continue
             
-            results.append(result)
+            # Stop repeating once the finished runs agree on the best loss, which needs their collected results
+            if early_stop and early_stop.series_tolerance is not None:
+                drain()
+            if early_stop and early_stop.series_converged(best_losses):
+                logger.info(f"{config.name} converged after {len(best_losses)} runs "
+                            f"(best losses {best_losses}), skipping the remaining {len(run_dirs) - index}")
+                if ledger:
+                    for _, skipped_dir in run_dirs[index:]:
+                        ledger.mark(skipped_dir, SKIPPED, config.name)
+                break
             
-            # Append to summary CSV immediately after each run completes
-            append_to_summary_csv(result, output_dir, session_timestamp)
-            logger.info(f"Added run {run_num} results to summary CSV")
+            sleep_after = config.sleep_between_runs if index < len(run_dirs) - 1 else 0
+            stages = RunStages(config, run_num, run_dir, output_dir, logger, freqtrade_path, session_timestamp,
+                               dry_run=dry_run, options=options)
+            try:
+                stages.run_hyperopt()
+                if collector:
+                    # The cooldown only delays this run's collection; the next hyperopt starts right away
+                    collecting.append((run_num, collector.submit(collect_after_cooldown, stages, sleep_after)))
+                    continue
+                keep(stages.collect())
+            except RunInterrupted:
+                raise
+            except Exception as e:
+                logger.error(f"Run {run_num} failed: {str(e)}")
+                continue
             
             # Sleep between runs if configured
-            if run_num < config.num_runs and config.sleep_between_runs > 0:
-                logger.info(f"Sleeping {config.sleep_between_runs} seconds between runs")
-                time.sleep(config.sleep_between_runs)
-            
-        except Exception as e:
-            logger.error(f"Run {run_num} failed: {str(e)}")
-            continue
+            if sleep_after > 0:
+                logger.info(f"Sleeping {sleep_after} seconds between runs")
+                slept_from = time.time()
+                time.sleep(sleep_after)
+                if options.metrics:
+                    options.metrics.add_run_phase(run_id_for(run_dir), 'sleep', time.time() - slept_from)
+        drain()
+    finally:
+        if collector:
+            # Results of runs whose hyperopt finished are still written, also when the series is cut short
+            collector.shutdown(wait=True)
             
     return results
 
-def run_single_hyperopt(config, run_num, output_dir, logger, freqtrade_path: str, dry_run=False):
+def stop_hyperopt(process: subprocess.Popen, logger: logging.Logger, run_metrics: Optional[RunMetrics] = None):
+    """Interrupt hyperopt like Ctrl-C would, so it saves its epochs and exits, and kill it if it hangs"""
+    signal_group(process, signal.SIGINT)
+    try:
+        wait_child(process, STOP_GRACE_PERIOD, run_metrics)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"Hyperopt did not exit {STOP_GRACE_PERIOD}s after SIGINT, killing it")
+        signal_group(process, signal.SIGKILL)
+        wait_child(process, STOP_GRACE_PERIOD, run_metrics)
+
+def wait_for_hyperopt(process: subprocess.Popen, progress: RunProgress,
+                      early_stop: Optional[EarlyStopPolicy], logger: logging.Logger,
+                      run_metrics: Optional[RunMetrics] = None, timeout: float = HYPEROPT_TIMEOUT,
+                      stop_at: Optional[float] = None) -> Optional[str]:
+    """Wait for the hyperopt child, stopping it cleanly once the early-stop policy fires or stop_at is reached.
+    Returns the status of a run it stopped, None if hyperopt exited by itself"""
+    deadline = time.time() + timeout
+    while True:
+        next_check = min(deadline, stop_at) if stop_at else deadline
+        try:
+            wait_child(process, min(WAIT_POLL_INTERVAL, max(next_check - time.time(), 0.01)), run_metrics)
+            return None
+        except subprocess.TimeoutExpired:
+            pass
+        
+        if run_metrics:
+            run_metrics.sample_tree_rss(process.pid)
+        
+        if time.time() > deadline:
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        
+        if stop_at and time.time() >= stop_at:
+            logger.info(f"{progress.run_id}: time slice used up at epoch {progress.current_epoch}, stopping")
+            stop_hyperopt(process, logger, run_metrics)
+            return RUN_OUT_OF_TIME
+        
+        if early_stop and early_stop.should_stop_run(progress):
+            logger.info(
+                f"{progress.run_id}: no improvement since epoch {progress.best_epoch} "
+                f"(now {progress.current_epoch}), stopping early"
+            )
+            stop_hyperopt(process, logger, run_metrics)
+            return RUN_STOPPED_EARLY
+
+def run_results_file(progress: RunProgress, config) -> Optional[Path]:
+    """The .fthypt file a finished run saved: the one hyperopt named, else the newest written since it started.
+    Resolved as soon as the child exits, before a later run can write a newer one"""
+    if progress.results_file:
+        named = Path(progress.results_file)
+        for path in (named, Path(FREQTRADE_DIR) / named, HYPEROPT_RESULTS_DIR / named.name):
+            if path.is_file():
+                return path
+    return find_results_file(HYPEROPT_RESULTS_DIR, config.strategy, progress.started, config.timeframe)
+
+def run_id_for(run_dir: Path) -> str:
+    """<timeframe>/<hyperopt_loss>/<strategy>/run_N, the id runs are reported under"""
+    return "/".join(Path(run_dir).parts[-4:])
+
+def start_progress(config, run_num, run_dir: Path, options: RunOptions) -> RunProgress:
+    """Progress of a run about to start, registered with the session monitor if there is one.
+    Created by the caller so a stopped run can still find the results file hyperopt named"""
+    run_id = run_id_for(run_dir)
+    if options.progress_monitor:
+        return options.progress_monitor.start_run(run_id, config.name, run_num, config.epochs)
+    return RunProgress(run_id=run_id, config_name=config.name, run_number=run_num, total_epochs=config.epochs)
+
+def run_single_hyperopt(config, run_num, output_dir, logger, freqtrade_path: str, dry_run=False,
+                        options: Optional[RunOptions] = None, run_metrics: Optional[RunMetrics] = None,
+                        progress: Optional[RunProgress] = None):
     """Execute a single hyperopt run"""
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    output_file = output_dir / f"hy_{timestamp}_run{run_num}.json"
+    options = options or RunOptions()
+    # Where the run's epochs end up once they are collected
+    output_file = output_dir / RUN_RESULTS_FILENAME
     
     cmd = [
         freqtrade_path,
@@ -386,11 +764,17 @@ def run_single_hyperopt(config, run_num, output_dir, logger, freqtrade_path: str
     ]
     cmd.extend(config.spaces)
     
-    timerange = f"{(datetime.now() - timedelta(days=config.days_back)).strftime('%Y%m%d')}-"
-    cmd.extend(["--timerange", timerange])
+    cmd.extend(["--timerange", config.get_timerange()])
     
     if config.enable_protections:
         cmd.append("--enable-protections")
+    
+    # Cap hyperopt's parallel workers so concurrent runs stay inside the CPU budget
+    if options.jobs:
+        cmd.extend(["-j", str(options.jobs)])
+    
+    if options.random_state is not None:
+        cmd.extend(["--random-state", str(options.run_random_state(run_num))])
 
     logger.info(f"Starting run {run_num} with command:\n{' '.join(cmd)}")
     
@@ -405,19 +789,63 @@ def run_single_hyperopt(config, run_num, output_dir, logger, freqtrade_path: str
             summary_data={}
         )
     
+    progress_monitor = options.progress_monitor
+    run_id = run_id_for(output_dir)
+    progress = progress or start_progress(config, run_num, output_dir, options)
+    echo = sys.stdout.buffer if progress_monitor is None or progress_monitor.echo_output else None
+    
+    # Rich only redraws its progress bar for a terminal; force it (and a wide console so result
+    # rows are not wrapped) so epochs can be followed through the pipe
+    env = dict(os.environ)
+    env.setdefault("FORCE_COLOR", "1")
+    env.setdefault("COLUMNS", "240")
+    
     try:
-        process = subprocess.Popen(
-            cmd,
-            stdout=sys.stdout,
-            stderr=sys.stderr,
-            cwd="/home/facepipe/freqtrade",
-            bufsize=1,
-            universal_newlines=True
-        )
+        with timed(run_metrics, 'hyperopt'):
+            # Own process group: shutdown and timeouts take down hyperopt's workers with it
+            process = spawn(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=FREQTRADE_DIR,
+                env=env
+            )
+            if options.memory_gate:
+                options.memory_gate.attach(run_id, process.pid)
         
-        process.wait(timeout=HYPEROPT_TIMEOUT)
+            # Consume child output on a separate thread so progress is parsed while the run is live
+            capture = OutputCapture(output_dir / CAPTURE_FILENAME, logger) if options.capture_output else None
+            reader = threading.Thread(
+                target=stream_output,
+                args=(process.stdout, progress, echo, capture),
+                name=f"hyperopt-output-{run_num}",
+                daemon=True
+            )
+            reader.start()
         
-        if process.returncode != 0:
+            try:
+                stopped = wait_for_hyperopt(process, progress, options.early_stop, logger, run_metrics,
+                                            timeout=options.run_timeout,
+                                            stop_at=options.budget.stop_at(run_id) if options.budget else None)
+            finally:
+                try:
+                    if process.returncode is None:
+                        terminate_group(process, logger, run_metrics=run_metrics)
+                finally:
+                    # Workers that outlived hyperopt would keep the output pipe open
+                    signal_group(process, signal.SIGKILL)
+                    release(process)
+                    reader.join()
+                    if capture:
+                        capture.close()
+                    if progress_monitor:
+                        progress_monitor.finish_run(progress)
+                    if options.budget:
+                        options.budget.finish_run(run_id, config, progress)
+        
+        if shutting_down():
+            raise RunInterrupted(f"{config.name} run {run_num} stopped by shutdown")
+        if process.returncode != 0 and not stopped:
             raise subprocess.CalledProcessError(process.returncode, cmd)
             
         return ExecutionResult(
@@ -427,12 +855,13 @@ def run_single_hyperopt(config, run_num, output_dir, logger, freqtrade_path: str
             metrics_dir=output_dir,
             config_file=Path(config.config_file),
             elapsed_time=0,
-            summary_data={}
+            summary_data={},
+            status=stopped or RUN_COMPLETE,
+            results_file=run_results_file(progress, config)
         )
         
     except subprocess.TimeoutExpired:
-        process.kill()
-        logger.error(f"Run timed out after {HYPEROPT_TIMEOUT} seconds")
+        logger.error(f"Run timed out after {options.run_timeout} seconds")
         raise
     except subprocess.CalledProcessError as e:
         logger.error(f"Hyperopt failed (code {e.returncode})")
@@ -0,0 +1,21 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+def atomic_write_json(path: Path, data: Any, **dump_kwargs):
+    """Write JSON to a temp file in the same directory and rename it over path, so readers never see a partial file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
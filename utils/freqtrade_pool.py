@@ -0,0 +1,161 @@
+"""
+Preloaded freqtrade process pool.
+Short freqtrade commands (hyperopt-show reports) spend most of their time
+starting an interpreter and importing freqtrade, pandas, numpy and talib.
+With --freqtrade-pool the automation keeps a few long-lived server processes
+(utils/freqtrade_server.py) running under freqtrade's interpreter with those
+imports done. Each command runs in a fresh fork of a server, so commands stay
+isolated, and a server is replaced after `max_tasks` commands to bound its
+memory. Anything the pool cannot serve falls back to a plain subprocess.
+"""
+
+import json
+import logging
+import queue
+import select
+import shlex
+import shutil
+import signal
+import subprocess
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+from utils.processes import RunInterrupted, release, signal_group, spawn
+
+SERVER_SCRIPT = Path(__file__).with_name("freqtrade_server.py")
+DEFAULT_POOL_MAX_TASKS = 100  # commands a server runs before it is replaced
+SERVER_START_TIMEOUT = 120  # seconds a server may take to import freqtrade
+REPLY_GRACE_PERIOD = 30  # seconds beyond a command's own timeout before its server counts as hung
+
+def freqtrade_interpreter(freqtrade_path: str) -> Optional[str]:
+    """The Python that runs a freqtrade entry point script, from its shebang; None if it is not a script"""
+    try:
+        with open(freqtrade_path, 'rb') as f:
+            first_line = f.readline(512).decode('utf-8', errors='replace').strip()
+    except OSError:
+        return None
+    if not first_line.startswith('#!'):
+        return None
+    parts = shlex.split(first_line[2:])
+    if not parts:
+        return None
+    if Path(parts[0]).name == 'env' and len(parts) > 1:
+        return shutil.which(parts[-1])
+    return parts[0]
+
+class _Server:
+    """One preloaded server process, used by one command at a time"""
+
+    def __init__(self, interpreter: str, freqtrade_path: str):
+        self.process = spawn(
+            [interpreter, str(SERVER_SCRIPT), freqtrade_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        self.tasks = 0
+        try:
+            self.ready = self._reply(SERVER_START_TIMEOUT)
+        except (OSError, ValueError):
+            self.close()
+            raise
+
+    def _reply(self, timeout: float) -> dict:
+        readable, _, _ = select.select([self.process.stdout], [], [], timeout)
+        line = self.process.stdout.readline() if readable else ''
+        if not line:
+            raise OSError(f"freqtrade server {self.process.pid} did not answer")
+        return json.loads(line)
+
+    def run(self, args: List[str], cwd: Optional[str], timeout: Optional[float]) -> dict:
+        self.tasks += 1
+        self.process.stdin.write(json.dumps({'args': args, 'cwd': cwd, 'timeout': timeout}) + "\n")
+        self.process.stdin.flush()
+        reply = self._reply((timeout or SERVER_START_TIMEOUT) + REPLY_GRACE_PERIOD)
+        if 'error' in reply:
+            raise OSError(reply['error'])
+        return reply
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            signal_group(self.process, signal.SIGKILL)
+            self.process.wait()
+        finally:
+            release(self.process)
+
+class FreqtradePool:
+    """Runs freqtrade commands on preloaded server processes, at most `size` at a time"""
+
+    def __init__(self, freqtrade_path: str, logger: logging.Logger, size: int = 1,
+                 max_tasks: int = DEFAULT_POOL_MAX_TASKS):
+        self.freqtrade_path = freqtrade_path
+        self.logger = logger
+        self.max_tasks = max(1, max_tasks)
+        self.interpreter = freqtrade_interpreter(freqtrade_path)
+        if not self.interpreter:
+            logger.warning(f"{freqtrade_path} is not a Python entry point script; freqtrade commands run as "
+                           f"plain subprocesses")
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._idle: "queue.LifoQueue[_Server]" = queue.LifoQueue()
+        self._servers: List[_Server] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _checkout(self) -> _Server:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        server = _Server(self.interpreter, self.freqtrade_path)
+        with self._lock:
+            self._servers.append(server)
+        self.logger.info(f"Started preloaded freqtrade server {server.process.pid} "
+                         f"({server.ready['seconds']:.1f}s, preloaded {', '.join(server.ready['preloaded']) or 'nothing'})")
+        return server
+
+    def _discard(self, server: _Server):
+        with self._lock:
+            if server in self._servers:
+                self._servers.remove(server)
+        server.close()
+
+    def run(self, cmd: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Like subprocess.run(cmd, stdout=PIPE, stderr=PIPE, text=True, timeout=timeout)"""
+        if not self.interpreter or self._closed or cmd[0] != self.freqtrade_path:
+            return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
+
+        with self._slots:
+            server = None
+            try:
+                server = self._checkout()
+                reply = server.run(cmd[1:], str(Path.cwd()), timeout)
+            except RunInterrupted:
+                raise
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"Preloaded freqtrade server failed ({str(e)}), running {cmd[1]} as a subprocess")
+                if server:
+                    self._discard(server)
+                return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                      timeout=timeout)
+
+            if server.tasks >= self.max_tasks:
+                # Recycled so whatever the server process accumulated is given back
+                self.logger.debug(f"Replacing freqtrade server {server.process.pid} after {server.tasks} commands")
+                self._discard(server)
+            else:
+                self._idle.put(server)
+
+        if reply['timed_out']:
+            raise subprocess.TimeoutExpired(cmd, timeout, output=reply['stdout'], stderr=reply['stderr'])
+        return subprocess.CompletedProcess(cmd, reply['returncode'], reply['stdout'], reply['stderr'])
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            servers, self._servers = self._servers, []
+        for server in servers:
+            server.close()
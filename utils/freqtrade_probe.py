@@ -0,0 +1,85 @@
+"""
+Cached freqtrade version probing.
+`freqtrade --version` costs several seconds of interpreter and import
+startup, so each binary is probed at most once: results are memoised per
+process and persisted on disk keyed by binary path, mtime and size, which
+lets every worker process reuse them until freqtrade is reinstalled.
+"""
+
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+from utils.fileio import atomic_write_json
+
+PROBE_CACHE_FILE = Path.home() / ".cache" / "hyperopt-automation" / "freqtrade_probe.json"
+
+_probe_lock = threading.Lock()
+_probe_memo: Dict[Tuple[str, int, int], str] = {}
+
+def version_tuple(version: str) -> Tuple[int, ...]:
+    """Turn '2025.6', '2025.10' or '2025.6-dev-1a2b3c' into a comparable tuple of ints"""
+    match = re.match(r"\d+(?:\.\d+)*", version.strip())
+    if not match:
+        raise ValueError(f"Unrecognised freqtrade version: {version}")
+    return tuple(int(part) for part in match.group(0).split('.'))
+
+def _fingerprint(path: str) -> Tuple[str, int, int]:
+    real_path = os.path.realpath(path)
+    stat = os.stat(real_path)
+    return real_path, stat.st_mtime_ns, stat.st_size
+
+def _load_disk_cache() -> Dict[str, Dict]:
+    try:
+        with open(PROBE_CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_disk_cache(cache: Dict[str, Dict]):
+    atomic_write_json(PROBE_CACHE_FILE, cache, indent=2, sort_keys=True)
+
+def _run_version_probe(path: str) -> str:
+    result = subprocess.run(
+        [path, "--version"],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=10
+    )
+    version_line = next(
+        line for line in result.stdout.split('\n')
+        if line.startswith("Freqtrade Version:")
+    )
+    return version_line.split()[-1]
+
+def probe_freqtrade_version(path: str, logger: logging.Logger) -> str:
+    """Return the freqtrade version of a binary, running `--version` only on a cache miss"""
+    key = _fingerprint(path)
+
+    with _probe_lock:
+        if key in _probe_memo:
+            return _probe_memo[key]
+
+        disk_cache = _load_disk_cache()
+        entry = disk_cache.get(key[0])
+        if entry and entry.get('mtime_ns') == key[1] and entry.get('size') == key[2]:
+            logger.debug(f"Using cached freqtrade version for {path}: {entry['version']}")
+            _probe_memo[key] = entry['version']
+            return entry['version']
+
+        version = _run_version_probe(path)
+        _probe_memo[key] = version
+
+        disk_cache[key[0]] = {'mtime_ns': key[1], 'size': key[2], 'version': version}
+        try:
+            _save_disk_cache(disk_cache)
+        except OSError as e:
+            logger.debug(f"Could not persist freqtrade probe cache: {str(e)}")
+        return version
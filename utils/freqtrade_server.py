@@ -0,0 +1,129 @@
+"""
+Preloaded freqtrade command server.
+Started by utils.freqtrade_pool under freqtrade's own interpreter, so it only
+uses the standard library. It imports freqtrade and its heavy dependencies
+once, then reads one JSON request per line on stdin. Every command runs in a
+child forked from the preloaded process, which keeps commands isolated from
+each other while skipping interpreter and import startup. One JSON reply per
+line goes to stdout.
+"""
+
+import importlib
+import json
+import os
+import runpy
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+# Imported before the first command; whatever is missing is skipped
+PRELOAD_MODULES = (
+    "numpy",
+    "pandas",
+    "talib",
+    "freqtrade.main",
+    "freqtrade.commands",
+    "freqtrade.commands.hyperopt_commands",
+    "freqtrade.optimize.hyperopt_tools",
+    "freqtrade.optimize.optimize_reports",
+)
+WAIT_POLL_INTERVAL = 0.02
+
+def preload():
+    loaded = []
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except Exception:
+            continue
+    return loaded
+
+def _run_child(binary, args, cwd, stdout_fd, stderr_fd):
+    """In the forked child: run the freqtrade entry point script as if it had been executed"""
+    code = 1
+    try:
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        if cwd:
+            os.chdir(cwd)
+        sys.argv = [binary, *args]
+        runpy.run_path(binary, run_name="__main__")
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+def _exit_code(status):
+    # os.waitstatus_to_exitcode is 3.9+
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+def _read(handle):
+    handle.seek(0)
+    return handle.read().decode('utf-8', errors='replace')
+
+def run_command(binary, request):
+    timeout = request.get('timeout')
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            _run_child(binary, request['args'], request.get('cwd'), stdout.fileno(), stderr.fileno())
+
+        deadline = time.monotonic() + timeout if timeout else None
+        timed_out = False
+        while True:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            if deadline and time.monotonic() > deadline:
+                os.kill(pid, signal.SIGKILL)
+                _, status = os.waitpid(pid, 0)
+                timed_out = True
+                break
+            time.sleep(WAIT_POLL_INTERVAL)
+
+        return {
+            'returncode': _exit_code(status),
+            'stdout': _read(stdout),
+            'stderr': _read(stderr),
+            'timed_out': timed_out
+        }
+
+def main():
+    binary = sys.argv[1]
+    # Replies get their own descriptor; anything else writing to stdout must not corrupt them
+    replies = os.fdopen(os.dup(1), 'w')
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    started = time.monotonic()
+    loaded = preload()
+    replies.write(json.dumps({'ready': True, 'preloaded': loaded, 'seconds': time.monotonic() - started}) + "\n")
+    replies.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            reply = run_command(binary, json.loads(line))
+        except Exception as e:
+            reply = {'error': f"{type(e).__name__}: {e}"}
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Crash-safe per-session run ledger.
+Records the state of every run (pending, running, done, failed, skipped) in
+outputs/<session>/run_ledger.json, next to hyperopt_summary.csv, so an
+interrupted session can be resumed without recomputing finished runs.
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from utils.fileio import atomic_write_json
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"  # not needed, e.g. the series converged before this run
+
+LEDGER_FILENAME = "run_ledger.json"
+
+class SessionLedger:
+    def __init__(self, session_dir: Path):
+        self.session_dir = Path(session_dir)
+        self.path = self.session_dir / LEDGER_FILENAME
+        self._lock = threading.Lock()
+        self._runs: Dict[str, Dict] = {}
+
+        if self.path.exists():
+            with open(self.path) as f:
+                self._runs = json.load(f).get('runs', {})
+
+    def key_for(self, run_dir: Path) -> str:
+        """Runs are keyed by their directory relative to the session, e.g. 5m/<loss>/<strategy>/run_1"""
+        return Path(run_dir).relative_to(self.session_dir).as_posix()
+
+    def state(self, run_dir: Path) -> Optional[str]:
+        entry = self._runs.get(self.key_for(run_dir))
+        return entry['state'] if entry else None
+
+    def is_done(self, run_dir: Path) -> bool:
+        return self.state(run_dir) in (DONE, SKIPPED)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0, SKIPPED: 0}
+        for entry in self._runs.values():
+            counts[entry['state']] = counts.get(entry['state'], 0) + 1
+        return counts
+
+    def register(self, run_dir: Path, config_name: str):
+        """Record a planned run as pending unless the ledger already knows it"""
+        with self._lock:
+            key = self.key_for(run_dir)
+            if key not in self._runs:
+                self._runs[key] = self._entry(PENDING, config_name)
+                self._save()
+
+    def mark(self, run_dir: Path, state: str, config_name: str, error: Optional[str] = None):
+        with self._lock:
+            key = self.key_for(run_dir)
+            previous = self._runs.get(key, {})
+            entry = self._entry(state, config_name)
+            entry['attempts'] = previous.get('attempts', 0) + (1 if state == RUNNING else 0)
+            if error:
+                entry['error'] = error
+            self._runs[key] = entry
+            self._save()
+
+    def _entry(self, state: str, config_name: str) -> Dict:
+        return {
+            'state': state,
+            'config_name': config_name,
+            'attempts': 0,
+            'updated': datetime.now().isoformat(timespec='seconds')
+        }
+
+    def _save(self):
+        atomic_write_json(self.path, {'runs': self._runs}, indent=2, sort_keys=True)
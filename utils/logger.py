@@ -1,22 +1,110 @@
+"""
+Non-blocking logging.
+Log calls only put the record on a bounded queue; a QueueListener thread
+writes it to the console, the text log and a JSON-lines log next to it, so a
+slow disk never stalls a run thread. Records logged inside log_context carry
+the run id, which keeps the lines of parallel runs apart in the JSON log.
+When the queue is full, records are dropped and counted rather than waited on.
+"""
+
+import atexit
+import contextvars
+import json
 import logging
+import queue
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Optional
+
+LOG_QUEUE_SIZE = 10000  # records waiting to be written before new ones are dropped
+
+_run_id: "contextvars.ContextVar[Optional[str]]" = contextvars.ContextVar("run_id", default=None)
+_listener: Optional[QueueListener] = None
+
+@contextmanager
+def log_context(run_id: str):
+    """Tag every record logged by this thread with run_id until the block exits"""
+    token = _run_id.set(run_id)
+    try:
+        yield
+    finally:
+        _run_id.reset(token)
+
+class _RunIdFilter(logging.Filter):
+    # Runs in the calling thread, before the record is queued
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = _run_id.get()
+        return True
+
+class _DroppingQueueHandler(QueueHandler):
+    """Never blocks: a record that does not fit in the queue is counted and dropped"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'run_id': getattr(record, 'run_id', None),
+            'message': record.getMessage()
+        }
+        return json.dumps(entry)
+
+def stop_logging():
+    """Write out the queued records and stop the listener thread"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
 
 def setup_logging(log_file: Path) -> logging.Logger:
+    """Log to the console, log_file and its .jsonl sibling through a background listener"""
+    stop_logging()
     logger = logging.getLogger("hyperopt_automation")
     logger.setLevel(logging.INFO)
     logger.handlers = []
-    
+
     formatter = logging.Formatter(
         '[%(asctime)s] %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    
+
     file_handler = logging.FileHandler(log_file)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
+
+    json_handler = logging.FileHandler(Path(log_file).with_suffix('.jsonl'))
+    json_handler.setFormatter(JsonLinesFormatter())
+
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    return logger
\ No newline at end of file
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(_RunIdFilter())
+    logger.addHandler(queue_handler)
+
+    global _listener
+    _listener = QueueListener(log_queue, file_handler, json_handler, console_handler)
+    _listener.start()
+
+    return logger
+
+def dropped_records(logger: logging.Logger) -> int:
+    return sum(getattr(handler, 'dropped', 0) for handler in logger.handlers)
+
+atexit.register(stop_logging)
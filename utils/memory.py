@@ -0,0 +1,244 @@
+"""
+Memory admission control.
+A hyperopt run's footprint grows with its pairs, timeframe granularity and
+days_back, and with -j since every worker holds the candles too. Each run's
+workload is recorded in metrics.json next to its peak tree RSS; a pending run
+is estimated from the closest past runs and only admitted while the projected
+usage of everything running stays under the memory ceiling and the host still
+has room for it. Heavier runs wait in the queue until memory frees up.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.config_loader import HyperoptConfig, pair_whitelist
+from utils.metrics import METRICS_FILENAME, process_tree_rss
+
+DEFAULT_RUN_MEMORY_MB = 2048  # assumed footprint of a run nothing similar has been measured for
+BASE_RUN_MEMORY_MB = 300  # interpreter and freqtrade imports, independent of the candles loaded
+ESTIMATE_HEADROOM = 1.2  # RSS is sampled, so the peak between two samples is missed
+HOST_RESERVE_BYTES = 512 * 1024 ** 2  # left free for the OS and the automation itself
+USAGE_SAMPLE_TTL = 1.0  # seconds a /proc sample of the running runs is reused for admission checks
+
+_TIMEFRAME = re.compile(r"^(?P<count>\d+)(?P<unit>[smhdwM])$")
+_TIMEFRAME_MINUTES = {'s': 1 / 60, 'm': 1, 'h': 60, 'd': 1440, 'w': 10080, 'M': 43200}
+_MEMORY_SIZE = re.compile(r"^(?P<number>\d+(?:\.\d+)?)\s*(?P<unit>[KMGT]?)i?B?$", re.IGNORECASE)
+_MEMORY_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+def meminfo() -> Dict[str, int]:
+    """/proc/meminfo in bytes; empty where /proc is unavailable"""
+    values = {}
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                parts = rest.split()
+                if parts:
+                    values[name] = int(parts[0]) * (1024 if parts[1:] == ['kB'] else 1)
+    except (OSError, ValueError):
+        return {}
+    return values
+
+def parse_memory_size(text: str) -> int:
+    """'48G', '16000M', '512MiB' in bytes, or '80%' of the host's memory"""
+    text = text.strip()
+    if text.endswith('%'):
+        total = meminfo().get('MemTotal')
+        if not total:
+            raise ValueError(f"cannot resolve {text}: total memory unknown")
+        return int(total * float(text[:-1]) / 100)
+    match = _MEMORY_SIZE.match(text)
+    if not match:
+        raise ValueError(f"invalid memory size: {text}")
+    return int(float(match['number']) * _MEMORY_UNITS[match['unit'].upper()])
+
+def timeframe_minutes(timeframe: str) -> float:
+    match = _TIMEFRAME.match(timeframe.strip())
+    if not match:
+        raise ValueError(f"invalid timeframe: {timeframe}")
+    return int(match['count']) * _TIMEFRAME_MINUTES[match['unit']]
+
+def candle_count(pair_count: int, days_back: int, timeframe: str) -> int:
+    """Candles of all pairs over days_back days"""
+    try:
+        candles_per_day = 1440 / timeframe_minutes(timeframe)
+    except ValueError:
+        candles_per_day = 1440
+    return int(max(pair_count, 1) * days_back * candles_per_day)
+
+@lru_cache(maxsize=None)
+def _pair_count(pairs_file: str) -> int:
+    # A regex entry may match many pairs; it is counted once
+    return max(1, len(pair_whitelist(pairs_file)))
+
+@dataclass(frozen=True)
+class Workload:
+    """What a run's memory footprint depends on"""
+    strategy: str
+    timeframe: str
+    pairs_file: str
+    days_back: int
+    jobs: int
+    candles: int
+
+    @property
+    def units(self) -> int:
+        """Candles held in memory: once by hyperopt and once by each of its workers"""
+        return max(1, self.candles * (self.jobs + 1))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+def run_workload(config: HyperoptConfig, jobs: Optional[int]) -> Workload:
+    return Workload(
+        strategy=config.strategy,
+        timeframe=config.timeframe,
+        pairs_file=config.pairs_file,
+        days_back=config.days_back,
+        # hyperopt runs one worker per core without -j
+        jobs=jobs or os.cpu_count() or 1,
+        candles=candle_count(_pair_count(config.pairs_file), config.days_back, config.timeframe)
+    )
+
+class MemoryEstimator:
+    """Peak memory of past runs by workload, used to estimate runs that have not started yet"""
+
+    def __init__(self):
+        self._records: List[Tuple[Workload, float]] = []
+        self._lock = threading.Lock()
+        self._estimates: Dict[Workload, float] = {}
+
+    @classmethod
+    def from_history(cls, output_dir: Path, logger: logging.Logger) -> 'MemoryEstimator':
+        """Load the runs measured in every session's (and every worker's) metrics.json"""
+        estimator = cls()
+        output_dir = Path(output_dir)
+        for path in [*output_dir.glob(f"*/{METRICS_FILENAME}"), *output_dir.glob(f"workers/*/{METRICS_FILENAME}")]:
+            try:
+                with open(path) as f:
+                    runs = json.load(f).get('runs', [])
+            except (OSError, ValueError):
+                continue
+            for run in runs:
+                estimator.observe(run)
+        logger.info(f"Memory estimates based on {len(estimator._records)} measured run(s)")
+        return estimator
+
+    def observe(self, run: Optional[Dict[str, Any]]):
+        """Add a run record from metrics.json; runs without a workload or a measured peak are ignored"""
+        if not run or not run.get('workload'):
+            return
+        # Runs that failed (e.g. were OOM-killed) still tell how much they needed
+        peak_mb = run.get('child_tree_rss_mb') or run.get('child_max_rss_mb')
+        if not peak_mb:
+            return
+        try:
+            workload = Workload(**run['workload'])
+        except TypeError:
+            return
+        with self._lock:
+            self._records.append((workload, float(peak_mb)))
+            self._estimates.clear()
+
+    def estimate_mb(self, workload: Workload) -> float:
+        with self._lock:
+            if workload not in self._estimates:
+                self._estimates[workload] = self._estimate(workload) * ESTIMATE_HEADROOM
+            return self._estimates[workload]
+
+    def _estimate(self, workload: Workload) -> float:
+        exact = [peak for measured, peak in self._records if measured == workload]
+        if exact:
+            return max(exact)
+
+        # Scale the closest measured workload of the same strategy (and timeframe, if there is one)
+        for same in (lambda w: w.strategy == workload.strategy and w.timeframe == workload.timeframe,
+                     lambda w: w.strategy == workload.strategy,
+                     lambda w: True):
+            similar = [(measured, peak) for measured, peak in self._records if same(measured)]
+            if similar:
+                measured, peak = min(similar, key=lambda record: abs(math.log(workload.units / record[0].units)))
+                base = min(BASE_RUN_MEMORY_MB, peak)
+                return base + (peak - base) * workload.units / measured.units
+        return DEFAULT_RUN_MEMORY_MB
+
+class MemoryGate:
+    """Admits runs while the projected memory use of all running runs stays under the ceiling"""
+
+    def __init__(self, ceiling_bytes: int, estimator: MemoryEstimator, logger: logging.Logger,
+                 host_reserve_bytes: int = HOST_RESERVE_BYTES):
+        self.ceiling_bytes = ceiling_bytes
+        self.estimator = estimator
+        self.logger = logger
+        self.host_reserve_bytes = host_reserve_bytes
+        self._lock = threading.Lock()
+        self._runs: Dict[str, List] = {}  # run id -> [estimated bytes, pid]
+        self._usage: Optional[Tuple[float, int, int]] = None  # (sampled at, reserved bytes, growth bytes)
+
+    def estimate_bytes(self, workload: Workload) -> int:
+        return int(self.estimator.estimate_mb(workload) * 1024 * 1024)
+
+    def _sample_usage(self) -> Tuple[int, int]:
+        """(bytes reserved by running runs, bytes they may still grow by) from their estimates and live RSS"""
+        with self._lock:
+            if self._usage and time.monotonic() - self._usage[0] < USAGE_SAMPLE_TTL:
+                return self._usage[1], self._usage[2]
+            runs = [list(run) for run in self._runs.values()]
+        reserved = growth = 0
+        for estimate, pid in runs:
+            rss = (process_tree_rss(pid) or 0) if pid else 0
+            reserved += max(estimate, rss)
+            growth += max(estimate - rss, 0)
+        with self._lock:
+            self._usage = (time.monotonic(), reserved, growth)
+        return reserved, growth
+
+    def defer_reason(self, workload: Workload) -> Optional[str]:
+        """Why a run with this workload cannot start now, or None if it fits"""
+        with self._lock:
+            running = len(self._runs)
+        if not running:
+            # Something must run, or the queue would stall on a run larger than the ceiling
+            return None
+        estimate = self.estimate_bytes(workload)
+        reserved, growth = self._sample_usage()
+        if reserved + estimate > self.ceiling_bytes:
+            return (f"needs ~{_gb(estimate)}, {_gb(reserved)} of the {_gb(self.ceiling_bytes)} ceiling "
+                    f"is held by {running} running run(s)")
+        available = meminfo().get('MemAvailable')
+        if available is not None and available - growth - estimate < self.host_reserve_bytes:
+            return f"needs ~{_gb(estimate)}, host has {_gb(available)} available of which {_gb(growth)} is spoken for"
+        return None
+
+    def admit(self, run_id: str, workload: Workload):
+        estimate = self.estimate_bytes(workload)
+        if estimate > self.ceiling_bytes:
+            self.logger.warning(f"{run_id} is estimated at {_gb(estimate)}, above the memory ceiling; "
+                                f"running it alone")
+        with self._lock:
+            self._runs[run_id] = [estimate, None]
+            self._usage = None
+
+    def attach(self, run_id: str, pid: int):
+        """Measure an admitted run by the RSS of its process tree from now on"""
+        with self._lock:
+            if run_id in self._runs:
+                self._runs[run_id][1] = pid
+                self._usage = None
+
+    def release(self, run_id: str):
+        with self._lock:
+            self._runs.pop(run_id, None)
+            self._usage = None
+
+def _gb(size: float) -> str:
+    return f"{size / 1024 ** 3:.1f} GB"
@@ -0,0 +1,302 @@
+"""
+Per-phase timing metrics.
+Each run records exclusive wall time per phase (hyperopt child, result files,
+parsing, reports, summary write, sleep) plus the child's CPU time and peak
+RSS. The session aggregates them per strategy/timeframe/loss into
+outputs/<session>/metrics.json and, optionally, a Prometheus textfile for the
+node exporter's textfile collector.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.fileio import atomic_write_json
+
+METRICS_FILENAME = "metrics.json"
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+@dataclass
+class RunMetrics:
+    run_id: str
+    config_name: str
+    strategy: str
+    timeframe: str
+    hyperopt_loss: str
+    run_number: int
+    phases: Dict[str, float] = field(default_factory=dict)
+    child_cpu_seconds: Optional[float] = None
+    child_max_rss_mb: Optional[float] = None  # largest single process of the hyperopt tree (wait4)
+    child_tree_rss_mb: Optional[float] = None  # largest sampled sum over the whole tree (/proc)
+    status: str = "running"
+    workload: Optional[Dict[str, Any]] = None  # what the run's memory footprint depends on (utils.memory)
+    _stack: List[List] = field(default_factory=list, repr=False)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block; nested phases are subtracted so phase times never overlap"""
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            self.add(name, elapsed - frame[2])
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def record_child_usage(self, usage):
+        self.child_cpu_seconds = usage.ru_utime + usage.ru_stime
+        # ru_maxrss is in KiB on Linux
+        self.child_max_rss_mb = usage.ru_maxrss / 1024
+
+    def sample_tree_rss(self, pid: int):
+        rss = process_tree_rss(pid)
+        if rss is not None:
+            rss_mb = rss / 1024 / 1024
+            self.child_tree_rss_mb = max(self.child_tree_rss_mb or 0.0, rss_mb)
+
+    def as_dict(self) -> Dict:
+        return {
+            'run_id': self.run_id,
+            'config_name': self.config_name,
+            'strategy': self.strategy,
+            'timeframe': self.timeframe,
+            'hyperopt_loss': self.hyperopt_loss,
+            'run_number': self.run_number,
+            'status': self.status,
+            'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            'child_cpu_seconds': _rounded(self.child_cpu_seconds),
+            'child_max_rss_mb': _rounded(self.child_max_rss_mb),
+            'child_tree_rss_mb': _rounded(self.child_tree_rss_mb),
+            'workload': self.workload
+        }
+
+def timed(run_metrics: Optional[RunMetrics], name: str):
+    """run_metrics.phase(name), or a no-op when the run is not being measured"""
+    return run_metrics.phase(name) if run_metrics else nullcontext()
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """Resident bytes of a process and all its descendants, from /proc; None where /proc is unavailable"""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    children: Dict[int, List[int]] = {}
+    for stat_file in proc.glob("[0-9]*/stat"):
+        try:
+            # The command name may contain spaces, so split after its closing parenthesis
+            fields = stat_file.read_text().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        children.setdefault(int(fields[1]), []).append(int(stat_file.parent.name))
+
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            total += int((proc / str(current) / "statm").read_text().split()[1]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            continue
+        pending.extend(children.get(current, []))
+    return total
+
+def exit_code(status: int) -> int:
+    """os.waitstatus_to_exitcode for Python 3.8: the exit code, or -signal for a killed child"""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+def wait_child(process: subprocess.Popen, timeout: float, run_metrics: Optional[RunMetrics] = None) -> int:
+    """process.wait(timeout) that reaps the child with wait4, so its CPU time and peak RSS are kept"""
+    deadline = time.monotonic() + timeout
+    delay = 0.0005
+    while process.returncode is None:
+        try:
+            pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+        except ChildProcessError:
+            # Reaped elsewhere; Popen still knows the exit code
+            return process.wait()
+        if pid:
+            process.returncode = exit_code(status)
+            if run_metrics:
+                run_metrics.record_child_usage(usage)
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        # Short poll cap: an exited child is noticed within 10ms at negligible CPU cost
+        delay = min(delay * 2, remaining, 0.01)
+        time.sleep(delay)
+    return process.returncode
+
+class SessionMetrics:
+    """Collects RunMetrics of a session and writes metrics.json (and a Prometheus textfile)"""
+
+    def __init__(self, session_dir: Path, session: str, logger: logging.Logger,
+                 prometheus_file: Optional[Path] = None):
+        self.path = Path(session_dir) / METRICS_FILENAME
+        self.session = session
+        self.logger = logger
+        self.prometheus_file = prometheus_file
+        self._lock = threading.Lock()
+        self._session_phases: Dict[str, float] = {}
+        self._runs: List[Dict] = []
+
+        # A resumed session keeps the runs measured before the interruption
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    stored = json.load(f)
+                self._runs = stored.get('runs', [])
+                self._session_phases = stored.get('session_phases', {})
+            except (OSError, ValueError):
+                pass
+
+    def start_run(self, config, run_number: int, run_id: str,
+                  workload: Optional[Dict[str, Any]] = None) -> RunMetrics:
+        return RunMetrics(run_id=run_id, config_name=config.name, strategy=config.strategy,
+                          timeframe=config.timeframe, hyperopt_loss=config.hyperopt_loss,
+                          run_number=run_number, workload=workload)
+
+    def run_record(self, run_id: str) -> Optional[Dict]:
+        """The finished run's entry as written to metrics.json"""
+        with self._lock:
+            for run in self._runs:
+                if run['run_id'] == run_id:
+                    return dict(run)
+        return None
+
+    def finish_run(self, run_metrics: RunMetrics, status: str):
+        run_metrics.status = status
+        with self._lock:
+            self._runs = [run for run in self._runs if run['run_id'] != run_metrics.run_id]
+            self._runs.append(run_metrics.as_dict())
+        self.write()
+
+    def add_run_phase(self, run_id: str, name: str, seconds: float):
+        """Charge time spent after a run finished (e.g. the sleep that follows it) to that run"""
+        with self._lock:
+            for run in self._runs:
+                if run['run_id'] == run_id:
+                    run['phases'][name] = round(run['phases'].get(name, 0.0) + seconds, 3)
+                    break
+
+    @contextmanager
+    def session_phase(self, name: str):
+        """Time session-wide work that belongs to no single run, such as binary probes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._session_phases[name] = self._session_phases.get(name, 0.0) + time.perf_counter() - start
+
+    def summary(self) -> Dict:
+        with self._lock:
+            runs = [dict(run, phases=dict(run['phases'])) for run in self._runs]
+            session_phases = dict(self._session_phases)
+
+        totals = dict(session_phases)
+        groups: Dict[Tuple[str, str, str], Dict] = {}
+        for run in runs:
+            key = (run['strategy'], run['timeframe'], run['hyperopt_loss'])
+            group = groups.setdefault(key, {
+                'strategy': key[0], 'timeframe': key[1], 'hyperopt_loss': key[2],
+                'runs': 0, 'phases': {}, 'child_cpu_seconds': 0.0, 'child_max_rss_mb': None
+            })
+            group['runs'] += 1
+            group['child_cpu_seconds'] += run.get('child_cpu_seconds') or 0.0
+            if run.get('child_max_rss_mb') is not None:
+                group['child_max_rss_mb'] = max(group['child_max_rss_mb'] or 0.0, run['child_max_rss_mb'])
+            for name, seconds in run['phases'].items():
+                group['phases'][name] = group['phases'].get(name, 0.0) + seconds
+                totals[name] = totals.get(name, 0.0) + seconds
+
+        ranked = sorted(groups.values(), key=lambda group: sum(group['phases'].values()), reverse=True)
+        for group in ranked:
+            group['total_seconds'] = round(sum(group['phases'].values()), 3)
+            group['phases'] = {name: round(seconds, 3) for name, seconds in group['phases'].items()}
+            group['child_cpu_seconds'] = round(group['child_cpu_seconds'], 3)
+        return {
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'session': self.session,
+            'phases': {name: round(seconds, 3) for name, seconds in totals.items()},
+            'session_phases': {name: round(seconds, 3) for name, seconds in session_phases.items()},
+            'groups': ranked,
+            'runs': runs
+        }
+
+    def write(self):
+        summary = self.summary()
+        try:
+            atomic_write_json(self.path, summary, indent=2)
+            if self.prometheus_file:
+                write_prometheus_textfile(self.prometheus_file, summary)
+        except OSError as e:
+            self.logger.warning(f"Could not write metrics: {str(e)}")
+
+def _labels(**labels: str) -> str:
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+def write_prometheus_textfile(path: Path, summary: Dict):
+    """Write the session summary in the Prometheus text format, atomically as the textfile collector requires"""
+    session = summary['session']
+    no_group = dict(session=session, strategy='', timeframe='', hyperopt_loss='')
+    grouped = [
+        (dict(session=session, strategy=group['strategy'], timeframe=group['timeframe'],
+              hyperopt_loss=group['hyperopt_loss']), group)
+        for group in summary['groups']
+    ]
+
+    lines = [
+        "# HELP hyperopt_phase_seconds Wall time spent per phase of the hyperopt automation",
+        "# TYPE hyperopt_phase_seconds gauge",
+    ]
+    lines += [f"hyperopt_phase_seconds{_labels(**no_group, phase=name)} {seconds}"
+              for name, seconds in summary['session_phases'].items()]
+    lines += [f"hyperopt_phase_seconds{_labels(**labels, phase=name)} {seconds}"
+              for labels, group in grouped for name, seconds in group['phases'].items()]
+
+    lines += [
+        "# HELP hyperopt_child_cpu_seconds CPU time of hyperopt children including their workers",
+        "# TYPE hyperopt_child_cpu_seconds gauge",
+    ]
+    lines += [f"hyperopt_child_cpu_seconds{_labels(**labels)} {group['child_cpu_seconds']}"
+              for labels, group in grouped]
+
+    lines += [
+        "# HELP hyperopt_child_max_rss_bytes Peak RSS of the largest hyperopt child process",
+        "# TYPE hyperopt_child_max_rss_bytes gauge",
+    ]
+    lines += [f"hyperopt_child_max_rss_bytes{_labels(**labels)} {int(group['child_max_rss_mb'] * 1024 * 1024)}"
+              for labels, group in grouped if group['child_max_rss_mb'] is not None]
+
+    lines += [
+        "# HELP hyperopt_runs Runs measured in the session",
+        "# TYPE hyperopt_runs gauge",
+    ]
+    lines += [f"hyperopt_runs{_labels(**labels)} {group['runs']}" for labels, group in grouped]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # The collector only picks up *.prom files, so the temp name must not end in .prom
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_text("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
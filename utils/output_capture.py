@@ -0,0 +1,107 @@
+"""
+Per-run capture of hyperopt's console output.
+The thread draining the child's pipe only hands chunks to a bounded queue; a
+writer thread gzips them into run_N/hyperopt_output.log.gz and rotates to
+.1.gz, .2.gz, ... once a file holds `max_bytes` of output, keeping `backups`
+older files. If the disk cannot keep up (or a 1m run floods its output), chunks
+are dropped with a marker in the log instead of stalling the pipe, which would
+stall hyperopt itself.
+"""
+
+import gzip
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+CAPTURE_FILENAME = "hyperopt_output.log.gz"
+CAPTURE_MAX_BYTES = 50 * 1024 ** 2  # uncompressed output per file before it is rotated
+CAPTURE_BACKUPS = 3  # rotated files kept besides the live one
+CAPTURE_QUEUE_CHUNKS = 256  # chunks (up to 64 KB each) buffered for the writer
+CAPTURE_FLUSH_INTERVAL = 2.0  # seconds between flushes, so a crashed run still leaves readable output
+
+class OutputCapture:
+    """Rotating gzip capture of a child's output, written off the reading thread"""
+
+    def __init__(self, path: Path, logger: logging.Logger, max_bytes: int = CAPTURE_MAX_BYTES,
+                 backups: int = CAPTURE_BACKUPS):
+        self.path = Path(path)
+        self.logger = logger
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(CAPTURE_QUEUE_CHUNKS)
+        self._file = None
+        self._written = 0
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.path.parent.name}", daemon=True)
+        self._thread.start()
+
+    def write(self, chunk: bytes):
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            self.dropped += len(chunk)
+
+    def close(self):
+        """Write what is queued, then close the file"""
+        self._queue.put(None)
+        self._thread.join()
+        if self.dropped:
+            self.logger.warning(f"Dropped {self.dropped} bytes of hyperopt output from {self.path} "
+                                f"(writer could not keep up)")
+
+    def _rotated(self, index: int) -> Path:
+        return self.path.with_name(f"{self.path.name[:-len('.gz')]}.{index}.gz")
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        self._rotated(self.backups).unlink(missing_ok=True)
+        for index in range(self.backups - 1, 0, -1):
+            if self._rotated(index).exists():
+                self._rotated(index).rename(self._rotated(index + 1))
+        if self.backups > 0:
+            self.path.rename(self._rotated(1))
+
+    def _write(self, data: bytes):
+        # Rotated only when more output comes, so the live file always holds the latest
+        if self._file is not None and self._written >= self.max_bytes:
+            self._rotate()
+        if self._file is None:
+            self._file = gzip.open(self.path, 'wb', compresslevel=6)
+            self._written = 0
+        self._file.write(data)
+        self._written += len(data)
+
+    def _run(self):
+        reported = 0
+        last_flush = time.monotonic()
+        try:
+            while True:
+                try:
+                    chunk = self._queue.get(timeout=CAPTURE_FLUSH_INTERVAL)
+                except queue.Empty:
+                    chunk = b''
+                if chunk is None:
+                    break
+                if self.dropped > reported:
+                    self._write(f"\n[... {self.dropped - reported} bytes of output dropped ...]\n".encode())
+                    reported = self.dropped
+                if chunk:
+                    self._write(chunk)
+                if self._file and time.monotonic() - last_flush >= CAPTURE_FLUSH_INTERVAL:
+                    self._file.flush()
+                    last_flush = time.monotonic()
+        except OSError as e:
+            self.logger.warning(f"Capturing hyperopt output to {self.path} failed: {str(e)}")
+            # Keep draining so the reading thread never blocks on a full queue
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if self._file:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
@@ -0,0 +1,214 @@
+"""
+Cost-model planner.
+Past runs in the results store give a runtime model keyed on strategy,
+timeframe, epochs, days_back, pair count and spaces. Each pending run is
+estimated from identical past runs, or else from the seconds per epoch and
+candle of the most similar ones. Runs whose shape is unknown (summaries
+imported from before the store, without their config_runN.json) still count
+as plain per-strategy/timeframe durations. The scheduler starts the longest runs first
+(LPT), which keeps one long 1m job from stretching the end of the session,
+and `--plan` prints the predicted schedule and wall time without running
+anything.
+"""
+
+import heapq
+import json
+import logging
+import statistics
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.config_loader import HyperoptConfig, pair_whitelist, parse_timerange
+from utils.memory import candle_count
+from utils.results_store import ResultsStore
+
+# Seconds per epoch per candle when nothing comparable has run yet (~10s/epoch for 1M candles)
+DEFAULT_SECONDS_PER_EPOCH_CANDLE = 1e-5
+
+@dataclass(frozen=True)
+class RunShape:
+    """What a run's duration depends on"""
+    strategy: str
+    timeframe: str
+    epochs: int
+    days_back: int
+    pair_count: int
+    spaces: str
+
+    @property
+    def candles(self) -> int:
+        return candle_count(self.pair_count, self.days_back, self.timeframe)
+
+def config_shape(config: HyperoptConfig) -> RunShape:
+    return RunShape(
+        strategy=config.strategy,
+        timeframe=config.timeframe,
+        epochs=config.epochs,
+        days_back=config.days_back,
+        pair_count=len(pair_whitelist(config.pairs_file)),
+        spaces=' '.join(config.spaces)
+    )
+
+@dataclass
+class Estimate:
+    seconds: float
+    basis: str  # where the estimate comes from, shown in the plan
+
+@dataclass
+class PlannedRun:
+    config: HyperoptConfig
+    run_num: int
+    estimate: Estimate
+    worker: int
+    start: float  # seconds after the session start
+    end: float
+
+def _legacy_shape(row) -> Optional[RunShape]:
+    """Rows recorded before the store kept run shapes: recover them from the run's config_runN.json"""
+    try:
+        with open(Path(row['output_dir']) / f"config_run{row['run_number']}.json") as f:
+            saved = json.load(f)
+        start, end = parse_timerange(saved['timerange'])
+        if end is None:
+            # An open-ended run covered up to when it started
+            end = datetime.fromisoformat(row['recorded_at']) - timedelta(seconds=row['elapsed_seconds'])
+        days_back = (end - start).days
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return RunShape(
+        strategy=row['strategy'],
+        timeframe=row['timeframe'],
+        epochs=int(saved['epochs']),
+        days_back=days_back,
+        pair_count=len(pair_whitelist(row['pairs_file'] or '')),
+        spaces=' '.join(saved.get('spaces', []))
+    )
+
+def _row_shape(row) -> Optional[RunShape]:
+    if row['epochs'] is None:
+        return _legacy_shape(row)
+    return RunShape(
+        strategy=row['strategy'],
+        timeframe=row['timeframe'],
+        epochs=row['epochs'],
+        days_back=row['days_back'] or 0,
+        pair_count=row['pair_count'] or 0,
+        spaces=row['spaces'] or ''
+    )
+
+class RuntimeModel:
+    """Predicts how long a run takes from the durations of past runs"""
+
+    def __init__(self, samples: Sequence[Tuple[RunShape, float]] = (),
+                 unshaped: Sequence[Tuple[str, str, float]] = ()):
+        self._by_shape: Dict[RunShape, List[float]] = {}
+        for shape, seconds in samples:
+            self._by_shape.setdefault(shape, []).append(seconds)
+        # (strategy, timeframe) -> durations of runs whose epochs, days_back or pairs are unknown
+        self._unshaped: Dict[Tuple[str, str], List[float]] = {}
+        for strategy, timeframe, seconds in unshaped:
+            self._unshaped.setdefault((strategy, timeframe), []).append(seconds)
+
+    @classmethod
+    def from_store(cls, store: ResultsStore, logger: logging.Logger,
+                   outputs_dir: Optional[Path] = None) -> 'RuntimeModel':
+        """Model of every timed run in the store; with outputs_dir, sessions that only have a summary CSV
+        are imported first"""
+        if outputs_dir:
+            imported = store.import_unseen_sessions(outputs_dir)
+            if imported:
+                logger.info(f"Imported {imported} run(s) from summary CSVs of earlier sessions")
+        samples, unshaped = [], []
+        for row in store.timed_runs():
+            shape = _row_shape(row)
+            if shape and shape.epochs > 0:
+                samples.append((shape, row['elapsed_seconds']))
+            elif row['strategy'] and row['timeframe']:
+                unshaped.append((row['strategy'], row['timeframe'], row['elapsed_seconds']))
+        logger.info(f"Runtime model built from {len(samples) + len(unshaped)} past run(s)"
+                    + (f", {len(unshaped)} of unknown shape" if unshaped else ""))
+        return cls(samples, unshaped)
+
+    def _rate(self, matches: Callable[[RunShape], bool]) -> Tuple[Optional[float], int]:
+        """Median seconds per epoch and candle over the matching shapes, and how many runs it is based on"""
+        rates = [seconds / (shape.epochs * max(shape.candles, 1))
+                 for shape, durations in self._by_shape.items() if matches(shape)
+                 for seconds in durations]
+        return (statistics.median(rates) if rates else None), len(rates)
+
+    def estimate(self, config: HyperoptConfig) -> Estimate:
+        shape = config_shape(config)
+        durations = self._by_shape.get(shape)
+        if durations:
+            return Estimate(statistics.median(durations), f"median of {len(durations)} identical run(s)")
+
+        work = shape.epochs * max(shape.candles, 1)
+        rate, runs = self._rate(lambda s: s.strategy == shape.strategy and s.timeframe == shape.timeframe)
+        if rate is not None:
+            return Estimate(rate * work, f"scaled from {runs} run(s) of {shape.strategy} {shape.timeframe}")
+
+        # Same strategy and timeframe, epochs and data unknown: better than scaling other strategies' runs
+        durations = self._unshaped.get((shape.strategy, shape.timeframe))
+        if durations:
+            return Estimate(statistics.mean(durations),
+                            f"mean of {len(durations)} {shape.strategy} {shape.timeframe} run(s) of unknown shape")
+
+        for label, matches in (
+            (shape.strategy, lambda s: s.strategy == shape.strategy),
+            (f"any strategy {shape.timeframe}", lambda s: s.timeframe == shape.timeframe),
+            ("all strategies", lambda s: True)
+        ):
+            rate, runs = self._rate(matches)
+            if rate is not None:
+                return Estimate(rate * work, f"scaled from {runs} run(s) of {label}")
+        return Estimate(DEFAULT_SECONDS_PER_EPOCH_CANDLE * work, "no history, default rate")
+
+def longest_first(items: Sequence, config_of: Callable, model: RuntimeModel) -> List:
+    """Order items by predicted duration, longest first; equal estimates keep their order"""
+    estimates: Dict[int, float] = {}
+
+    def seconds(item) -> float:
+        config = config_of(item)
+        if id(config) not in estimates:
+            estimates[id(config)] = model.estimate(config).seconds
+        return estimates[id(config)]
+
+    return sorted(items, key=lambda item: -seconds(item))
+
+def plan_schedule(runs: Sequence[Tuple[HyperoptConfig, int]], model: RuntimeModel, workers: int,
+                  sequential: bool = False) -> List[PlannedRun]:
+    """Predict when each run starts and ends on `workers` workers, each run going to the first free one"""
+    if not sequential:
+        runs = longest_first(runs, lambda run: run[0], model)
+    free_at = [(0.0, worker) for worker in range(1, max(workers, 1) + 1)]
+    heapq.heapify(free_at)
+
+    planned = []
+    for config, run_num in runs:
+        estimate = model.estimate(config)
+        start, worker = heapq.heappop(free_at)
+        end = start + estimate.seconds
+        planned.append(PlannedRun(config=config, run_num=run_num, estimate=estimate, worker=worker,
+                                  start=start, end=end))
+        # Sequential runs sleep between repeats of a config
+        pause = config.sleep_between_runs if sequential and run_num < config.num_runs else 0
+        heapq.heappush(free_at, (end + pause, worker))
+    return planned
+
+def format_duration(seconds: float) -> str:
+    return str(timedelta(seconds=round(seconds)))
+
+def log_plan(planned: List[PlannedRun], logger: logging.Logger, started: Optional[datetime] = None):
+    """Log the schedule one run per line, then the predicted wall time"""
+    started = started or datetime.now()
+    for run in planned:
+        logger.info(
+            f"worker {run.worker:>2}  {format_duration(run.start):>10} -> {format_duration(run.end):>10}  "
+            f"{run.config.name} run {run.run_num} ({run.config.timeframe}, {run.config.epochs} epochs): "
+            f"~{format_duration(run.estimate.seconds)}, {run.estimate.basis}"
+        )
+    makespan = max((run.end for run in planned), default=0.0)
+    logger.info(f"Predicted wall time for {len(planned)} run(s): {format_duration(makespan)}, "
+                f"finishing around {started + timedelta(seconds=makespan):%Y-%m-%d %H:%M}")
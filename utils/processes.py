@@ -0,0 +1,102 @@
+"""
+Child process lifecycle.
+Every hyperopt child is started in its own process group and registered
+here, so shutting the automation down (Ctrl-C, SIGTERM, SIGHUP) takes each
+child down together with its hyperopt workers: SIGTERM to the group, then
+SIGKILL once the grace period is over. No orphan keeps burning cores.
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from typing import List, Optional, Set
+
+from utils.metrics import RunMetrics, wait_child
+
+TERMINATE_GRACE_PERIOD = 30  # seconds a SIGTERMed process group gets before it is SIGKILLed
+
+class RunInterrupted(Exception):
+    """The session is shutting down and the run was stopped before it finished"""
+
+_children: Set[subprocess.Popen] = set()
+_children_lock = threading.Lock()
+_shutdown = threading.Event()
+
+def shutting_down() -> bool:
+    return _shutdown.is_set()
+
+def spawn(cmd: List[str], **popen_kwargs) -> subprocess.Popen:
+    """Popen in a new process group, refused once shutdown has begun"""
+    with _children_lock:
+        if _shutdown.is_set():
+            raise RunInterrupted("session is shutting down")
+        process = subprocess.Popen(cmd, start_new_session=True, **popen_kwargs)
+        _children.add(process)
+    return process
+
+def release(process: subprocess.Popen):
+    with _children_lock:
+        _children.discard(process)
+
+def signal_group(process: subprocess.Popen, sig: int):
+    """Signal the child and every process it started; a group that is already gone is ignored"""
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def _group_alive(process: subprocess.Popen) -> bool:
+    try:
+        os.killpg(process.pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+def terminate_group(process: subprocess.Popen, logger: logging.Logger, grace: float = TERMINATE_GRACE_PERIOD,
+                    run_metrics: Optional[RunMetrics] = None):
+    """SIGTERM the child's process group and SIGKILL whatever is left after the grace period"""
+    signal_group(process, signal.SIGTERM)
+    try:
+        wait_child(process, grace, run_metrics)
+    except subprocess.TimeoutExpired:
+        logger.warning(f"Process group {process.pid} ignored SIGTERM for {grace}s, killing it")
+    # Also takes down workers that outlived their parent
+    signal_group(process, signal.SIGKILL)
+    if process.returncode is None:
+        wait_child(process, grace, run_metrics)
+
+def terminate_all(logger: logging.Logger, grace: float = TERMINATE_GRACE_PERIOD):
+    """Refuse new children and take down every live child group; the threads running them do the reaping"""
+    _shutdown.set()
+    with _children_lock:
+        children = list(_children)
+    if not children:
+        return
+
+    logger.warning(f"Sending SIGTERM to {len(children)} hyperopt process group(s)")
+    for process in children:
+        signal_group(process, signal.SIGTERM)
+
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline and any(_group_alive(process) for process in children):
+        time.sleep(0.1)
+
+    survivors = [process for process in children if _group_alive(process)]
+    if survivors:
+        logger.warning(f"Killing {len(survivors)} process group(s) still alive after {grace}s")
+    for process in survivors:
+        signal_group(process, signal.SIGKILL)
+
+def install_signal_handlers():
+    """Make SIGINT, SIGTERM and SIGHUP begin the shutdown and raise KeyboardInterrupt in the main thread"""
+    def interrupt(signum, frame):
+        _shutdown.set()
+        raise KeyboardInterrupt(f"received {signal.Signals(signum).name}")
+
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, interrupt)
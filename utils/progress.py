@@ -0,0 +1,292 @@
+"""
+Live hyperopt progress tracking.
+Hyperopt child output is consumed on a reader thread and parsed line by line
+for epoch counters and new-best results. A session-wide monitor turns that
+into epochs/sec, best loss and ETA per run and for the whole session, logs it
+periodically and refreshes a machine-readable status.json in the session dir.
+Only the most recent finished runs stay listed there; older ones are folded
+into the session totals so an endless --watch session does not grow it.
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Tuple
+
+from utils.fileio import atomic_write_json
+from utils.output_capture import OutputCapture
+
+STATUS_FILENAME = "status.json"
+STATUS_INTERVAL = 30  # seconds between status refreshes
+STALL_WARNING_AFTER = 900  # warn when a run reports no new epoch for this long
+MAX_PENDING_LINE = 65536  # bytes kept of a line that has not been terminated yet
+MAX_FINISHED_LISTED = 20  # finished runs kept in status.json after they were reported
+
+ANSI_ESCAPE_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+# Rich progress bar: "Epochs ━━━━━━━   12/1000  1% • 0:00:30 • 0:40:00"
+PROGRESS_BAR_RE = re.compile(r"Epochs\D*?(\d+)/(\d+)")
+# Legacy result line: "*   12/1000:     76 trades. ... Objective: -1.23456"
+LEGACY_RESULT_RE = re.compile(r"^\W*?(\*)?\s*(\d+)/(\d+):")
+OBJECTIVE_RE = re.compile(r"Objective:\s*([-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)")
+# Result table row: "│ * Best │   12/1000 │ 76 │ ... │   0.03125 │ 0.00041 BTC (4.05%) │"
+TABLE_SPLIT_RE = re.compile(r"[│┃|]")
+EPOCH_CELL_RE = re.compile(r"^(\d+)/(\d+)$")
+NUMBER_RE = re.compile(r"^[-+]?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?$")
+RESULTS_SAVED_RE = re.compile(r"epochs? saved to '([^']+\.fthypt)'")
+
+@dataclass
+class RunProgress:
+    run_id: str
+    config_name: str
+    run_number: int
+    total_epochs: int
+    current_epoch: int = 0
+    best_loss: Optional[float] = None
+    best_epoch: Optional[int] = None
+    results_file: Optional[str] = None
+    started: float = field(default_factory=time.time)
+    last_progress: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    best_history: List[Tuple[float, float]] = field(default_factory=list)  # (seconds into the run, new best loss)
+    _objective_column: Optional[int] = field(default=None, repr=False)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def epochs_per_sec(self) -> float:
+        return self.current_epoch / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if self.finished:
+            return 0.0
+        rate = self.epochs_per_sec
+        if rate <= 0:
+            return None
+        return max(0, self.total_epochs - self.current_epoch) / rate
+
+    def parse_line(self, line: str):
+        """Update counters from one line of hyperopt output"""
+        line = ANSI_ESCAPE_RE.sub('', line).strip()
+        if not line:
+            return
+
+        saved = RESULTS_SAVED_RE.search(line)
+        if saved:
+            self.results_file = saved.group(1)
+            return
+
+        bar = PROGRESS_BAR_RE.search(line)
+        if bar:
+            self._advance(int(bar.group(1)), int(bar.group(2)))
+
+        if TABLE_SPLIT_RE.search(line):
+            self._parse_table_row([cell.strip() for cell in TABLE_SPLIT_RE.split(line)])
+            return
+
+        legacy = LEGACY_RESULT_RE.match(line)
+        if legacy:
+            epoch = int(legacy.group(2))
+            self._advance(epoch, int(legacy.group(3)))
+            objective = OBJECTIVE_RE.search(line)
+            if objective:
+                self._record_loss(epoch, float(objective.group(1)), bool(legacy.group(1)))
+
+    def _parse_table_row(self, cells: List[str]):
+        if 'Epoch' in cells and 'Objective' in cells:
+            self._objective_column = cells.index('Objective')
+            return
+
+        for index, cell in enumerate(cells):
+            epoch_cell = EPOCH_CELL_RE.match(cell)
+            if epoch_cell:
+                break
+        else:
+            return
+
+        epoch = int(epoch_cell.group(1))
+        self._advance(epoch, int(epoch_cell.group(2)))
+        is_best = any('Best' in cell or '*' in cell for cell in cells[:index])
+
+        if self._objective_column is not None and self._objective_column < len(cells):
+            candidates = [cells[self._objective_column]]
+        else:
+            # Header not seen: the objective is the last plain number in the row
+            candidates = list(reversed(cells[index + 1:]))
+        for candidate in candidates:
+            if NUMBER_RE.match(candidate):
+                self._record_loss(epoch, float(candidate), is_best)
+                break
+
+    def _record_loss(self, epoch: int, loss: float, is_best: bool):
+        # Without --print-all only new-best rows are printed; with it, only '*'/Best rows count
+        if (is_best or self.best_loss is None) and (self.best_loss is None or loss < self.best_loss):
+            self.best_loss = loss
+            self.best_epoch = epoch
+            self.best_history.append((time.time() - self.started, loss))
+
+    def _advance(self, epoch: int, total: int):
+        if total:
+            self.total_epochs = total
+        if epoch > self.current_epoch:
+            self.current_epoch = epoch
+            self.last_progress = time.time()
+
+    def as_dict(self) -> Dict:
+        return {
+            'run_id': self.run_id,
+            'config_name': self.config_name,
+            'run_number': self.run_number,
+            'current_epoch': self.current_epoch,
+            'total_epochs': self.total_epochs,
+            'best_loss': self.best_loss,
+            'best_epoch': self.best_epoch,
+            'epochs_per_sec': round(self.epochs_per_sec, 4),
+            'eta_seconds': None if self.eta_seconds is None else round(self.eta_seconds),
+            'elapsed_seconds': round(self.elapsed),
+            'seconds_since_progress': round(time.time() - self.last_progress),
+            'state': 'finished' if self.finished else 'running'
+        }
+
+class ProgressMonitor:
+    """Session-wide view over all running hyperopt children"""
+
+    def __init__(self, session_dir: Path, logger: logging.Logger, planned_epochs: int = 0,
+                 interval: int = STATUS_INTERVAL, echo_output: bool = True):
+        self.status_file = Path(session_dir) / STATUS_FILENAME
+        self.logger = logger
+        self.planned_epochs = planned_epochs
+        # Interleaved output of parallel children is unreadable, so the scheduler turns echo off
+        self.echo_output = echo_output
+        self.interval = interval
+        self.session_started = time.time()
+        self._runs: Dict[str, RunProgress] = {}
+        # Totals of finished runs already dropped from _runs
+        self._pruned_runs = 0
+        self._pruned_epochs = 0
+        self._pruned_completed_epochs = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="progress-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.write_status()
+
+    def start_run(self, run_id: str, config_name: str, run_number: int, total_epochs: int) -> RunProgress:
+        progress = RunProgress(run_id=run_id, config_name=config_name, run_number=run_number,
+                               total_epochs=total_epochs)
+        with self._lock:
+            self._runs[run_id] = progress
+        return progress
+
+    def finish_run(self, progress: RunProgress):
+        progress.finished = time.time()
+        self.logger.info(
+            f"{progress.run_id}: {progress.current_epoch}/{progress.total_epochs} epochs in "
+            f"{progress.elapsed:.0f}s ({progress.epochs_per_sec:.2f} epochs/s), best loss {progress.best_loss}"
+        )
+        self.write_status()
+
+    def session_status(self) -> Dict:
+        with self._lock:
+            runs = list(self._runs.values())
+            pruned_runs, pruned_epochs, pruned_completed = (
+                self._pruned_runs, self._pruned_epochs, self._pruned_completed_epochs)
+
+        done_epochs = pruned_epochs + sum(run.current_epoch for run in runs)
+        # Finished runs may stop short of their epoch target; count them as complete
+        completed_epochs = pruned_completed + sum(
+            run.total_epochs if run.finished else run.current_epoch for run in runs)
+        elapsed = time.time() - self.session_started
+        rate = done_epochs / elapsed if elapsed > 0 else 0.0
+        remaining = max(0, self.planned_epochs - completed_epochs)
+
+        return {
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'elapsed_seconds': round(elapsed),
+            'planned_epochs': self.planned_epochs,
+            'completed_epochs': completed_epochs,
+            'epochs_per_sec': round(rate, 4),
+            'eta_seconds': round(remaining / rate) if rate > 0 else None,
+            'runs_running': sum(1 for run in runs if not run.finished),
+            'runs_finished': pruned_runs + sum(1 for run in runs if run.finished),
+            'runs': [run.as_dict() for run in runs]
+        }
+
+    def write_status(self) -> Dict:
+        status = self.session_status()
+        try:
+            atomic_write_json(self.status_file, status, indent=2)
+        except OSError as e:
+            self.logger.debug(f"Could not write status file: {str(e)}")
+        self._prune_finished()
+        return status
+
+    def _prune_finished(self):
+        """Fold all but the latest MAX_FINISHED_LISTED reported runs into the session totals"""
+        with self._lock:
+            finished = sorted((run for run in self._runs.values() if run.finished), key=lambda run: run.finished)
+            for run in finished[:max(0, len(finished) - MAX_FINISHED_LISTED)]:
+                self._pruned_runs += 1
+                self._pruned_epochs += run.current_epoch
+                self._pruned_completed_epochs += run.total_epochs
+                del self._runs[run.run_id]
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            status = self.write_status()
+            for run in status['runs']:
+                if run['state'] != 'running':
+                    continue
+                self.logger.info(
+                    f"{run['run_id']}: epoch {run['current_epoch']}/{run['total_epochs']}, "
+                    f"{run['epochs_per_sec']:.2f} epochs/s, best loss {run['best_loss']}, ETA {_format_eta(run['eta_seconds'])}"
+                )
+                if run['seconds_since_progress'] > STALL_WARNING_AFTER:
+                    self.logger.warning(f"{run['run_id']}: no new epoch for {run['seconds_since_progress']}s")
+            self.logger.info(
+                f"Session: {status['completed_epochs']}/{status['planned_epochs']} epochs, "
+                f"{status['epochs_per_sec']:.2f} epochs/s, ETA {_format_eta(status['eta_seconds'])}"
+            )
+
+def _format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "unknown"
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h{rest // 60:02d}m"
+
+def stream_output(stream: IO[bytes], progress: Optional[RunProgress], echo: Optional[IO[bytes]] = None,
+                  capture: Optional[OutputCapture] = None):
+    """Read child output until EOF, echoing and capturing raw bytes and feeding complete lines to the progress parser"""
+    pending = b''
+    for chunk in iter(lambda: stream.read1(65536), b''):
+        if capture:
+            capture.write(chunk)
+        if echo:
+            echo.write(chunk)
+            echo.flush()
+        if progress is None:
+            continue
+
+        # Progress bars redraw with \r, so treat it as a line break too
+        pending += chunk
+        *lines, pending = re.split(rb"[\r\n]", pending)
+        pending = pending[-MAX_PENDING_LINE:]
+        for raw in lines:
+            progress.parse_line(raw.decode('utf-8', errors='replace'))
+
+    if progress and pending:
+        progress.parse_line(pending.decode('utf-8', errors='replace'))
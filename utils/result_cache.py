@@ -0,0 +1,186 @@
+"""
+Content-addressed result cache.
+A seeded hyperopt run is reproducible: the same strategy source, config and
+pairs files, loss, spaces, epochs, timerange, candle data, jobs, random state
+and freqtrade version give the same epochs. Such runs are fingerprinted from those inputs
+(file contents hashed), and a finished run's summary and artifacts are kept in
+outputs/.result_cache/<fp[:2]>/<fp>/. A later run with the same fingerprint
+links them into its run directory instead of running hyperopt again. The
+least recently used entries are evicted once the cache exceeds its size limit.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.config_loader import HyperoptConfig, config_fingerprint, parse_timerange
+from utils.fileio import atomic_write_json
+from utils.results_files import RUN_RESULTS_FILENAME
+
+RESULT_CACHE_DIRNAME = ".result_cache"
+ENTRY_FILENAME = "entry.json"
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024 ** 3
+CACHED_RESULTS_FILENAME = RUN_RESULTS_FILENAME  # linked into a run directory under the name every run uses
+
+# Artifacts carry the run number (best_epoch_run3.json); the cache stores them without it
+_RUN_SUFFIX = re.compile(r"_run\d+(?=\.)")
+
+def file_digest(path: Optional[Path]) -> Optional[str]:
+    """sha256 of a file's contents, None if it cannot be read"""
+    if not path:
+        return None
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def find_strategy_source(strategies_dir: Path, strategy: str) -> Optional[Path]:
+    """The .py file defining `class <strategy>(`, searched the way freqtrade's resolver does"""
+    if not strategies_dir.is_dir():
+        return None
+    definition = re.compile(rf"^class\s+{re.escape(strategy)}\s*\(", re.MULTILINE)
+    for path in sorted(strategies_dir.rglob("*.py")):
+        try:
+            if definition.search(path.read_text(errors='replace')):
+                return path
+        except OSError:
+            continue
+    return None
+
+def run_fingerprint(config: HyperoptConfig, random_state: int, jobs: Optional[int], freqtrade_version: str,
+                    user_data_dir: Path) -> Optional[str]:
+    """Fingerprint of everything a seeded hyperopt run's result depends on; None when the end of the candle data
+    it runs over is not known, so the run cannot be cached"""
+    timerange = config.get_timerange()
+    try:
+        _, end = parse_timerange(timerange)
+    except ValueError:
+        return None
+    if not config.data_end and (end is None or end > datetime.now()):
+        return None
+    strategy_source = find_strategy_source(user_data_dir / "strategies", config.strategy)
+    inputs = {
+        'config': config_fingerprint(config),
+        'timerange': timerange,
+        # An open-ended timerange runs up to the newest candle, so new data means a new result
+        'data_end': config.data_end,
+        'random_state': random_state,
+        'jobs': jobs,
+        'freqtrade_version': freqtrade_version,
+        'config_file': file_digest(Path(config.config_file)),
+        'pairs_file': file_digest(Path(config.pairs_file)),
+        'strategy_source': file_digest(strategy_source),
+        # Parameters saved next to the strategy are part of its starting point
+        'strategy_params': file_digest(strategy_source.with_suffix('.json')) if strategy_source else None,
+        'loss_source': file_digest(find_strategy_source(user_data_dir / "hyperopts", config.hyperopt_loss))
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+def _link_or_copy(source: Path, target: Path):
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def _dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+class ResultCache:
+    """Fingerprint-keyed store of finished runs, shared by threads and by processes on the same disk"""
+
+    def __init__(self, cache_dir: Path, logger: logging.Logger, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.logger = logger
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, fingerprint: str) -> Path:
+        return self.cache_dir / fingerprint[:2] / fingerprint
+
+    def lookup(self, fingerprint: str, run_dir: Path, run_num: int) -> Optional[Dict[str, Any]]:
+        """Link a cached run's artifacts into run_dir and return its entry, or None on a miss"""
+        entry_dir = self._entry_dir(fingerprint)
+        entry_file = entry_dir / ENTRY_FILENAME
+        try:
+            with open(entry_file) as f:
+                entry = json.load(f)
+            run_dir.mkdir(parents=True, exist_ok=True)
+            for name in entry['artifacts']:
+                _link_or_copy(entry_dir / name, run_dir / name.replace("_run.", f"_run{run_num}."))
+            # Recency for LRU eviction
+            os.utime(entry_file)
+        except (OSError, ValueError, KeyError):
+            # Missing, half-written or evicted meanwhile: run hyperopt
+            return None
+        return entry
+
+    def store(self, fingerprint: str, run_dir: Path, run_num: int, summary_data: Dict[str, str],
+              elapsed_time: float, results_file: Optional[Path] = None, replace: bool = False):
+        """Keep a finished run's summary and artifacts (replacing an existing entry if asked), then evict"""
+        entry_dir = self._entry_dir(fingerprint)
+        if (entry_dir / ENTRY_FILENAME).exists() and not replace:
+            return
+        entry_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{fingerprint}.", dir=entry_dir.parent))
+        try:
+            artifacts: List[str] = []
+            for path in sorted(run_dir.iterdir()):
+                if path.is_file() and _RUN_SUFFIX.search(path.name):
+                    name = _RUN_SUFFIX.sub("_run", path.name)
+                    shutil.copy2(path, tmp_dir / name)
+                    artifacts.append(name)
+            if results_file and results_file.exists():
+                _link_or_copy(results_file, tmp_dir / CACHED_RESULTS_FILENAME)
+                artifacts.append(CACHED_RESULTS_FILENAME)
+
+            atomic_write_json(tmp_dir / ENTRY_FILENAME, {
+                'fingerprint': fingerprint,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'source_run_dir': str(run_dir),
+                'elapsed_time': elapsed_time,
+                'summary_data': {key: value for key, value in summary_data.items()
+                                 if key not in ('run_number', 'status')},
+                'artifacts': artifacts
+            }, indent=2)
+            if replace:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            # Another worker may have stored the same fingerprint meanwhile; the first one wins
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            self.logger.debug(f"Could not cache {run_dir}: {str(e)}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.logger.info(f"Cached result of {run_dir.name} as {fingerprint[:12]}")
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for entry_file in self.cache_dir.glob(f"*/*/{ENTRY_FILENAME}"):
+                try:
+                    entries.append((entry_file.stat().st_mtime, _dir_size(entry_file.parent), entry_file.parent))
+                except OSError:
+                    continue
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry_dir in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+                self.logger.info(f"Evicted cached result {entry_dir.name[:12]} ({size / 1024 / 1024:.1f} MB)")
@@ -0,0 +1,83 @@
+"""
+.fthypt result file lifecycle.
+Freqtrade saves every hyperopt run as a new file in the shared
+user_data/hyperopt_results directory and offers no option to name it, so a
+run's file is the one hyperopt names when it saves its epochs. Once the run
+has exited that file is hard-linked into its run_N directory, which makes the
+run directory self-contained at no copying cost. The shared directory also
+holds results of hyperopt runs this tool never started, so pruning it is
+opt-in: with a retention age set, files past it are removed when a run
+directory still links them, and compressed into archive/ when not.
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+RUN_RESULTS_FILENAME = "hyperopt_results.fthypt"  # a run's epochs, inside its run directory
+RESULTS_ARCHIVE_DIRNAME = "archive"
+LAST_RESULT_FILENAME = ".last_result.json"  # freqtrade's pointer to the newest results file
+DEFAULT_RETENTION_DAYS = 0  # days; 0 leaves freqtrade's hyperopt_results untouched
+
+def capture_results_file(results_file: Optional[Path], run_dir: Path, logger: logging.Logger) -> Optional[Path]:
+    """Hard-link a run's results file into its run directory; the shared path if that is not possible"""
+    if results_file is None or not results_file.is_file():
+        return None
+    target = run_dir / RUN_RESULTS_FILENAME
+    try:
+        if target.exists() and os.path.samefile(results_file, target):
+            return target
+        target.unlink(missing_ok=True)
+        os.link(results_file, target)
+    except OSError as e:
+        # Another filesystem: copying a multi-GB file is not worth it, the run keeps pointing at the shared one
+        logger.info(f"Could not link {results_file.name} into {run_dir} ({str(e)}), keeping the shared path")
+        return results_file
+    return target
+
+def _last_result(results_dir: Path) -> Optional[str]:
+    try:
+        with open(results_dir / LAST_RESULT_FILENAME) as f:
+            return json.load(f).get('latest_hyperopt')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def prune_results_dir(results_dir: Path, retention_days: float, logger: logging.Logger) -> Dict[str, int]:
+    """Remove or archive .fthypt files older than retention_days; the newest result freqtrade points at is kept"""
+    counts = {'removed': 0, 'archived': 0, 'freed_bytes': 0}
+    if retention_days <= 0 or not results_dir.is_dir():
+        return counts
+    cutoff = time.time() - retention_days * 86400
+    latest = _last_result(results_dir)
+    archive_dir = results_dir / RESULTS_ARCHIVE_DIRNAME
+
+    for path in results_dir.glob("*.fthypt"):
+        try:
+            stat = path.stat()
+            if stat.st_mtime >= cutoff or path.name == latest:
+                continue
+            if stat.st_nlink > 1:
+                # A run directory (or the result cache) holds another link: nothing is lost
+                path.unlink()
+                counts['removed'] += 1
+                continue
+            archive_dir.mkdir(exist_ok=True)
+            archived = archive_dir / f"{path.name}.gz"
+            with open(path, 'rb') as source, gzip.open(archived, 'wb') as target:
+                shutil.copyfileobj(source, target, 1 << 20)
+            os.utime(archived, (stat.st_atime, stat.st_mtime))
+            counts['freed_bytes'] += stat.st_size - archived.stat().st_size
+            path.unlink()
+            counts['archived'] += 1
+        except OSError as e:
+            logger.warning(f"Could not prune {path.name}: {str(e)}")
+
+    if counts['removed'] or counts['archived']:
+        logger.info(f"Pruned {results_dir}: removed {counts['removed']} file(s) kept in run directories, "
+                    f"archived {counts['archived']} ({counts['freed_bytes'] / 1024 ** 2:.1f} MB freed)")
+    return counts
@@ -0,0 +1,145 @@
+"""
+Native reader for freqtrade's .fthypt hyperopt results files.
+Each line of a .fthypt file is one JSON-encoded epoch. The file is streamed
+once to pick out the best and the last profitable epoch, so summary metrics
+no longer need two `freqtrade hyperopt-show` processes per run.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+@dataclass
+class HyperoptResults:
+    results_file: Path
+    total_epochs: int = 0
+    profitable_epochs: int = 0
+    best: Optional[Dict[str, Any]] = None
+    profitable: Optional[Dict[str, Any]] = None
+
+def _results_file_pattern(strategy: str):
+    # strategy_<Strategy>_<YYYY-mm-dd_HH-MM-SS>.fthypt; anchored so E0V1E never matches E0V1E_55 files
+    return re.compile(rf"^strategy_{re.escape(strategy)}_\d{{4}}-\d{{2}}-\d{{2}}_\d{{2}}-\d{{2}}-\d{{2}}\.fthypt$")
+
+def _first_epoch(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            line = f.readline()
+        return json.loads(line) if line.strip() else None
+    except (OSError, ValueError):
+        return None
+
+def find_results_file(results_dir: Path, strategy: str, since: float,
+                      timeframe: Optional[str] = None) -> Optional[Path]:
+    """Return the newest .fthypt file for a strategy written after `since`, matching the timeframe if given"""
+    if not results_dir.is_dir():
+        return None
+
+    pattern = _results_file_pattern(strategy)
+    candidates = []
+    for path in results_dir.iterdir():
+        if not pattern.match(path.name):
+            continue
+        mtime = path.stat().st_mtime
+        if mtime >= since:
+            candidates.append((mtime, path))
+
+    for _, path in sorted(candidates, reverse=True):
+        if timeframe is None:
+            return path
+        epoch = _first_epoch(path)
+        if epoch and epoch.get('results_metrics', {}).get('timeframe') in (None, timeframe):
+            return path
+    return None
+
+def _is_profitable(epoch: Dict[str, Any]) -> bool:
+    metrics = epoch.get('results_metrics', {})
+    profit = metrics.get('profit_total', epoch.get('total_profit', 0))
+    return (profit or 0) > 0
+
+def read_hyperopt_results(results_file: Path, logger: Optional[logging.Logger] = None) -> HyperoptResults:
+    """Stream a .fthypt file once, keeping only the epochs hyperopt-show --best / --profitable would show"""
+    results = HyperoptResults(results_file=results_file)
+    lowest_loss = None
+    truncated = None
+
+    with open(results_file) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if truncated:
+                # Only the last line may be cut short; anything earlier is a damaged file
+                raise truncated
+            try:
+                epoch = json.loads(line)
+            except json.JSONDecodeError as e:
+                truncated = e
+                continue
+            results.total_epochs += 1
+
+            # hyperopt-show --best shows the last epoch flagged as a new best
+            if epoch.get('is_best'):
+                results.best = epoch
+            if lowest_loss is None or epoch.get('loss', float('inf')) < lowest_loss.get('loss', float('inf')):
+                lowest_loss = epoch
+
+            # hyperopt-show --profitable shows the last profitable epoch
+            if _is_profitable(epoch):
+                results.profitable_epochs += 1
+                results.profitable = epoch
+
+    if truncated and logger:
+        # A stopped run can be killed halfway through writing an epoch
+        logger.debug(f"Ignoring the incomplete last line of {results_file.name} after "
+                     f"{results.total_epochs} epochs: {truncated}")
+    if results.best is None:
+        results.best = lowest_loss
+    return results
+
+def epoch_summary_metrics(epoch: Dict[str, Any]) -> Dict[str, str]:
+    """Map an epoch onto the summary CSV metric columns, formatted like the hyperopt-show values"""
+    metrics = epoch.get('results_metrics', {})
+    summary = {}
+
+    if epoch.get('current_epoch') is not None:
+        summary['epoch'] = str(epoch['current_epoch'])
+
+    if epoch.get('loss') is not None:
+        summary['loss'] = f"{epoch['loss']:.5f}"
+
+    if metrics.get('profit_total') is not None:
+        summary['total_profit'] = f"{metrics['profit_total'] * 100:.2f}"
+
+    if metrics.get('total_trades') is not None:
+        summary['trade_count'] = str(metrics['total_trades'])
+
+    wins, draws, losses = (metrics.get(key) for key in ('wins', 'draws', 'losses'))
+    if None not in (wins, draws, losses) and wins + draws + losses > 0:
+        summary['win_ratio'] = f"{wins / (wins + draws + losses) * 100:.1f}%"
+
+    if metrics.get('profit_factor') is not None:
+        summary['profit_factor'] = f"{metrics['profit_factor']:.2f}"
+
+    drawdown = metrics.get('max_drawdown_account', metrics.get('max_relative_drawdown'))
+    if drawdown is not None:
+        summary['max_drawdown'] = f"{drawdown * 100:.2f}%"
+
+    return summary
+
+def best_epoch_record(epoch: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact JSON-friendly view of an epoch: parameters plus scalar metrics"""
+    metrics = epoch.get('results_metrics', {})
+    return {
+        'epoch': epoch.get('current_epoch'),
+        'loss': epoch.get('loss'),
+        'results_explanation': epoch.get('results_explanation'),
+        'params_dict': epoch.get('params_dict', {}),
+        'params_details': epoch.get('params_details', {}),
+        'results_metrics': {
+            key: value for key, value in metrics.items()
+            if isinstance(value, (int, float, str, bool)) or value is None
+        }
+    }
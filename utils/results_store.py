@@ -0,0 +1,287 @@
+"""
+Results store spanning all sessions.
+Every finished run is written to a local SQLite database with typed numeric
+columns, indexed on strategy, timeframe, loss and session. WAL mode and a busy
+timeout let several workers (threads or processes) write concurrently, and the
+per-session hyperopt_summary.csv is re-exported from the store after every
+recorded run for compatibility.
+"""
+
+import csv
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+RESULTS_DB_FILENAME = "hyperopt_results.sqlite"
+SUMMARY_CSV_FILENAME = "hyperopt_summary.csv"
+BUSY_TIMEOUT_MS = 30000
+
+SUMMARY_FIELDNAMES = [
+    'config_name',
+    'strategy',
+    'timeframe',
+    'hyperopt_loss',
+    'config_file',
+    'pairs_file',
+    'run_number',
+    'epoch',
+    'total_profit',
+    'trade_count',
+    'win_ratio',
+    'profit_factor',
+    'max_drawdown',
+    'elapsed_time',
+    'output_dir',
+    'status'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    config_name TEXT,
+    strategy TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    hyperopt_loss TEXT NOT NULL,
+    config_file TEXT,
+    pairs_file TEXT,
+    run_number INTEGER,
+    epoch INTEGER,
+    loss REAL,
+    total_profit REAL,
+    trade_count INTEGER,
+    win_ratio REAL,
+    profit_factor REAL,
+    max_drawdown REAL,
+    elapsed_seconds REAL,
+    output_dir TEXT NOT NULL UNIQUE,
+    recorded_at TEXT NOT NULL,
+    status TEXT,
+    epochs INTEGER,
+    days_back INTEGER,
+    pair_count INTEGER,
+    spaces TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_strategy ON runs (strategy);
+CREATE INDEX IF NOT EXISTS idx_runs_timeframe ON runs (timeframe);
+CREATE INDEX IF NOT EXISTS idx_runs_loss ON runs (hyperopt_loss);
+CREATE INDEX IF NOT EXISTS idx_runs_session ON runs (session);
+CREATE INDEX IF NOT EXISTS idx_runs_recorded_at ON runs (recorded_at);
+"""
+
+COLUMNS = [
+    'session', 'config_name', 'strategy', 'timeframe', 'hyperopt_loss', 'config_file', 'pairs_file',
+    'run_number', 'epoch', 'loss', 'total_profit', 'trade_count', 'win_ratio', 'profit_factor',
+    'max_drawdown', 'elapsed_seconds', 'output_dir', 'recorded_at', 'status', 'epochs', 'days_back',
+    'pair_count', 'spaces'
+]
+
+# Columns added after the first release, with their types, for upgrading existing databases
+ADDED_COLUMNS = {
+    'status': 'TEXT',
+    'epochs': 'INTEGER',
+    'days_back': 'INTEGER',
+    'pair_count': 'INTEGER',
+    'spaces': 'TEXT'
+}
+
+def parse_number(value: Any) -> Optional[float]:
+    """'12.5%' -> 12.5, '1.30' -> 1.3, 'N/A' / '' -> None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().rstrip('%').strip()
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def _parse_int(value: Any) -> Optional[int]:
+    number = parse_number(value)
+    return int(number) if number is not None else None
+
+def _parse_elapsed(value: str) -> float:
+    """Parse str(timedelta) output such as '2:03:04.5' or '1 day, 2:03:04'"""
+    days = 0
+    if 'day' in value:
+        day_part, value = value.split(',', 1)
+        days = int(day_part.split()[0])
+    try:
+        hours, minutes, seconds = value.strip().split(':')
+        return days * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:
+        return 0.0
+
+def _format(value: Optional[float], fmt: str, suffix: str = '') -> str:
+    return 'N/A' if value is None else f"{value:{fmt}}{suffix}"
+
+class ResultsStore:
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()  # parallel runs export the same CSV
+        self._conn = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT_MS / 1000,
+                                     check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.executescript(SCHEMA)
+        self._add_missing_columns()
+
+    def _add_missing_columns(self):
+        existing = {row['name'] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        with self._conn:
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {column_type}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _row(self, summary_data: Dict[str, str], session: str, elapsed_seconds: float, output_dir: str) -> Tuple:
+        data = summary_data
+        row = {
+            'session': session,
+            'config_name': data.get('config_name'),
+            'strategy': data.get('strategy', ''),
+            'timeframe': data.get('timeframe', ''),
+            'hyperopt_loss': data.get('hyperopt_loss', ''),
+            'config_file': data.get('config_file'),
+            'pairs_file': data.get('pairs_file'),
+            'run_number': _parse_int(data.get('run_number')),
+            'epoch': _parse_int(data.get('epoch')),
+            'loss': parse_number(data.get('loss')),
+            'total_profit': parse_number(data.get('total_profit')),
+            'trade_count': _parse_int(data.get('trade_count')),
+            'win_ratio': parse_number(data.get('win_ratio')),
+            'profit_factor': parse_number(data.get('profit_factor')),
+            'max_drawdown': parse_number(data.get('max_drawdown')),
+            'elapsed_seconds': elapsed_seconds,
+            'output_dir': output_dir,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'status': data.get('status') or None,
+            # What the run's duration depends on, for the planner's runtime model
+            'epochs': _parse_int(data.get('epochs')),
+            'days_back': _parse_int(data.get('days_back')),
+            'pair_count': _parse_int(data.get('pair_count')),
+            'spaces': data.get('spaces') or None
+        }
+        return tuple(row[column] for column in COLUMNS)
+
+    def _insert(self, rows: List[Tuple]) -> int:
+        if not rows:
+            return 0
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO runs ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+        return len(rows)
+
+    def record_many(self, results: Iterable, session: str) -> int:
+        """Write several ExecutionResults in one transaction; a rerun of the same run directory replaces its row"""
+        return self._insert([
+            self._row(dict(result.summary_data, config_name=result.summary_data.get('config_name', result.config_name),
+                           run_number=result.summary_data.get('run_number', result.run_number)),
+                      session, float(result.elapsed_time), str(result.metrics_dir))
+            for result in results
+        ])
+
+    def record(self, result, session: str):
+        self.record_many([result], session)
+
+    def has_session(self, session: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM runs WHERE session = ? LIMIT 1", (session,)
+            ).fetchone() is not None
+
+    def import_session_csv(self, session: str, csv_file: Path) -> int:
+        """Load a summary CSV written before the store existed, so resuming that session keeps its rows"""
+        with open(csv_file, newline='') as f:
+            return self._insert([
+                self._row(row, session, _parse_elapsed(row.get('elapsed_time', '')), row['output_dir'])
+                for row in csv.DictReader(f)
+                if row.get('output_dir')
+            ])
+
+    def import_unseen_sessions(self, outputs_dir: Path) -> int:
+        """Import the summary CSV of every session under outputs_dir that the store has no rows for"""
+        imported = 0
+        for csv_file in sorted(Path(outputs_dir).glob(f"*/{SUMMARY_CSV_FILENAME}")):
+            session = csv_file.parent.name
+            if self.has_session(session):
+                continue
+            try:
+                imported += self.import_session_csv(session, csv_file)
+            except (OSError, UnicodeDecodeError, csv.Error):
+                continue
+        return imported
+
+    def session_rows(self, session: str) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM runs WHERE session = ? ORDER BY id", (session,)
+            ).fetchall()
+
+    def export_session_csv(self, session: str, csv_file: Path) -> int:
+        """Write the session's runs as hyperopt_summary.csv, formatted like the historic per-row appends"""
+        # Serialised, so a slower export of fewer rows never replaces a newer one
+        with self._export_lock:
+            rows = self.session_rows(session)
+            if not rows:
+                return 0
+
+            csv_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = csv_file.with_suffix(".csv.tmp")
+            with open(tmp_file, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDNAMES)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow({
+                        'config_name': row['config_name'],
+                        'strategy': row['strategy'],
+                        'timeframe': row['timeframe'],
+                        'hyperopt_loss': row['hyperopt_loss'],
+                        'config_file': row['config_file'],
+                        'pairs_file': row['pairs_file'],
+                        'run_number': row['run_number'],
+                        'epoch': _format(row['epoch'], 'd'),
+                        'total_profit': _format(row['total_profit'], '.2f'),
+                        'trade_count': _format(row['trade_count'], 'd'),
+                        'win_ratio': _format(row['win_ratio'], '.1f', '%'),
+                        'profit_factor': _format(row['profit_factor'], '.2f'),
+                        'max_drawdown': _format(row['max_drawdown'], '.2f', '%'),
+                        'elapsed_time': str(timedelta(seconds=row['elapsed_seconds'] or 0)),
+                        'output_dir': row['output_dir'],
+                        'status': row['status'] or ''
+                    })
+            tmp_file.replace(csv_file)
+            return len(rows)
+
+    def timed_runs(self) -> List[sqlite3.Row]:
+        """Runs of every session that went the full course, with how long they took"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT * FROM runs WHERE elapsed_seconds > 0 AND (status IS NULL OR status = 'complete')"
+            ).fetchall()
+
+    def best_profit_per_strategy(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Best total profit per strategy, optionally only for runs recorded after `since`"""
+        query = (
+            "SELECT strategy, MAX(total_profit) AS best_profit, COUNT(*) AS runs "
+            "FROM runs WHERE total_profit IS NOT NULL"
+        )
+        params: List[Any] = []
+        if since is not None:
+            query += " AND recorded_at >= ?"
+            params.append(since.isoformat(timespec='seconds'))
+        query += " GROUP BY strategy ORDER BY best_profit DESC"
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(query, params)]
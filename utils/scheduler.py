@@ -0,0 +1,282 @@
+"""
+Parallel run scheduler.
+Fans every (config, run_number) pair out into a bounded worker pool and caps
+the `-j` passed to each hyperopt child so the total cores used stay inside the
+CPU budget. Runs predicted to take longest start first. With a memory gate, queued runs only start once their estimated
+footprint fits next to the runs already going. In watch mode the loop keeps
+going when the queue is empty and takes new configurations from a ConfigWatcher.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.config_loader import HyperoptConfig
+from utils.early_stop import result_loss
+from utils.ledger import SessionLedger, SKIPPED
+from utils.budget import TimeBudget
+from utils.memory import MemoryGate, run_workload
+from utils.planner import RuntimeModel, format_duration, longest_first, plan_schedule
+from utils.processes import terminate_all
+from utils.watch import ConfigWatcher
+from utils.executor import (
+    ExecutionResult,
+    RunOptions,
+    allocate_run_dir,
+    create_output_directory_structure,
+    execute_run,
+    run_id_for
+)
+
+ADMISSION_POLL_INTERVAL = 5  # seconds between admission checks while runs are deferred for memory
+MAX_DEFER_SECONDS = 900  # after this long a deferred run stops lighter runs from overtaking it
+
+@dataclass
+class RunTask:
+    config: HyperoptConfig
+    run_num: int
+    run_dir: Path
+    deferred_since: Optional[float] = None
+
+def resolve_cpu_budget(workers: int, jobs_per_run: Optional[int], cpu_budget: Optional[int],
+                       logger: logging.Logger) -> Tuple[int, int]:
+    """Return (workers, jobs_per_run) so that workers * jobs_per_run never exceeds the CPU budget"""
+    budget = cpu_budget or os.cpu_count() or 1
+    workers = max(1, min(workers, budget))
+
+    if not jobs_per_run:
+        jobs_per_run = max(1, budget // workers)
+    elif workers * jobs_per_run > budget:
+        capped = max(1, budget // workers)
+        logger.warning(
+            f"{workers} workers x {jobs_per_run} jobs exceeds the CPU budget of {budget}; "
+            f"capping jobs per run to {capped}"
+        )
+        jobs_per_run = capped
+
+    return workers, jobs_per_run
+
+def plan_run_tasks(configs: Iterable[HyperoptConfig], output_dir: Path, session_timestamp: str,
+                   logger: logging.Logger, ledger: Optional[SessionLedger] = None,
+                   claimed: Optional[Set[Path]] = None) -> List[RunTask]:
+    """Expand configs into one task per run, keeping the outputs/<session>/<timeframe>/<loss>/<strategy>/run_N layout"""
+    tasks = []
+    # Shared across calls when configs arrive in batches, so later batches never reuse a run_N
+    claimed = set() if claimed is None else claimed
+
+    for config in configs:
+        if not Path(config.config_file).exists():
+            logger.error(f"Config file missing: {config.config_file}")
+            continue
+
+        strategy_dir = create_output_directory_structure(output_dir, config, session_timestamp)
+        for run_num in range(1, config.num_runs + 1):
+            # Two configs sharing timeframe/loss/strategy would otherwise share run_N directories
+            allocated_num, run_dir = allocate_run_dir(strategy_dir, run_num, claimed)
+            if allocated_num != run_num:
+                logger.info(f"{config.name} run {run_num} renumbered to run_{allocated_num} to avoid a directory clash")
+
+            if ledger:
+                ledger.register(run_dir, config.name)
+                if ledger.is_done(run_dir):
+                    logger.info(f"Skipping {config.name} run {allocated_num}: already done in this session")
+                    continue
+            tasks.append(RunTask(config=config, run_num=allocated_num, run_dir=run_dir))
+
+    return tasks
+
+class SeriesTracker:
+    """Best losses of finished runs per config, so queued repeats can be skipped once a series converges"""
+
+    def __init__(self):
+        self._losses: Dict[int, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, config: HyperoptConfig, summary_data: Dict[str, str]):
+        loss = result_loss(summary_data)
+        if loss is not None:
+            with self._lock:
+                self._losses.setdefault(id(config), []).append(loss)
+
+    def losses(self, config: HyperoptConfig) -> List[float]:
+        with self._lock:
+            return list(self._losses.get(id(config), []))
+
+def _run_task(task: RunTask, series: SeriesTracker, output_dir: Path, logger: logging.Logger,
+              session_timestamp: str, freqtrade_path: str, dry_run: bool,
+              options: RunOptions) -> Optional[ExecutionResult]:
+    early_stop = options.early_stop
+    if early_stop and early_stop.series_converged(series.losses(task.config)):
+        logger.info(f"{task.config.name} converged (best losses {series.losses(task.config)}), "
+                    f"skipping run {task.run_num}")
+        if options.ledger:
+            options.ledger.mark(task.run_dir, SKIPPED, task.config.name)
+        return None
+
+    result = execute_run(
+        config=task.config,
+        run_num=task.run_num,
+        run_dir=task.run_dir,
+        output_dir=output_dir,
+        logger=logger,
+        freqtrade_path=freqtrade_path,
+        session_timestamp=session_timestamp,
+        dry_run=dry_run,
+        options=options
+    )
+    series.record(task.config, result.summary_data)
+    return result
+
+def _admit_next(pending: List[RunTask], gate: Optional[MemoryGate], budget: Optional[TimeBudget],
+                jobs: Optional[int], logger: logging.Logger) -> Optional[RunTask]:
+    """Take the first queued task that fits in the time budget and in memory; heavier ones stay queued
+    until memory frees up"""
+    if budget:
+        pending[:] = budget.prioritise(pending)
+
+    now = time.monotonic()
+    for index, task in enumerate(pending):
+        seconds = budget.slice_for(task.config) if budget else None
+        if budget and seconds is None:
+            continue
+        if gate:
+            workload = run_workload(task.config, jobs)
+            reason = gate.defer_reason(workload)
+            if reason is not None:
+                if task.deferred_since is None:
+                    task.deferred_since = now
+                    logger.info(f"Deferring {task.config.name} run {task.run_num}: {reason}")
+                elif now - task.deferred_since > MAX_DEFER_SECONDS:
+                    # Let the running runs drain so a heavy run is not starved by a stream of light ones
+                    return None
+                continue
+            gate.admit(run_id_for(task.run_dir), workload)
+            if task.deferred_since is not None:
+                logger.info(f"Starting deferred {task.config.name} run {task.run_num} "
+                            f"after {now - task.deferred_since:.0f}s")
+        if budget:
+            budget.start_run(run_id_for(task.run_dir), task.config, seconds)
+        return pending.pop(index)
+    return None
+
+def run_scheduled(configs: List[HyperoptConfig], output_dir: Path, logger: logging.Logger,
+                  session_timestamp: str, freqtrade_path: str, workers: int,
+                  jobs_per_run: Optional[int] = None, cpu_budget: Optional[int] = None,
+                  dry_run=False, options: Optional[RunOptions] = None,
+                  runtime_model: Optional[RuntimeModel] = None,
+                  watcher: Optional[ConfigWatcher] = None) -> List[ExecutionResult]:
+    """Run every (config, run_number) pair through a bounded worker pool; with a watcher, keep taking new
+    configurations until interrupted"""
+    workers, jobs_per_run = resolve_cpu_budget(workers, jobs_per_run, cpu_budget, logger)
+    options = replace(options or RunOptions(), jobs=jobs_per_run)
+    claimed = set()
+    tasks = plan_run_tasks(configs, output_dir, session_timestamp, logger, options.ledger, claimed)
+    logger.info(f"Scheduling {len(tasks)} runs on {workers} workers with -j {jobs_per_run} each")
+    if runtime_model:
+        # Longest first, so no long run is left to start when the others are done
+        tasks = longest_first(tasks, lambda task: task.config, runtime_model)
+        planned = plan_schedule([(task.config, task.run_num) for task in tasks], runtime_model, workers)
+        logger.info(f"Predicted wall time: {format_duration(max((run.end for run in planned), default=0))}")
+
+    if any(config.sleep_between_runs > 0 for config in configs):
+        logger.info("sleep_between_runs is ignored in scheduler mode")
+
+    results = []
+    series = SeriesTracker()
+    gate = options.memory_gate
+    budget = options.budget
+    if budget:
+        budget.begin(len(configs), workers)
+    pending = list(tasks)
+    running = {}
+    done = 0
+    total = len(tasks)
+    session_dir = output_dir / session_timestamp
+    if watcher:
+        logger.info(f"Watching {', '.join(str(path) for path in watcher.sources()) or 'nothing yet'} "
+                    f"for new configurations every {watcher.interval:g}s (Ctrl-C to stop)")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hyperopt") as pool:
+        try:
+            while pending or running or watcher:
+                if watcher and watcher.due():
+                    new_configs = watcher.poll()
+                    new_tasks = plan_run_tasks(new_configs, output_dir, session_timestamp, logger,
+                                               options.ledger, claimed)
+                    if new_tasks:
+                        pending.extend(new_tasks)
+                        if runtime_model:
+                            pending[:] = longest_first(pending, lambda task: task.config, runtime_model)
+                        total += len(new_tasks)
+                        if budget:
+                            budget.add_configs(len(new_configs))
+                        if options.progress_monitor:
+                            options.progress_monitor.planned_epochs += sum(
+                                config.epochs * config.num_runs for config in new_configs)
+                        logger.info(f"Queued {len(new_tasks)} new run(s), {len(pending)} waiting")
+
+                while pending and len(running) < workers:
+                    task = _admit_next(pending, gate, budget, options.jobs, logger)
+                    if task is None:
+                        break
+                    future = pool.submit(
+                        _run_task,
+                        task=task,
+                        series=series,
+                        output_dir=output_dir,
+                        logger=logger,
+                        session_timestamp=session_timestamp,
+                        freqtrade_path=freqtrade_path,
+                        dry_run=dry_run,
+                        options=options
+                    )
+                    running[future] = task
+
+                if budget and pending and not running:
+                    logger.warning(f"Time budget used up, skipping {len(pending)} queued run(s)")
+                    if options.ledger:
+                        for task in pending:
+                            options.ledger.mark(task.run_dir, SKIPPED, task.config.name)
+                    pending.clear()
+
+                if watcher:
+                    watcher.write_status(session_dir, pending, running.values(), done, total)
+
+                # Deferred runs are rechecked as the running ones grow, finish or free memory
+                timeout = ADMISSION_POLL_INTERVAL if gate and pending else None
+                if watcher:
+                    timeout = min(timeout or watcher.interval, watcher.interval)
+                    if not running:
+                        time.sleep(timeout)
+                        continue
+                finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    done += 1
+                    if gate:
+                        run_id = run_id_for(task.run_dir)
+                        gate.release(run_id)
+                        if options.metrics:
+                            gate.estimator.observe(options.metrics.run_record(run_id))
+                    try:
+                        result = future.result()
+                        if result is not None:
+                            results.append(result)
+                            logger.info(f"[{done}/{total}] Completed {task.config.name} run {task.run_num}")
+                    except Exception as e:
+                        logger.error(f"[{done}/{total}] {task.config.name} run {task.run_num} failed: {str(e)}")
+        except KeyboardInterrupt:
+            # Stop the live children; their worker threads record partial results and return
+            logger.warning("Interrupted, stopping running hyperopt processes")
+            terminate_all(logger)
+            # Futures not yet picked up by a thread are dropped (shutdown's cancel_futures is 3.9+)
+            for future in running:
+                future.cancel()
+            pool.shutdown(wait=True)
+            raise
+
+    return results
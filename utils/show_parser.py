@@ -0,0 +1,206 @@
+"""
+hyperopt-show output parser.
+One pass over the lines with precompiled patterns: the epoch line of the shown
+result and every row of the SUMMARY METRICS table, typed (percentages and
+amounts as floats, durations in seconds, "a / b" cells as tuples). Rows are
+keyed by their label, so rows freqtrade adds later are picked up without
+changes here; the per-pair tables are skipped without being tokenised. Works
+on rich (┃ │) and the older tabulate (|) table layouts.
+"""
+
+import io
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+# "*   71/100:    139 trades. 73/0/66 Wins/Draws/Losses. Avg profit   0.43%. Median profit   0.55%.
+#  Total profit 0.06022130 BTC (  60.22%). Avg duration 5:41:00 min. Objective: -21.82432"
+EPOCH_LINE = re.compile(
+    r"(?P<epoch>\d+)/(?P<total>\d+):\s+(?P<trades>\d+) trades\.\s+"
+    r"(?P<wins>\d+)/(?P<draws>\d+)/(?P<losses>\d+) Wins/Draws/Losses\."
+)
+EPOCH_PROFIT = re.compile(r"Total profit\s+(?:(?P<amount>-?[\d.]+) \S+ )?\(\s*(?P<pct>-?[\d.]+)%\)")
+EPOCH_DURATION = re.compile(r"Avg duration\s+(?P<duration>[^.]*?\d:\d\d:\d\d)")
+EPOCH_OBJECTIVE = re.compile(r"Objective:\s+(?P<objective>-?[\d.]+(?:e-?\d+)?)")
+TABLE_ROW = re.compile(r"^\s*[│┃|]\s*(?P<label>[^│┃|]*?)\s*[│┃|]\s*(?P<value>[^│┃|]*?)\s*[│┃|]\s*$")
+
+DURATION = re.compile(r"^(?:(?P<days>\d+) days?,\s*)?(?P<hours>\d+):(?P<minutes>\d\d):(?P<seconds>\d\d(?:\.\d+)?)(?: min)?$")
+DAY_DURATION = re.compile(r"^(?P<days>\d+)d (?P<hours>\d\d):(?P<minutes>\d\d)$")
+NUMBER = re.compile(r"^(?P<number>-?\d+(?:\.\d+)?(?:e-?\d+)?)(?P<percent>%)?(?: (?P<currency>[A-Z][A-Z0-9]{1,9}))?$")
+AMOUNT_WITH_PERCENT = re.compile(r"^(?P<number>-?[\d.]+) (?P<currency>[A-Z][A-Z0-9]{1,9}) \(\s*(?P<percent>-?[\d.]+)%\)$")
+NUMBER_WITH_RATIO = re.compile(r"^(?P<number>-?[\d.]+) \((?P<ratio>-?[\d.]+)\)$")
+NAMED_NUMBER = re.compile(r"^(?P<name>\S+) (?P<number>-?[\d.]+)%$")
+DATETIME = re.compile(r"^\d{4}-\d\d-\d\d(?: \d\d:\d\d:\d\d)?$")
+SLUG_UNSAFE = re.compile(r"[^a-z0-9]+")
+
+SECTION_TITLE = "SUMMARY METRICS"
+HEADER_LABELS = ("Metric",)
+
+@dataclass
+class ShowReport:
+    epoch: Optional[int] = None
+    total_epochs: Optional[int] = None
+    trades: Optional[int] = None
+    wins: Optional[int] = None
+    draws: Optional[int] = None
+    losses: Optional[int] = None
+    total_profit_pct: Optional[float] = None
+    total_profit_abs: Optional[float] = None
+    avg_duration_seconds: Optional[float] = None
+    objective: Optional[float] = None
+    summary_metrics: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def win_ratio(self) -> Optional[float]:
+        if None in (self.wins, self.draws, self.losses) or not self.wins + self.draws + self.losses:
+            return None
+        return self.wins / (self.wins + self.draws + self.losses) * 100
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'epoch': self.epoch,
+            'total_epochs': self.total_epochs,
+            'trades': self.trades,
+            'wins': self.wins,
+            'draws': self.draws,
+            'losses': self.losses,
+            'win_ratio': self.win_ratio,
+            'total_profit_pct': self.total_profit_pct,
+            'total_profit_abs': self.total_profit_abs,
+            'avg_duration_seconds': self.avg_duration_seconds,
+            'objective': self.objective,
+            'summary_metrics': self.summary_metrics
+        }
+
+def metric_key(label: str) -> str:
+    """'CAGR %' -> 'cagr_pct', 'Avg. Duration Winners' -> 'avg_duration_winners'"""
+    return SLUG_UNSAFE.sub('_', label.lower().replace('%', ' pct ')).strip('_')
+
+def duration_seconds(text: str) -> Optional[float]:
+    """'1 day, 2:03:04', '1:02:00 min' or '0d 03:40' in seconds"""
+    match = DURATION.match(text.strip()) or DAY_DURATION.match(text.strip())
+    if not match:
+        return None
+    return (int(match['days'] or 0) * 86400 + int(match['hours']) * 3600 + int(match['minutes']) * 60
+            + float(match.groupdict().get('seconds') or 0))
+
+def typed_value(text: str) -> Any:
+    """Type a summary-metrics cell; anything unrecognised stays a string"""
+    text = text.strip()
+    if not text:
+        return None
+    match = NUMBER.match(text)
+    if match:
+        return float(match['number'])
+    seconds = duration_seconds(text)
+    if seconds is not None:
+        return seconds
+    if DATETIME.match(text):
+        return text
+    match = AMOUNT_WITH_PERCENT.match(text)
+    if match:
+        return (float(match['number']), float(match['percent']))
+    match = NUMBER_WITH_RATIO.match(text)
+    if match:
+        return (float(match['number']), float(match['ratio']))
+    if ' / ' in text:
+        parts = [typed_value(part) for part in text.split(' / ')]
+        if all(isinstance(part, float) for part in parts):
+            return tuple(parts)
+    match = NAMED_NUMBER.match(text)
+    if match:
+        return (match['name'], float(match['number']))
+    return text
+
+def _parse_epoch_line(line: str, report: ShowReport) -> bool:
+    match = EPOCH_LINE.search(line)
+    if not match:
+        return False
+    report.epoch, report.total_epochs = int(match['epoch']), int(match['total'])
+    report.trades = int(match['trades'])
+    report.wins, report.draws, report.losses = int(match['wins']), int(match['draws']), int(match['losses'])
+
+    profit = EPOCH_PROFIT.search(line, match.end())
+    if profit:
+        report.total_profit_pct = float(profit['pct'])
+        report.total_profit_abs = float(profit['amount']) if profit['amount'] else None
+    duration = EPOCH_DURATION.search(line, match.end())
+    if duration:
+        report.avg_duration_seconds = duration_seconds(duration['duration'])
+    objective = EPOCH_OBJECTIVE.search(line, match.end())
+    if objective:
+        report.objective = float(objective['objective'])
+    return True
+
+def parse_show_lines(lines: Iterable[str]) -> ShowReport:
+    """Single pass over hyperopt-show output lines (a file or pipe can be passed as is)"""
+    report = ShowReport()
+    in_summary = False
+    seen_epoch = False
+
+    for line in lines:
+        if in_summary:
+            # Cheap first-character test keeps the regex off border and blank lines
+            stripped = line.lstrip()
+            if not stripped:
+                continue
+            first = stripped[0]
+            if first in '│┃|':
+                row = TABLE_ROW.match(line)
+                if row and row['label'] and row['label'] not in HEADER_LABELS:
+                    report.summary_metrics[metric_key(row['label'])] = typed_value(row['value'])
+            elif first in '└=' and report.summary_metrics:
+                in_summary = False
+            continue
+
+        if SECTION_TITLE in line:
+            in_summary = True
+        elif not seen_epoch and 'Wins/Draws/Losses' in line:
+            seen_epoch = _parse_epoch_line(line, report)
+
+    return report
+
+def parse_show_output(output: str) -> ShowReport:
+    return parse_show_lines(io.StringIO(output))
+
+def parse_show_file(path: Path) -> ShowReport:
+    """Stream a saved report (results_best_runN.txt) without reading it into memory"""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return parse_show_lines(f)
+
+def _first(metrics: Dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        value = metrics.get(key)
+        if value is not None:
+            return value
+    return None
+
+def _as_percent(value: Any) -> Optional[float]:
+    """A drawdown cell is '3.45%' (float) or '38.9 USDT (3.45%)' (amount, percent)"""
+    if isinstance(value, tuple):
+        return value[-1] if isinstance(value[-1], float) else None
+    return value if isinstance(value, float) else None
+
+def summary_fields(report: ShowReport) -> Dict[str, str]:
+    """The summary CSV columns, formatted like the values read from .fthypt files"""
+    fields: Dict[str, str] = {}
+    if report.epoch is not None:
+        fields['epoch'] = str(report.epoch)
+        fields['trade_count'] = str(report.trades)
+    if report.objective is not None:
+        fields['loss'] = f"{report.objective:.5f}"
+    if report.total_profit_pct is not None:
+        fields['total_profit'] = f"{report.total_profit_pct:.2f}"
+    if report.win_ratio is not None:
+        fields['win_ratio'] = f"{report.win_ratio:.1f}%"
+
+    metrics = report.summary_metrics
+    profit_factor = metrics.get('profit_factor')
+    if isinstance(profit_factor, float):
+        fields['profit_factor'] = f"{profit_factor:.2f}"
+    drawdown = _as_percent(_first(metrics, 'max_pct_of_account_underwater', 'absolute_drawdown_account',
+                                  'max_drawdown_account'))
+    if drawdown is not None:
+        fields['max_drawdown'] = f"{drawdown:.2f}%"
+    return fields
@@ -0,0 +1,123 @@
+"""
+Watch mode.
+With --watch the session does not end when its queue runs dry: the config CSV
+(and, with --watch-dir, every *.csv / *.ini sweep file dropped into a
+directory) is polled for changes, and configurations whose fingerprint the
+session has not seen yet are handed to the running scheduler. Edited rows get a
+new fingerprint and are queued as new work; unchanged rows are never run twice.
+Rows whose data could not be staged are not marked seen, and their file is
+re-read after STAGING_RETRY_INTERVAL even when it has not changed.
+The queue is written to outputs/<session>/queue.json next to status.json.
+"""
+
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.config_loader import HyperoptConfig, config_fingerprint, load_configurations
+from utils.fileio import atomic_write_json
+
+WATCH_INTERVAL = 10  # seconds between checks of the watched config files
+STAGING_RETRY_INTERVAL = 300  # seconds before configs whose staging failed are tried again
+QUEUE_STATUS_FILENAME = "queue.json"
+SWEEP_SUFFIXES = ('.csv', '.ini')
+
+class ConfigWatcher:
+    """Polls config files and returns the configurations that appeared since the last poll"""
+
+    def __init__(self, config_path: Path, logger: logging.Logger, watch_dir: Optional[Path] = None,
+                 prepare: Optional[Callable[[List[HyperoptConfig]], List[HyperoptConfig]]] = None,
+                 interval: float = WATCH_INTERVAL):
+        self.config_path = Path(config_path)
+        self.watch_dir = Path(watch_dir) if watch_dir else None
+        self.logger = logger
+        self.prepare = prepare
+        self.interval = interval
+        self.seen: Set[str] = set()
+        self._stats: Dict[Path, Tuple[int, int]] = {}
+        self._retry_at: Dict[Path, float] = {}
+        self._last_poll: Optional[float] = None
+
+    def sources(self) -> List[Path]:
+        """The config file, then the drop-in sweep files by name"""
+        paths = [self.config_path] if self.config_path.exists() else []
+        if self.watch_dir and self.watch_dir.is_dir():
+            paths += sorted(path for path in self.watch_dir.iterdir()
+                            if path.suffix.lower() in SWEEP_SUFFIXES and not path.name.startswith('.'))
+        return paths
+
+    def due(self) -> bool:
+        return self._last_poll is None or time.monotonic() - self._last_poll >= self.interval
+
+    def poll(self) -> List[HyperoptConfig]:
+        """Configurations from new or changed files that have not been seen before"""
+        first_poll = self._last_poll is None
+        self._last_poll = time.monotonic()
+        candidates: Dict[str, Tuple[Path, HyperoptConfig]] = {}
+        for path in self.sources():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self._stats.get(path) == signature and self._retry_at.get(path, float('inf')) > self._last_poll:
+                continue
+            try:
+                configs = load_configurations(path)
+            except (OSError, ValueError) as e:
+                # Most likely caught halfway through a save; retried on the next poll
+                self.logger.warning(f"Could not read {path.name}, retrying: {str(e)}")
+                continue
+            self._stats[path] = signature
+            self._retry_at.pop(path, None)
+
+            for config in configs:
+                fingerprint = config_fingerprint(config)
+                if fingerprint not in self.seen and fingerprint not in candidates:
+                    candidates[fingerprint] = (path, config)
+
+        for path in set(self._stats) - set(self.sources()):
+            del self._stats[path]
+            self._retry_at.pop(path, None)
+
+        new_configs = [config for _, config in candidates.values()]
+        if new_configs and self.prepare:
+            new_configs = self.prepare(new_configs)
+
+        # Fingerprints are taken before prepare pins the timerange, so match the kept configs by identity
+        kept = {id(config) for config in new_configs}
+        dropped = 0
+        for fingerprint, (path, config) in candidates.items():
+            if id(config) in kept:
+                self.seen.add(fingerprint)
+            else:
+                dropped += 1
+                self._retry_at[path] = self._last_poll + STAGING_RETRY_INTERVAL
+        if dropped:
+            self.logger.info(f"Retrying {dropped} configuration(s) that could not be staged "
+                             f"in {STAGING_RETRY_INTERVAL}s")
+
+        if new_configs and not first_poll:
+            self.logger.info(f"Picked up {len(new_configs)} new configuration(s): "
+                             f"{', '.join(config.name for config in new_configs)}")
+        return new_configs
+
+    def write_status(self, session_dir: Path, pending: Iterable, running: Iterable, done: int,
+                     total: int) -> Dict:
+        """Queue state for outside readers; pending and running hold scheduler RunTasks"""
+        status = {
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'watching': [str(path) for path in self.sources()],
+            'configs_seen': len(self.seen),
+            'runs_total': total,
+            'runs_done': done,
+            'pending': [{'config': task.config.name, 'run': task.run_num} for task in pending],
+            'running': [{'config': task.config.name, 'run': task.run_num} for task in running]
+        }
+        try:
+            atomic_write_json(Path(session_dir) / QUEUE_STATUS_FILENAME, status, indent=2)
+        except OSError as e:
+            self.logger.debug(f"Could not write queue status: {str(e)}")
+        return status
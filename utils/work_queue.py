@@ -0,0 +1,377 @@
+"""
+Shared work queue for coordinator/worker mode.
+The coordinator expands the configs into run tasks in a SQLite database on
+storage every node can reach. Workers on any node claim tasks under a lease,
+keep the lease alive with heartbeats and write their results into the
+session's output tree. Leases that expire because a worker crashed or lost
+the share are put back in the queue, so no run is lost.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.config_loader import HyperoptConfig
+from utils.executor import (
+    RUN_COMPLETE,
+    RUN_INTERRUPTED,
+    RUN_TIMED_OUT,
+    ExecutionResult,
+    RunOptions,
+    collect_partial_result,
+    generate_result_files,
+    run_id_for,
+    run_single_hyperopt,
+    start_progress,
+    verify_freqtrade_installation
+)
+from utils.logger import log_context
+from utils.metrics import timed
+from utils.processes import RunInterrupted
+from utils.results_files import RUN_RESULTS_FILENAME, capture_results_file
+
+QUEUE_PENDING = "pending"
+QUEUE_RUNNING = "running"
+QUEUE_DONE = "done"
+QUEUE_FAILED = "failed"
+
+LEASE_SECONDS = 600  # a claimed task returns to the queue this long after the last heartbeat
+POLL_INTERVAL = 10  # seconds an idle worker waits before asking for work again
+MAX_ATTEMPTS = 3
+BUSY_TIMEOUT_MS = 60000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    config_json TEXT NOT NULL,
+    run_number INTEGER NOT NULL,
+    run_dir TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    summary_json TEXT,
+    elapsed_seconds REAL,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (state, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_session ON tasks (session);
+"""
+
+@dataclass
+class QueuedTask:
+    id: int
+    session: str
+    config: HyperoptConfig
+    run_num: int
+    run_dir: str  # relative to the outputs directory, which may be mounted elsewhere on each node
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class WorkQueue:
+    def __init__(self, db_path: Path, max_attempts: int = MAX_ATTEMPTS):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(str(self.db_path), timeout=BUSY_TIMEOUT_MS / 1000,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # Rollback journal rather than WAL: WAL needs shared memory, which network filesystems do not provide
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return value
+
+    def enqueue(self, session: str, tasks: List, output_dir: Path) -> int:
+        """Add RunTasks of a session; tasks already queued (same run dir) are left as they are"""
+        now = time.time()
+        rows = [
+            (session, json.dumps(asdict(task.config)), task.run_num,
+             Path(task.run_dir).relative_to(output_dir).as_posix(), QUEUE_PENDING, now)
+            for task in tasks
+        ]
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (session, config_json, run_number, run_dir, state, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+        return self._transaction(insert)
+
+    def retry_failed(self, session: str) -> int:
+        def reset(conn):
+            return conn.execute(
+                "UPDATE tasks SET state = ?, attempts = 0, error = NULL, finished_at = NULL "
+                "WHERE session = ? AND state = ?",
+                (QUEUE_PENDING, session, QUEUE_FAILED)).rowcount
+        return self._transaction(reset)
+
+    def _requeue_expired(self, conn) -> int:
+        now = time.time()
+        requeued = conn.execute(
+            "UPDATE tasks SET state = ?, worker = NULL, lease_expires = NULL, error = 'lease expired' "
+            "WHERE state = ? AND lease_expires < ? AND attempts < ?",
+            (QUEUE_PENDING, QUEUE_RUNNING, now, self.max_attempts)).rowcount
+        conn.execute(
+            "UPDATE tasks SET state = ?, worker = NULL, lease_expires = NULL, error = 'lease expired', "
+            "finished_at = ? WHERE state = ? AND lease_expires < ?",
+            (QUEUE_FAILED, now, QUEUE_RUNNING, now))
+        return requeued
+
+    def requeue_expired(self) -> int:
+        """Put tasks whose worker stopped heartbeating back in the queue"""
+        return self._transaction(self._requeue_expired)
+
+    def claim(self, worker: str, lease_seconds: float = LEASE_SECONDS) -> Optional[QueuedTask]:
+        """Take the oldest pending task under a lease, or None when nothing is pending"""
+        def take(conn):
+            self._requeue_expired(conn)
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE state = ? ORDER BY id LIMIT 1", (QUEUE_PENDING,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (QUEUE_RUNNING, worker, time.time() + lease_seconds, row['id']))
+            return QueuedTask(id=row['id'], session=row['session'],
+                              config=HyperoptConfig(**json.loads(row['config_json'])),
+                              run_num=row['run_number'], run_dir=row['run_dir'])
+        return self._transaction(take)
+
+    def heartbeat(self, task_id: int, worker: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        """Extend the lease; False means the task was requeued and now belongs to someone else"""
+        def extend(conn):
+            return conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND worker = ? AND state = ?",
+                (time.time() + lease_seconds, task_id, worker, QUEUE_RUNNING)).rowcount == 1
+        return self._transaction(extend)
+
+    def complete(self, task_id: int, worker: str, result: ExecutionResult) -> bool:
+        def finish(conn):
+            return conn.execute(
+                "UPDATE tasks SET state = ?, lease_expires = NULL, error = NULL, summary_json = ?, "
+                "elapsed_seconds = ?, finished_at = ? WHERE id = ? AND worker = ? AND state = ?",
+                (QUEUE_DONE, json.dumps(result.summary_data), result.elapsed_time, time.time(),
+                 task_id, worker, QUEUE_RUNNING)).rowcount == 1
+        return self._transaction(finish)
+
+    def record_partial(self, task_id: int, worker: str, result: ExecutionResult) -> bool:
+        """Keep what a stopped run found with its task; a later attempt that completes replaces it"""
+        def keep(conn):
+            return conn.execute(
+                "UPDATE tasks SET summary_json = ?, elapsed_seconds = ? WHERE id = ? AND worker = ? AND state = ?",
+                (json.dumps(result.summary_data), result.elapsed_time, task_id, worker, QUEUE_RUNNING)).rowcount == 1
+        return self._transaction(keep)
+
+    def fail(self, task_id: int, worker: str, error: str):
+        """Return a failed task to the queue, or mark it failed once it has used up its attempts"""
+        def give_back(conn):
+            # Only a task that is out of attempts has finished; a requeued one gets its time when it does
+            conn.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts < ? THEN ? ELSE ? END, worker = NULL, "
+                "lease_expires = NULL, error = ?, finished_at = CASE WHEN attempts < ? THEN NULL ELSE ? END "
+                "WHERE id = ? AND worker = ? AND state = ?",
+                (self.max_attempts, QUEUE_PENDING, QUEUE_FAILED, error, self.max_attempts, time.time(),
+                 task_id, worker, QUEUE_RUNNING))
+        self._transaction(give_back)
+
+    def counts(self, session: Optional[str] = None) -> Dict[str, int]:
+        query = "SELECT state, COUNT(*) AS n FROM tasks"
+        params = []
+        if session:
+            query += " WHERE session = ?"
+            params.append(session)
+        with self._lock:
+            rows = self._conn.execute(query + " GROUP BY state", params).fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+    def is_drained(self, session: Optional[str] = None) -> bool:
+        counts = self.counts(session)
+        return not counts.get(QUEUE_PENDING) and not counts.get(QUEUE_RUNNING)
+
+    def results(self, session: str, output_dir: Path) -> List[ExecutionResult]:
+        """Finished runs of a session, shaped like the results execute_run returns; failed tasks are included
+        when a stopped attempt left partial results"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM tasks WHERE session = ? AND (state = ? OR (state = ? AND summary_json IS NOT NULL)) "
+                "ORDER BY finished_at",
+                (session, QUEUE_DONE, QUEUE_FAILED)).fetchall()
+        results = []
+        for row in rows:
+            config = json.loads(row['config_json'])
+            summary_data = json.loads(row['summary_json'] or '{}')
+            results.append(ExecutionResult(
+                config_name=config['name'],
+                run_number=row['run_number'],
+                output_file=output_dir / row['run_dir'] / RUN_RESULTS_FILENAME,
+                metrics_dir=output_dir / row['run_dir'],
+                config_file=Path(config['config_file']),
+                elapsed_time=row['elapsed_seconds'] or 0,
+                summary_data=summary_data,
+                status=summary_data.get('status') or RUN_COMPLETE
+            ))
+        return results
+
+class _Heartbeat:
+    """Keeps a task's lease alive from a background thread while the run executes"""
+
+    def __init__(self, queue: WorkQueue, task: QueuedTask, worker: str, lease_seconds: float,
+                 logger: logging.Logger):
+        self.queue = queue
+        self.task = task
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self.logger = logger
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"heartbeat-{task.id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.task.id, self.worker, self.lease_seconds):
+                    self.lost = True
+                    self.logger.warning(f"Lost the lease on {self.task.run_dir}; it was requeued")
+                    return
+            except sqlite3.Error as e:
+                # Shared storage hiccup: keep trying until the lease runs out
+                self.logger.warning(f"Heartbeat for {self.task.run_dir} failed: {str(e)}")
+
+def run_queued_task(task: QueuedTask, output_dir: Path, freqtrade_path: str, logger: logging.Logger,
+                    options: RunOptions, queue: Optional[WorkQueue] = None,
+                    worker: Optional[str] = None) -> ExecutionResult:
+    """Run one claimed task and collect its results into the run directory; a run that is stopped leaves its
+    partial results with the task in the queue"""
+    run_dir = output_dir / task.run_dir
+    run_dir.mkdir(parents=True, exist_ok=True)
+    metrics = options.metrics
+    run_metrics = metrics.start_run(task.config, task.run_num, run_id_for(run_dir)) if metrics else None
+    start_time = time.time()
+    with log_context(run_id_for(run_dir)):
+        try:
+            progress = start_progress(task.config, task.run_num, run_dir, options)
+            try:
+                result = run_single_hyperopt(task.config, task.run_num, run_dir, logger, freqtrade_path,
+                                             options=options, run_metrics=run_metrics, progress=progress)
+            except (KeyboardInterrupt, RunInterrupted, subprocess.TimeoutExpired) as e:
+                # Same as a local run: keep the epochs found so far, then let the task fail or be requeued
+                status = RUN_TIMED_OUT if isinstance(e, subprocess.TimeoutExpired) else RUN_INTERRUPTED
+                partial = collect_partial_result(task.config, task.run_num, run_dir, logger, freqtrade_path,
+                                                 start_time, status, options, run_metrics, progress)
+                if partial and queue and queue.record_partial(task.id, worker, partial):
+                    logger.warning(f"Recorded partial results of {task.run_dir} ({status})")
+                raise
+            result.elapsed_time = time.time() - start_time
+            with timed(run_metrics, 'results'):
+                result.output_file = capture_results_file(result.results_file, run_dir, logger) or result.output_file
+                result.summary_data = generate_result_files(
+                    freqtrade_path=freqtrade_path,
+                    output_dir=run_dir,
+                    config=task.config,
+                    run_num=task.run_num,
+                    logger=logger,
+                    run_started=start_time,
+                    render_reports=options.render_reports,
+                    run_metrics=run_metrics,
+                    results_file=result.results_file,
+                    freqtrade_pool=options.freqtrade_pool
+                )
+                result.summary_data['status'] = result.status
+        except (Exception, KeyboardInterrupt):
+            if metrics:
+                metrics.finish_run(run_metrics, QUEUE_FAILED)
+            raise
+    if metrics:
+        metrics.finish_run(run_metrics, QUEUE_DONE)
+    return result
+
+def run_worker(queue: WorkQueue, output_dir: Path, logger: logging.Logger, worker: Optional[str] = None,
+               options: Optional[RunOptions] = None, lease_seconds: float = LEASE_SECONDS,
+               poll_interval: float = POLL_INTERVAL, exit_when_empty: bool = False) -> int:
+    """Claim and run tasks until stopped (or, with exit_when_empty, until nothing is pending or running)"""
+    worker = worker or default_worker_id()
+    options = options or RunOptions()
+    freqtrade_path = verify_freqtrade_installation(logger)
+    logger.info(f"Worker {worker} polling {queue.db_path}")
+
+    completed = 0
+    while True:
+        task = queue.claim(worker, lease_seconds)
+        if task is None:
+            if exit_when_empty and queue.is_drained():
+                logger.info(f"Worker {worker}: queue drained after {completed} runs")
+                return completed
+            time.sleep(poll_interval)
+            continue
+
+        logger.info(f"Worker {worker} claimed {task.session}/{task.run_dir}")
+        with _Heartbeat(queue, task, worker, lease_seconds, logger) as heartbeat:
+            try:
+                result = run_queued_task(task, output_dir, freqtrade_path, logger, options, queue=queue, worker=worker)
+            except RunInterrupted:
+                # Not the task's fault: leave it to be requeued once the lease expires
+                raise
+            except Exception as e:
+                logger.error(f"{task.run_dir} failed: {str(e)}")
+                queue.fail(task.id, worker, str(e))
+                continue
+
+        if heartbeat.lost or not queue.complete(task.id, worker, result):
+            logger.warning(f"{task.run_dir} finished after its lease was taken over; result discarded")
+            continue
+        completed += 1
+        logger.info(f"Worker {worker} completed {task.session}/{task.run_dir} in {result.elapsed_time:.0f}s")
+
+def wait_for_session(queue: WorkQueue, session: str, logger: logging.Logger,
+                     interval: float = POLL_INTERVAL) -> Dict[str, int]:
+    """Coordinator side: requeue expired leases and report progress until the session is drained"""
+    last_counts = None
+    while True:
+        requeued = queue.requeue_expired()
+        if requeued:
+            logger.warning(f"Requeued {requeued} task(s) whose worker stopped heartbeating")
+        counts = queue.counts(session)
+        if counts != last_counts:
+            logger.info(f"Session {session} queue: {counts}")
+            last_counts = counts
+        if queue.is_drained(session):
+            return counts
+        time.sleep(interval)